@@ -0,0 +1,154 @@
+"""partition audit_logs by month
+
+Revision ID: faf30488508c
+Revises: adffce76c6b4
+Create Date: 2026-10-18 10:00:00.000000
+
+Rebuilds audit_logs as a table range-partitioned by month on "timestamp", with
+primary key (id, timestamp), a BRIN index on timestamp and a B-tree on request_id
+instead of the 17 single-column B-trees. Existing rows are copied over; the columns
+the application never wrote (request_data, response_data, error_message, api_version,
+endpoint_category, is_error, error_type, client_type, country, referrer,
+parent_request_id, tags) are dropped. Monthly partitions are created from the oldest
+row up to three months ahead; later ones come from scripts/audit_retention.py. The
+partition naming and month arithmetic are copied here from app.database.audit_retention
+so this revision stays fixed when that module changes.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'faf30488508c'
+down_revision: Union[str, None] = 'adffce76c6b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEPT_COLUMNS = (
+    'id, "timestamp", request_id, user_id, action, resource, method, status_code, ip_address, '
+    'user_agent, duration_ms, request_size_bytes, response_size_bytes, log_metadata'
+)
+
+OLD_INDEXED_COLUMNS = (
+    'action', 'api_version', 'client_type', 'country', 'duration_ms', 'endpoint_category', 'error_type',
+    'id', 'ip_address', 'is_error', 'method', 'parent_request_id', 'request_id', 'resource', 'status_code',
+    'timestamp', 'user_id',
+)
+
+
+def _month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(timezone.utc) if moment.tzinfo is not None else moment
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def _add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + (start.month - 1) + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _months_between(start: datetime, end: datetime) -> int:
+    return (end.year - start.year) * 12 + (end.month - start.month)
+
+
+def _create_partitions(first: datetime, last: datetime) -> None:
+    """The default partition plus one audit_logs_yYYYYmMM partition per month from first to last."""
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+    for offset in range(_months_between(first, last) + 1):
+        start = _add_months(first, offset)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{start.year:04d}m{start.month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    for column in OLD_INDEXED_COLUMNS:
+        op.drop_index(f'ix_audit_logs_{column}', table_name='audit_logs')
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned')
+    op.execute('ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey')
+    op.execute('ALTER SEQUENCE IF EXISTS audit_logs_id_seq RENAME TO audit_logs_unpartitioned_id_seq')
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            "timestamp" TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            request_id VARCHAR,
+            user_id VARCHAR,
+            action VARCHAR,
+            resource VARCHAR,
+            method VARCHAR,
+            status_code INTEGER,
+            ip_address VARCHAR,
+            user_agent TEXT,
+            duration_ms INTEGER,
+            request_size_bytes INTEGER,
+            response_size_bytes INTEGER,
+            log_metadata JSON,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute('CREATE INDEX ix_audit_logs_timestamp_brin ON audit_logs USING brin ("timestamp")')
+    op.execute('CREATE INDEX ix_audit_logs_request_id ON audit_logs (request_id)')
+
+    current = _month_start(datetime.now(timezone.utc))
+    oldest = conn.execute(sa.text('SELECT min("timestamp") FROM audit_logs_unpartitioned')).scalar()
+    first = min(_month_start(oldest), current) if oldest is not None else current
+    _create_partitions(first, _add_months(current, 3))
+
+    op.execute(f"""
+        INSERT INTO audit_logs ({KEPT_COLUMNS})
+        SELECT {KEPT_COLUMNS.replace('"timestamp"', 'COALESCE("timestamp", now())')}
+        FROM audit_logs_unpartitioned
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), COALESCE(max(id), 0) + 1, false) FROM audit_logs")
+    op.execute('DROP TABLE audit_logs_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX ix_audit_logs_timestamp_brin')
+    op.execute('DROP INDEX ix_audit_logs_request_id')
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_partitioned')
+    op.execute('ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey')
+    op.execute('ALTER SEQUENCE IF EXISTS audit_logs_id_seq RENAME TO audit_logs_partitioned_id_seq')
+
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('action', sa.String(), nullable=True),
+    sa.Column('resource', sa.String(), nullable=True),
+    sa.Column('method', sa.String(), nullable=True),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('ip_address', sa.String(), nullable=True),
+    sa.Column('user_agent', sa.Text(), nullable=True),
+    sa.Column('request_data', sa.JSON(), nullable=True),
+    sa.Column('response_data', sa.JSON(), nullable=True),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('log_metadata', sa.JSON(), nullable=True),
+    sa.Column('api_version', sa.String(), nullable=True),
+    sa.Column('endpoint_category', sa.String(), nullable=True),
+    sa.Column('request_size_bytes', sa.Integer(), nullable=True),
+    sa.Column('response_size_bytes', sa.Integer(), nullable=True),
+    sa.Column('is_error', sa.Boolean(), nullable=True),
+    sa.Column('error_type', sa.String(), nullable=True),
+    sa.Column('client_type', sa.String(), nullable=True),
+    sa.Column('country', sa.String(), nullable=True),
+    sa.Column('referrer', sa.String(), nullable=True),
+    sa.Column('request_id', sa.String(), nullable=True),
+    sa.Column('parent_request_id', sa.String(), nullable=True),
+    sa.Column('tags', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f'INSERT INTO audit_logs ({KEPT_COLUMNS}) SELECT {KEPT_COLUMNS} FROM audit_logs_partitioned')
+    op.execute("SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), COALESCE(max(id), 0) + 1, false) FROM audit_logs")
+    # Drops every partition with it
+    op.execute('DROP TABLE audit_logs_partitioned')
+    for column in OLD_INDEXED_COLUMNS:
+        op.create_index(f'ix_audit_logs_{column}', 'audit_logs', [column], unique=False)
@@ -1,31 +1,40 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Path, Query
 from fastapi.responses import StreamingResponse
-import zipfile
-import tempfile
 import re
 import time
 import os
 import io
+from itertools import chain
 # commented out the data functions until I can get local athena_config working
 from app.config_manager import ConfigManager
 from app.data_fetchers.s3_data_fetcher import S3DataFetcher
 from app.data_fetchers.athena_data_fetcher import AthenaDataFetcher
-# from app.data_fetchers.database_data_fetcher import DatabaseDataFetcher
+from app.data_fetchers.database_data_fetcher import DatabaseDataFetcher
 from app.data_fetchers.data_fetcher_router import DataFetcherRouter
-# from app.database_manager import DatabaseManager
-from app.utils.data_fetcher_utils import format_coordinate, chunker
+from app.database_manager import DatabaseManager
+from app.utils.data_fetcher_utils import format_coordinate, dataframe_csv_chunks
+from app.utils.grid_index import GridIndex
+from app.utils.metrics import set_request_source
+from app.utils.timed_route import TimedRoute
+from app.utils.gzip_stream import concat_gzip_csv
+from app.utils.zip_stream import ZipSource, entries_as_ready, stream_zip
 
 from app.power_curve.global_power_curve_manager import power_curve_manager
 from app.schemas import (
     WindSpeedResponse,
     AvailablePowerCurvesResponse,
+    PowerCurveStatsResponse,
+    DataFetchStatsResponse,
     EnergyProductionResponse,
+    PowerCurveComparisonResponse,
     GridLocation,
-    NearestLocationsResponse
+    NearestLocationsResponse,
+    NearestLocationsBatchRequest,
+    NearestLocationsBatchResponse
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 # Create router first, then optionally initialize heavy dependencies unless skipped
 data_fetcher_router = DataFetcherRouter()
@@ -42,15 +51,18 @@ if not _skip_data_init:
 athena_data_fetcher_era5 = AthenaDataFetcher(athena_config=athena_config, source_key='era5')
 athena_data_fetcher_ensemble = AthenaDataFetcher(athena_config=athena_config, source_key='ensemble')
 s3_data_fetcher_era5 = S3DataFetcher(bucket_name="windwatts-era5", prefix="era5_timeseries", grid="era5", s3_key_template="era5")
-# db_manager = DatabaseManager()
-# db_data_fetcher = DatabaseDataFetcher(db_manager=db_manager)
+# Grid cell lookup for cache keys; None (raw coordinate keys) unless GRID_INDEX_DIR has the era5 grid
+era5_grid_index = GridIndex.load("era5")
 
 # # Initialize DataFetcherRouter and register fetchers
 data_fetcher_router = DataFetcherRouter()
-# data_fetcher_router.register_fetcher("database", db_data_fetcher)
+# Local result store shared by the workers, enabled by DB_PATH
+if os.environ.get("DB_PATH"):
+    db_data_fetcher = DatabaseDataFetcher(db_manager=DatabaseManager())
+    data_fetcher_router.register_fetcher("database", db_data_fetcher)
 data_fetcher_router.register_fetcher("s3_era5", s3_data_fetcher_era5)
-data_fetcher_router.register_fetcher("athena_era5", athena_data_fetcher_era5)
-data_fetcher_router.register_fetcher("athena_ensemble", athena_data_fetcher_ensemble)
+data_fetcher_router.register_fetcher("athena_era5", athena_data_fetcher_era5, cache_results=True, grid_index=era5_grid_index)
+data_fetcher_router.register_fetcher("athena_ensemble", athena_data_fetcher_ensemble, cache_results=True)
 
 # # Multiple average types for wind speed and production for era5 and ensemble model
 # era5_wind_speed_avg_types = ["global", "yearly"]
@@ -130,6 +142,7 @@ def validate_selected_powercurve(selected_powercurve: str) -> str:
 def validate_source(source: str) -> str:
     if source not in VALID_SOURCES:
         raise HTTPException(status_code=400, detail=f"Invalid source for ERA5 data. Must be one of: {sorted(VALID_SOURCES)}.")
+    set_request_source(source)
     return source
 
 def validate_year(year: int, source: str) -> int:
@@ -170,7 +183,7 @@ def _get_windspeed_core(
         "height": height,
         "avg_type": avg_type
     }
-    data = data_fetcher_router.fetch_data(params, source=source)
+    data = data_fetcher_router.fetch_data_routing(params, source=source)
     if data is None:
         raise HTTPException(status_code=404, detail="Data not found")
     return data
@@ -266,6 +279,46 @@ def fetch_available_powercurves():
     except Exception:
         raise HTTPException(status_code=500, detail="Internal server error.")
 
+@router.get(
+        "/powercurve-stats",
+        summary="Out-of-range wind speed counters for the loaded power curves",
+        response_model=PowerCurveStatsResponse,
+        responses={
+            200: {
+                "description": "Power curve stats retrieved successfully",
+                "model": PowerCurveStatsResponse
+            },
+            500: {"description": "Internal server error"},
+        }
+)
+def fetch_powercurve_stats(
+    selected_powercurve: Optional[str] = Query(None, description="Restrict to one power curve.")
+):
+    if selected_powercurve is not None:
+        selected_powercurve = validate_selected_powercurve(selected_powercurve)
+    try:
+        return {"powercurve_stats": power_curve_manager.curve_stats(selected_powercurve)}
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get(
+        "/fetch-stats",
+        summary="Request coalescing and result cache counters for the data fetchers",
+        response_model=DataFetchStatsResponse,
+        responses={
+            200: {
+                "description": "Fetch stats retrieved successfully",
+                "model": DataFetchStatsResponse
+            },
+            500: {"description": "Internal server error"},
+        }
+)
+def fetch_data_fetch_stats():
+    try:
+        return data_fetcher_router.stats()
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
 def _get_energy_production_core(
     lat: float,
     lng: float,
@@ -297,29 +350,27 @@ def _get_energy_production_core(
         "height": height,
         "avg_type": "none"
     }
-    df = data_fetcher_router.fetch_data(params, source=source)
+    df = data_fetcher_router.fetch_data_routing(params, source=source)
     if df is None:
         raise HTTPException(status_code=404, detail="Data not found")
     
+    # One kW table per request; every view below is derived from it
+    report = power_curve_manager.production_report(df, height, selected_powercurve)
+
     if time_period == 'global':
-        summary_avg_energy_production = power_curve_manager.fetch_avg_energy_production_summary(df, height, selected_powercurve)
-        return {"energy_production": summary_avg_energy_production['Average year']['kWh produced']}
+        return {"energy_production": report.global_kwh}
     
     elif time_period == 'summary':
-        summary_avg_energy_production = power_curve_manager.fetch_avg_energy_production_summary(df, height, selected_powercurve)
-        return {"summary_avg_energy_production": summary_avg_energy_production}
+        return {"summary_avg_energy_production": report.summary}
     
     elif time_period == 'yearly':
-        yearly_avg_energy_production = power_curve_manager.fetch_yearly_avg_energy_production(df, height, selected_powercurve)
-        return {"yearly_avg_energy_production": yearly_avg_energy_production}
+        return {"yearly_avg_energy_production": report.yearly}
     
     elif time_period == 'all':
-        summary_avg_energy_production = power_curve_manager.fetch_avg_energy_production_summary(df, height, selected_powercurve)
-        yearly_avg_energy_production = power_curve_manager.fetch_yearly_avg_energy_production(df, height, selected_powercurve)
         return {
-            "energy_production": summary_avg_energy_production['Average year']['kWh produced'],
-            "summary_avg_energy_production": summary_avg_energy_production,
-            "yearly_avg_energy_production": yearly_avg_energy_production
+            "energy_production": report.global_kwh,
+            "summary_avg_energy_production": report.summary,
+            "yearly_avg_energy_production": report.yearly
         }
 
 @router.get(
@@ -380,6 +431,69 @@ def energy_production(
     except Exception:
         raise HTTPException(status_code=500, detail="Internal server error.")
 
+def _compare_powercurves_core(
+    lat: float,
+    lng: float,
+    height: int,
+    selected_powercurves: Optional[List[str]],
+    source: str
+):
+    """
+    Ranks power curves by annual energy production for a location and height.
+    The location's data is fetched once (same request as /energy-production) and all curves are evaluated together.
+    Args:
+        lat (float): Latitude of the location.
+        lng (float): Longitude of the location.
+        height (int): Height in meters.
+        selected_powercurves (list of str, optional): Power curves to compare; all available curves when omitted.
+        source (str): Source of the data.
+    """
+    lat = validate_lat(lat)
+    lng = validate_lng(lng)
+    height = validate_height(height)
+    if selected_powercurves:
+        selected_powercurves = [validate_selected_powercurve(c) for c in selected_powercurves]
+    source = validate_source(source)
+
+    params = {
+        "lat": lat,
+        "lng": lng,
+        "height": height,
+        "avg_type": "none"
+    }
+    df = data_fetcher_router.fetch_data_routing(params, source=source)
+    if df is None:
+        raise HTTPException(status_code=404, detail="Data not found")
+
+    return {"powercurve_comparison": power_curve_manager.compare_power_curves(df, height, selected_powercurves or None)}
+
+@router.get(
+    "/energy-production-comparison",
+    summary="Rank power curves by annual energy production and capacity factor for a location at a height - era5 data",
+    response_model=PowerCurveComparisonResponse,
+    response_model_by_alias=True,
+    responses={
+        200: {
+            "description": "Power curve comparison retrieved successfully",
+            "model": PowerCurveComparisonResponse
+        },
+        500: {"description": "Internal server error"},
+    }
+)
+def energy_production_comparison(
+    lat: float = Query(..., description="Latitude of the location."),
+    lng: float = Query(..., description="Longitude of the location."),
+    height: int = Query(..., description="Height in meters."),
+    selected_powercurves: Optional[List[str]] = Query(None, description="Power curves to compare (repeat the parameter); all when omitted."),
+    source: str = Query(DEFAULT_SOURCE, description="Source of the data.")
+):
+    try:
+        return _compare_powercurves_core(lat, lng, height, selected_powercurves, source)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
 def _download_csv_core(
     gridIndices: List[str],
     years: List[int],
@@ -393,7 +507,7 @@ def _download_csv_core(
         "years": years
     }
 
-    df = data_fetcher_router.fetch_data(params, source=source)
+    df = data_fetcher_router.fetch_data_routing(params, source=source)
 
     if df is None or df.empty:
         raise HTTPException(status_code=404, detail="No data found for the specified parameters")
@@ -401,6 +515,37 @@ def _download_csv_core(
     return df
 
     
+PASSTHROUGH_MODES = {"gzip", "file"}
+
+def _download_csv_passthrough(
+    gridIndex: str,
+    years: List[int],
+    source: str,
+    passthrough: str
+):
+    """
+    Streams the stored gzip CSVs of one grid index in year order without decoding them into a DataFrame.
+    The first object is sent byte for byte; later ones are re-encoded without their header line.
+    """
+    source = validate_source(source)
+    years = [validate_year(year, source) for year in years]
+    if passthrough not in PASSTHROUGH_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid passthrough. Must be one of: {sorted(PASSTHROUGH_MODES)}.")
+    fetcher = data_fetcher_router.fetchers.get(source)
+    if not isinstance(fetcher, S3DataFetcher):
+        raise HTTPException(status_code=400, detail="Passthrough is only available for S3 sources.")
+
+    stream = concat_gzip_csv(fetcher.iter_gzip_objects([gridIndex], years))
+    # Waits for the first object only, so a missing location can still be a 404
+    first = next(stream, None)
+    if first is None:
+        raise HTTPException(status_code=404, detail="No data found for the specified parameters")
+
+    if passthrough == "gzip":
+        return StreamingResponse(chain([first], stream), media_type="text/csv; charset=utf-8", headers={"Content-Encoding": "gzip"})
+    headers = {"Content-Disposition": f'attachment; filename="wind_data_{gridIndex}.csv.gz"'}
+    return StreamingResponse(chain([first], stream), media_type="application/gzip", headers=headers)
+
 @router.get(
     "/download-csv",
     summary="Download csv file for windspeed for a specific location for certain year(s) with 1 neighbor"
@@ -408,9 +553,13 @@ def _download_csv_core(
 def download_csv(
     gridIndex: str = Query(..., description="Grid index with respect to user selected coordinate"),
     years: List[int] = Query(SAMPLE_YEARS["s3_era5"], description="years of which the data to download"),
-    source: str = Query("s3_era5", description="Source of the data.")
+    source: str = Query("s3_era5", description="Source of the data."),
+    passthrough: Optional[str] = Query(None, description="Stream the stored gzip objects as-is: 'gzip' (Content-Encoding: gzip) or 'file' (.csv.gz attachment).")
 ):
     try:
+        if passthrough is not None:
+            return _download_csv_passthrough(gridIndex, years, source, passthrough)
+
         # Getting DataFrame from core function
         df = _download_csv_core([gridIndex], years, source)
         
@@ -424,6 +573,8 @@ def download_csv(
             media_type="text/csv; charset=utf-8"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -435,31 +586,84 @@ def download_csv_batch(
     payload: NearestLocationsResponse,
     years: List[int] = Query(SAMPLE_YEARS["s3_era5"], description="years of which the data to download"),
     source: str = Query("s3_era5", description="Source of the data."),
+    compression_level: int = Query(6, description="Deflate level 0-9 for CSV entries; 0 stores them uncompressed."),
+    passthrough: bool = Query(False, description="Store each neighbor's gzip objects as a .csv.gz entry without decoding (S3 sources only)."),
 ):
     try:
-        # Spooled file: stays in memory until threshold, then spills to disk automatically
-        spooled = tempfile.SpooledTemporaryFile(max_size=30 * 1024 * 1024, mode="w+b")  # 30MB threshold (Each decompressed file is around 5.3 MB)
-
-        with zipfile.ZipFile(spooled, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for loc in payload.locations:
-                df = _download_csv_core([loc.index], years, source)
-                csv_io = io.StringIO()
-                df.to_csv(csv_io, index=False)
-                csv_io.seek(0)
-                file_name = f"wind_data_{format_coordinate(loc.latitude)}_{format_coordinate(loc.longitude)}.csv"
-                zf.writestr(file_name, csv_io.getvalue())
-
-        spooled.seek(0)
+        if not 0 <= compression_level <= 9:
+            raise HTTPException(status_code=400, detail="compression_level must be between 0 and 9.")
+        source = validate_source(source)
+        years = [validate_year(year, source) for year in years]
+        fetcher = data_fetcher_router.fetchers.get(source)
+        if passthrough and not isinstance(fetcher, S3DataFetcher):
+            raise HTTPException(status_code=400, detail="Passthrough is only available for S3 sources.")
+
+        def make_source(loc):
+            file_name = f"wind_data_{format_coordinate(loc.latitude)}_{format_coordinate(loc.longitude)}.csv"
+            if passthrough:
+                # Already gzip-compressed: stored, not deflated again
+                return ZipSource(file_name + ".gz", lambda: concat_gzip_csv(fetcher.iter_gzip_objects([loc.index], years)), compress=False)
+            return ZipSource(file_name, lambda: dataframe_csv_chunks(_download_csv_core([loc.index], years, source)))
+
+        # Neighbors are fetched concurrently; each entry is written as soon as its data is ready
+        entries = entries_as_ready([make_source(loc) for loc in payload.locations], max_workers=len(payload.locations))
+        first_entry = next(entries)
+        if first_entry.name == "errors.txt":
+            raise HTTPException(status_code=404, detail="No data found for the specified parameters")
 
         headers = {
             "Content-Disposition": f'attachment; filename="wind_data_{len(payload.locations)}_points.zip"'
         }
 
-        return StreamingResponse(chunker(spooled), media_type="application/zip", headers=headers)
+        return StreamingResponse(stream_zip(chain([first_entry], entries), compression_level), media_type="application/zip", headers=headers)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def _nearest_locations_core(lats: List[float], lngs: List[float], n_neighbors: int, source: str, batch: bool = False):
+    """
+    Nearest grid locations of each point, as lists of (index, latitude, longitude) tuples.
+
+    Answered from the in-process grid index when it is loaded (GRID_INDEX_DIR), in one
+    batched lookup. Without it single points go through the Athena client, one query
+    each, and batches are refused (503) rather than queue thousands of queries.
+    """
+    grid_lookup_map = {
+        "athena_era5": athena_data_fetcher_era5,
+    }
+    grid_index_map = {
+        "athena_era5": era5_grid_index,
+    }
+
+    fetcher = grid_lookup_map.get(source)
+    if not fetcher:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Nearest locations lookup not available for source='{source}'"
+        )
+
+    grid_index = grid_index_map.get(source)
+    if grid_index is not None:
+        return grid_index.nearest_batch(lats, lngs, n_neighbors)
+    if batch:
+        raise HTTPException(
+            status_code=503,
+            detail="Batch nearest locations lookups need the grid index (GRID_INDEX_DIR); use /nearest-locations per point"
+        )
+    return [fetcher.find_nearest_locations(lat=lat, lng=lng, n_neighbors=n_neighbors) for lat, lng in zip(lats, lngs)]
+
+def _to_grid_locations(result):
+    return [
+        {
+            "index": str(i), 
+            "latitude": float(a), 
+            "longitude": float(o)
+        } 
+        for i, a, o in result
+    ]
+
 @router.get(
     "/nearest-locations",
     summary="Find nearest grid locations",
@@ -482,29 +686,38 @@ def nearest_locations(
         n_neighbors = validate_n_neighbor(n_neighbors)
         source = validate_source(source)
 
-        grid_lookup_map = {
-            "athena_era5": athena_data_fetcher_era5,
-        }
-        
-        fetcher = grid_lookup_map.get(source)
-        if not fetcher:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Nearest locations lookup not available for source='{source}'"
-            )
-
-        # Call find_nearest_locations on the Athena fetcher
-        result = fetcher.find_nearest_locations(lat=lat, lng=lng, n_neighbors=n_neighbors)
-        
-        locations = [
-            {
-                "index": str(i), 
-                "latitude": float(a), 
-                "longitude": float(o)
-            } 
-            for i, a, o in result
-        ]
-
-        return {"locations": locations}
+        result = _nearest_locations_core([lat], [lng], n_neighbors, source)[0]
+        return {"locations": _to_grid_locations(result)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+@router.post(
+    "/nearest-locations-batch",
+    summary="Find nearest grid locations for many points",
+    response_model=NearestLocationsBatchResponse,
+    responses={
+        200: {"description": "Nearest locations retrieved successfully"},
+        400: {"description": "Bad request"},
+        500: {"description": "Internal server error"},
+        503: {"description": "Grid index not loaded"},
+    },
+)
+def nearest_locations_batch(
+    payload: NearestLocationsBatchRequest,
+    n_neighbors: int = Query(1, description="Number of nearest grid points per location."),
+    source: str = Query(DEFAULT_SOURCE, description=f"Source of the data"),
+):
+    try:
+        n_neighbors = validate_n_neighbor(n_neighbors)
+        source = validate_source(source)
+
+        lats = [p.latitude for p in payload.points]
+        lngs = [p.longitude for p in payload.points]
+        results = _nearest_locations_core(lats, lngs, n_neighbors, source, batch=True)
+        return {"results": [{"locations": _to_grid_locations(result)} for result in results]}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
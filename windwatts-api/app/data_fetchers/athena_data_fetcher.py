@@ -1,4 +1,5 @@
 from .abstract_data_fetcher import AbstractDataFetcher
+from app.utils.timing import timed_stage
 from windwatts_data import WindwattsWTKClient, WindwattsERA5Client, WindwattsEnsembleClient
 
 class AthenaDataFetcher(AbstractDataFetcher):
@@ -27,6 +28,7 @@ class AthenaDataFetcher(AbstractDataFetcher):
         else:
             raise ValueError(f"Unsupported base dataset: {self.base_type}")
 
+    @timed_stage("athena")
     def fetch_data(self, lat: float, lng: float, height: int, avg_type: str = 'global') -> dict:
         """
         Fetch wind data using the configured client.
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 2
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+MANIFEST = "manifest.json"
+DEFAULT_SCAN_INTERVAL = 60.0
+
+
+class ColumnarStore:
+    """
+    Columnar transcoding tier for fetched time-series objects.
+
+    Each S3 object is parsed once and written as a directory with one ``.npy`` file per
+    column (numeric and boolean columns in their parsed dtype, text as fixed-width
+    unicode with a boolean mask of missing values beside it) plus a ``manifest.json``
+    with the column order and the object's size. Reads memory-map only the requested
+    columns, so asking for one height touches one height's pages instead of re-parsing
+    the whole gzip CSV.
+
+    A transcoded object is published by renaming its finished temp directory into
+    place, so concurrent gunicorn workers never see a partial object; if two workers
+    transcode the same object the second rename loses and its copy is discarded.
+
+    As in S3ObjectCache, manifest mtimes are bumped on every read and serve as the LRU
+    clock, and the least recently read objects are removed until the store fits
+    ``max_bytes``. Readers that already mapped a removed object keep their pages. Each
+    worker keeps a running estimate of the store size (its last scan plus its own
+    writes) and only scans the directory, one manifest per object, when a write pushes
+    the estimate over budget or ``scan_interval`` seconds after its last scan, which
+    picks up what other workers wrote.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, scan_interval: float = DEFAULT_SCAN_INTERVAL):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.scan_interval = scan_interval
+        os.makedirs(root_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._estimated_bytes: Optional[int] = None  # unknown until the first scan
+        self._last_scan = float("-inf")
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ColumnarStore"]:
+        """Store rooted at $S3_COLUMNAR_DIR (None, tier disabled, if unset) and bounded by $S3_COLUMNAR_MAX_BYTES."""
+        root_dir = os.environ.get("S3_COLUMNAR_DIR")
+        if not root_dir:
+            return None
+        return cls(root_dir, max_bytes=int(os.environ.get("S3_COLUMNAR_MAX_BYTES", DEFAULT_MAX_BYTES)))
+
+    def _object_dir(self, bucket: str, key: str) -> str:
+        # Objects of an older format live under other names and age out through eviction
+        digest = hashlib.blake2b(f"{FORMAT_VERSION}\0{bucket}\0{key}".encode(), digest_size=16).hexdigest()
+        return os.path.join(self.root_dir, digest)
+
+    @staticmethod
+    def _to_column_arrays(series: pd.Series) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Values of a column and, for text with gaps, the mask of its missing values."""
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            return series.to_numpy(), None
+        missing = series.isna().to_numpy()
+        return series.astype(str).to_numpy(dtype=str), (missing if missing.any() else None)
+
+    def write(self, bucket: str, key: str, df: pd.DataFrame):
+        """Transcodes a parsed object into the store (no-op if it is already there)."""
+        final_dir = self._object_dir(bucket, key)
+        if os.path.isdir(final_dir):
+            return
+        tmp_dir = tempfile.mkdtemp(dir=self.root_dir, prefix=".tmp-")
+        try:
+            files = []
+            size = 0
+            for i, column in enumerate(df.columns):
+                values, missing = self._to_column_arrays(df[column])
+                file, mask_file = f"{i}.npy", None
+                np.save(os.path.join(tmp_dir, file), values)
+                size += os.path.getsize(os.path.join(tmp_dir, file))
+                if missing is not None:
+                    mask_file = f"{i}.missing.npy"
+                    np.save(os.path.join(tmp_dir, mask_file), missing)
+                    size += os.path.getsize(os.path.join(tmp_dir, mask_file))
+                files.append([str(column), file, mask_file, str(df[column].dtype)])
+            with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+                json.dump({"version": FORMAT_VERSION, "key": key, "rows": len(df), "bytes": size, "columns": files}, f)
+            try:
+                os.rename(tmp_dir, final_dir)
+            except OSError:
+                # Another worker published the same object first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self._written(size)
+
+    def read(self, bucket: str, key: str, cols: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Memory-mapped DataFrame of the requested columns, or None if the object is not stored.
+
+        Like ``pandas.read_csv(usecols=...)``, columns come back in file order and a
+        requested column missing from the object raises a ValueError.
+        """
+        obj_dir = self._object_dir(bucket, key)
+        manifest_path = os.path.join(obj_dir, MANIFEST)
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return self._miss()
+        if manifest.get("version") != FORMAT_VERSION:
+            return self._miss()
+
+        columns = manifest["columns"]
+        if cols is not None:
+            wanted = set(cols)
+            missing = wanted.difference(column[0] for column in columns)
+            if missing:
+                raise ValueError(f"Usecols do not match columns, columns expected but not found: {sorted(missing)}")
+            columns = [column for column in columns if column[0] in wanted]
+
+        mmap_mode = "r" if manifest["rows"] else None  # empty files cannot be mapped
+        try:
+            data = {}
+            for name, file, mask_file, dtype in columns:
+                values = np.load(os.path.join(obj_dir, file), mmap_mode=mmap_mode)
+                if mask_file is not None:
+                    # Restore the gaps of the text column in its original dtype
+                    values = values.astype(object)
+                    values[np.load(os.path.join(obj_dir, mask_file))] = None
+                    values = pd.Series(values, dtype=dtype, copy=False)
+                data[name] = values
+            os.utime(manifest_path)
+        except OSError:
+            # Evicted by another worker between manifest and column reads
+            return self._miss()
+        with self._lock:
+            self._hits += 1
+        return pd.DataFrame(data, copy=False)
+
+    def _miss(self) -> None:
+        with self._lock:
+            self._misses += 1
+        return None
+
+    # ---------- eviction ----------
+    def _written(self, size: int):
+        """Adds a published object to the size estimate and scans the store when due."""
+        with self._lock:
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += size
+            due = (self._estimated_bytes is None or self._estimated_bytes > self.max_bytes
+                   or time.monotonic() - self._last_scan >= self.scan_interval)
+        # One scan per worker at a time; a write arriving meanwhile is covered by it or the next one
+        if due and self._scan_lock.acquire(blocking=False):
+            try:
+                self._evict()
+            finally:
+                self._scan_lock.release()
+
+    @staticmethod
+    def _object_size(path: str) -> Tuple[float, int]:
+        """(LRU clock, bytes) of an object directory, from its manifest."""
+        manifest_path = os.path.join(path, MANIFEST)
+        mtime = os.stat(manifest_path).st_mtime
+        try:
+            with open(manifest_path) as f:
+                size = json.load(f).get("bytes")
+        except ValueError:
+            size = None
+        if size is None:
+            # Written by an older format
+            size = sum(f.stat().st_size for f in os.scandir(path))
+        return mtime, size
+
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.root_dir) as it:
+            for entry in it:
+                if entry.name.startswith(".tmp-") or not entry.is_dir():
+                    continue
+                try:
+                    mtime, size = self._object_size(entry.path)
+                except OSError:
+                    continue
+                entries.append((mtime, size, entry.path))
+                total += size
+        if total > self.max_bytes:
+            total -= self._remove_oldest(entries, total)
+        with self._lock:
+            self._estimated_bytes = total
+            self._last_scan = time.monotonic()
+
+    def _remove_oldest(self, entries: list, total: int) -> int:
+        """Removes the least recently read objects until ``total`` fits the budget; returns the bytes freed."""
+        freed = 0
+
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total - freed <= self.max_bytes:
+                break
+            # Rename first so readers never open a half-removed object
+            doomed = tempfile.mkdtemp(dir=self.root_dir, prefix=".tmp-")
+            try:
+                os.rename(path, os.path.join(doomed, "object"))
+            except OSError:
+                shutil.rmtree(doomed, ignore_errors=True)
+                continue
+            shutil.rmtree(doomed, ignore_errors=True)
+            freed += size
+            evicted += 1
+        with self._lock:
+            self._evictions += evicted
+        return freed
+
+    # ---------- metrics ----------
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions, "max_bytes": self.max_bytes}
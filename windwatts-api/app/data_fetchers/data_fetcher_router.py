@@ -1,22 +1,69 @@
-import json
+import os
+import threading
+import time
+from cachetools import TTLCache
 from .abstract_data_fetcher import AbstractDataFetcher
+from .single_flight import SingleFlight, flight_key
+from app.utils.grid_index import GridIndex
+from app.utils.result_serialization import result_nbytes
+from app.utils.metrics import CACHE_LOOKUPS, FETCH_ERRORS, FETCH_LATENCY, set_request_source
+from app.utils.timing import timed
+
+DEFAULT_MEMORY_CACHE_BYTES = 256 * 1024 ** 2
+DEFAULT_MEMORY_CACHE_TTL = 3600
+DATABASE_FETCHER = "database"
+
+_MISSING = object()
 
 class DataFetcherRouter:
-    def __init__(self):
+    def __init__(self, memory_cache_bytes: int = None, memory_cache_ttl: float = None):
         """
         Initializes the DataFetcherRouter.
+
+        Args:
+            memory_cache_bytes (int, optional): Size budget of the in-process result cache;
+                defaults to $RESULT_CACHE_MAX_BYTES or 256 MiB. 0 disables it.
+            memory_cache_ttl (float, optional): Seconds a result stays in the in-process cache;
+                defaults to $RESULT_CACHE_TTL_SECONDS or one hour.
         """
         self.fetchers = {}
-
-    def register_fetcher(self, fetcher_name: str, fetcher: AbstractDataFetcher):
+        self.cached_sources = set()
+        self.grid_indexes = {}
+        self.single_flight = SingleFlight()
+
+        if memory_cache_bytes is None:
+            memory_cache_bytes = int(os.environ.get("RESULT_CACHE_MAX_BYTES", DEFAULT_MEMORY_CACHE_BYTES))
+        if memory_cache_ttl is None:
+            memory_cache_ttl = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", DEFAULT_MEMORY_CACHE_TTL))
+        self.memory_cache = TTLCache(maxsize=memory_cache_bytes, ttl=memory_cache_ttl, getsizeof=result_nbytes) if memory_cache_bytes > 0 else None
+        self._cache_lock = threading.Lock()
+        self._tier_counts = {"memory": [0, 0], DATABASE_FETCHER: [0, 0]}  # [hits, misses]
+        self._source_fetches = 0
+        self._snapped_lookups = 0
+
+    def register_fetcher(self, fetcher_name: str, fetcher: AbstractDataFetcher, cache_results: bool = False, grid_index: GridIndex = None):
         """
         Register a data fetcher with the router.
 
         Args:
             fetcher_name (str): The name of the fetcher.
             fetcher: The fetcher object.
+            cache_results (bool): Serve this fetcher's results through the cache tiers of
+                fetch_data_routing. Meant for sources answering point queries (Athena);
+                S3 downloads have their own object cache.
+            grid_index (GridIndex, optional): Grid of the fetcher's dataset. Cached results are
+                then keyed by grid cell instead of raw coordinates, so every click inside a
+                cell shares one entry.
         """
         self.fetchers[fetcher_name] = fetcher
+        if cache_results:
+            self.cached_sources.add(fetcher_name)
+        else:
+            self.cached_sources.discard(fetcher_name)
+        if grid_index is not None:
+            self.grid_indexes[fetcher_name] = grid_index
+        else:
+            self.grid_indexes.pop(fetcher_name, None)
 
     def fetch_data(self, params: dict , source: str = "athena_wtk"):
         """
@@ -34,61 +81,153 @@ class DataFetcherRouter:
         """
         fetcher = self.fetchers.get(source)
         if fetcher:
-            return fetcher.fetch_data(**params)
+            set_request_source(source)
+            # Concurrent identical requests share one fetch and its result or error
+            with timed("fetch"):
+                return self.single_flight.do(flight_key(source, params), lambda: self._measured_fetch(source, fetcher, params))
         else:
             raise ValueError(f"No fetcher found for source={source}")
 
-    def fetch_data_routing(self, params: dict, source: str = "athena_wtk"):
+    async def fetch_data_async(self, params: dict, source: str = "athena_wtk"):
         """
-        Fetch data using the appropriate data fetcher through routing logics.
+        Async variant of fetch_data; joins the same in-flight fetches as sync callers.
 
         Args:
             params (dict): The parameters to pass to the fetcher.
             source (str): The name of the fetcher to use
+
         Returns:
             dict: The fetched data as a dictionary.
         """
-        data = None
-        cached_data = None
-
-        # Check available fetchers by name and type
-        db_key = "database"
-        s3_key = "s3"
-        athena_key = source
-
-        db_fetcher_available = db_key in self.fetchers
-        s3_fetcher_available = s3_key in self.fetchers
-        athena_fetcher_available = athena_key in self.fetchers
-
-        if db_fetcher_available:
-            cached_data = self.fetchers[db_key].fetch_data(**params)
-            if cached_data:
-                return cached_data
-
-        if athena_fetcher_available and self.is_complex_query(params):
-            data = self.fetchers[athena_key].fetch_data(**params)
-        elif s3_fetcher_available:
-            data = self.fetchers[s3_key].fetch_data(**params)
+        fetcher = self.fetchers.get(source)
+        if fetcher:
+            set_request_source(source)
+            with timed("fetch"):
+                return await self.single_flight.do_async(flight_key(source, params), lambda: self._measured_fetch(source, fetcher, params))
+        else:
+            raise ValueError(f"No fetcher found for source={source}")
 
-        if db_fetcher_available and not cached_data and data:
-            self.fetchers[db_key].store_data(**params, data=json.dumps(data))
+    def fetch_data_routing(self, params: dict, source: str = "athena_wtk"):
+        """
+        Fetch data through the cache tiers: in-process TTL cache, then the local database
+        shared by the workers, then the source fetcher itself.
 
-        return data or {}
+        Sources not registered with cache_results go straight to fetch_data. Misses in
+        the memory tier are coalesced per key, so concurrent requests for the same
+        location cost a single database lookup and at most one source fetch; results
+        fetched from the source are written back to both tiers, and database hits are
+        promoted to memory. Cache failures never fail the request.
 
-    @staticmethod
-    def is_complex_query(params: dict) -> bool:
-        """
-        Determine if the query is complex.
+        For sources with a grid index, lat/lng are canonicalized to the grid cell that
+        contains them before keying. The sources answer with the data of the nearest
+        grid point, so any coordinate in the cell yields the same result.
 
         Args:
-            lat (float): Latitude of the location.
-            lng (float): Longitude of the location.
-            height (List[int]): List of heights in meters.
-            yearly (bool): Whether to fetch yearly averaged data.
-
+            params (dict): The parameters to pass to the fetcher.
+            source (str): The name of the fetcher to use
         Returns:
-            bool: True if the query is complex, False otherwise.
+            dict: The fetched data as a dictionary (or DataFrame for avg_type 'none').
+        """
+        if source not in self.cached_sources:
+            return self.fetch_data(params, source=source)
+        if source not in self.fetchers:
+            raise ValueError(f"No fetcher found for source={source}")
+
+        set_request_source(source)
+        with timed("fetch"):
+            cache_params, cell = self._cache_params(params, source)
+            key = flight_key(source, cache_params)
+            if self.memory_cache is not None:
+                with self._cache_lock:
+                    data = self.memory_cache.get(key, _MISSING)
+                    self._tier_counts["memory"][data is _MISSING] += 1
+                CACHE_LOOKUPS.labels("memory", "miss" if data is _MISSING else "hit").inc()
+                if data is not _MISSING:
+                    return data
+            return self.single_flight.do(("routing",) + key, lambda: self._fetch_through_tiers(key, params, source, cell))
+
+    def _cache_params(self, params: dict, source: str):
+        """Params identifying the cached result: lat/lng replaced by the grid cell when the source has a grid index."""
+        grid_index = self.grid_indexes.get(source)
+        if grid_index is None or "lat" not in params or "lng" not in params:
+            return params, None
+        try:
+            cell = grid_index.snap(params["lat"], params["lng"])
+        except Exception as e:
+            print(f"Warning: Grid snapping failed for {source}, keying by coordinates: {e}")
+            return params, None
+        with self._cache_lock:
+            self._snapped_lookups += 1
+        cache_params = {k: v for k, v in params.items() if k not in ("lat", "lng")}
+        cache_params["grid_index"] = cell
+        return cache_params, cell
+
+    def _fetch_through_tiers(self, key: tuple, params: dict, source: str, cell: str = None):
+        db_fetcher = self.fetchers.get(DATABASE_FETCHER)
+        if db_fetcher is not None:
+            try:
+                with timed("cache.database"):
+                    data = self._measured_fetch(DATABASE_FETCHER, db_fetcher, dict(params, source=source, grid_index=cell))
+            except Exception as e:
+                print(f"Warning: Result cache lookup failed for {source}: {e}")
+                data = None
+            with self._cache_lock:
+                self._tier_counts[DATABASE_FETCHER][data is None] += 1
+            CACHE_LOOKUPS.labels(DATABASE_FETCHER, "miss" if data is None else "hit").inc()
+            if data is not None:
+                self._remember(key, data)
+                return data
+
+        with timed(f"source.{source}"):
+            data = self._measured_fetch(source, self.fetchers[source], params)
+        with self._cache_lock:
+            self._source_fetches += 1
+        if data is not None:
+            self._remember(key, data)
+            if db_fetcher is not None:
+                try:
+                    with timed("cache.store"):
+                        db_fetcher.store_data(**params, data=data, source=source, grid_index=cell)
+                except Exception as e:
+                    print(f"Warning: Failed to store result for {source}: {e}")
+        return data
+
+    def _measured_fetch(self, name: str, fetcher: AbstractDataFetcher, params: dict):
+        """fetcher.fetch_data(**params), with its latency and errors recorded under the fetcher's name."""
+        start = time.perf_counter()
+        try:
+            return fetcher.fetch_data(**params)
+        except Exception:
+            FETCH_ERRORS.labels(name).inc()
+            raise
+        finally:
+            FETCH_LATENCY.labels(name).observe(time.perf_counter() - start)
+
+    def _remember(self, key: tuple, data):
+        if self.memory_cache is None:
+            return
+        with self._cache_lock:
+            try:
+                self.memory_cache[key] = data
+            except ValueError:
+                # Larger than the whole cache budget
+                pass
+
+    def stats(self) -> dict:
+        """
+        Fetch metrics: request coalescing counters and per-tier hit ratios of the result cache.
         """
-        # Implement logic to determine if the query is complex
-        # For example, if the query spans multiple files or requires aggregation
-        return True
\ No newline at end of file
+        with self._cache_lock:
+            tiers = {}
+            for tier, (hits, misses) in self._tier_counts.items():
+                lookups = hits + misses
+                tiers[tier] = {"hits": hits, "misses": misses, "hit_ratio": hits / lookups if lookups else 0.0}
+            tiers["memory"]["entries"] = len(self.memory_cache) if self.memory_cache is not None else 0
+            tiers["memory"]["bytes"] = int(self.memory_cache.currsize) if self.memory_cache is not None else 0
+            cache = {
+                "memory": tiers["memory"],
+                "database": tiers[DATABASE_FETCHER],
+                "source_fetches": self._source_fetches,
+                "grid_snapped_lookups": self._snapped_lookups,
+            }
+        return {"singleflight": self.single_flight.stats(), "result_cache": cache}
@@ -1,23 +1,29 @@
-from typing import List
-import json
-from .abstract_data_fetcher import WTKDataFetcher
+import os
+from typing import Any, Optional
+from .abstract_data_fetcher import AbstractDataFetcher
 from app.utils.data_fetcher_utils import generate_key
+from app.utils.result_serialization import serialize_result, deserialize_result
 
-class DatabaseDataFetcher(WTKDataFetcher):
+class DatabaseDataFetcher(AbstractDataFetcher):
     """
-    Class for fetching data from the database.
+    Class for fetching cached results from the local database.
     TODO: Refactor this to handle pre-computed/aggregated results in the future instead of caching.
     """
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, max_age: Optional[float] = None):
         """
         Initializes the DatabaseDataFetcher with the given DatabaseManager.
 
         Args:
             db_manager (DatabaseManager): The DatabaseManager to use for fetching data.
+            max_age (float, optional): Seconds a stored result stays valid; defaults to
+                $DB_CACHE_MAX_AGE_SECONDS, or forever if unset.
         """
         self.db_manager = db_manager
+        if max_age is None and os.environ.get("DB_CACHE_MAX_AGE_SECONDS"):
+            max_age = float(os.environ["DB_CACHE_MAX_AGE_SECONDS"])
+        self.max_age = max_age
 
-    def fetch_data(self, lat: float, lng: float, height: int):
+    def fetch_data(self, lat: float, lng: float, height: int, avg_type: str = "global", source: str = "", grid_index: Optional[str] = None):
         """
         Fetch data from the database.
 
@@ -25,15 +31,21 @@ class DatabaseDataFetcher(WTKDataFetcher):
             lat (float): Latitude of the location
             lng (float): Longitude of the location
             height (int): Heights in meters
+            avg_type (str): Average type of the data
+            source (str): Fetcher the data was originally fetched with
+            grid_index (str, optional): Grid cell to key the lookup by instead of lat/lng
 
         Returns:
-            dict: The fetched data
+            dict or DataFrame: The stored data, or None if it is not stored.
         """
-        key = generate_key(lat, lng, height)
-        data = self.db_manager.get_data(key)
-        return json.loads(data) if data else []
+        key = generate_key(lat, lng, height, avg_type, source, grid_index)
+        row = self.db_manager.get_data(key, max_age=self.max_age)
+        if row is None:
+            return None
+        kind, data = row
+        return deserialize_result(kind, data)
 
-    def store_data(self, lat: float, lng: float, height: int, data: str):
+    def store_data(self, lat: float, lng: float, height: int, data: Any, avg_type: str = "global", source: str = "", grid_index: Optional[str] = None):
         """
         Store data in the database.
 
@@ -41,7 +53,11 @@ class DatabaseDataFetcher(WTKDataFetcher):
             lat (float): Latitude of the location
             lng (float): Longitude of the location
             height (int): Heights in meters
-            data (str): The data to be stored
+            data (dict or DataFrame): The data to be stored
+            avg_type (str): Average type of the data
+            source (str): Fetcher the data was fetched with
+            grid_index (str, optional): Grid cell to key the data by instead of lat/lng
         """
-        key = generate_key(lat, lng, height)
-        self.db_manager.store_data(key, data)
+        key = generate_key(lat, lng, height, avg_type, source, grid_index)
+        kind, payload = serialize_result(data)
+        self.db_manager.store_data(key, kind, payload)
@@ -1,20 +1,49 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional
 import boto3
 import pandas as pd
 from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from botocore.config import Config
 from .abstract_data_fetcher import AbstractDataFetcher
-
-MIN_POOL_WORKERS = 1
+from .s3_fetch_pool import S3FetchPool, get_shared_fetch_pool
+from .s3_object_cache import S3ObjectCache
+from .columnar_store import ColumnarStore
+from app.utils.timing import timed_stage
 
 s3_key_templates = {
     "era5" : "{prefix}/year={year}/index={index}/{year}_{index}.csv.gz",
     "wtk" : "{prefix}/year={year}/varset=all/index={index}/{index}_{year}_all.csv.gz"
 }
 
+class _RoundTripClient:
+    """S3 client wrapper that reports every request to the fetch pool's limiter."""
+
+    def __init__(self, client, fetch_pool: S3FetchPool):
+        self._client = client
+        self._fetch_pool = fetch_pool
+
+    def get_object(self, **kwargs):
+        with self._fetch_pool.round_trip():
+            obj = self._client.get_object(**kwargs)
+            # The body streams from S3 too, so it is part of the sample
+            return dict(obj, Body=BytesIO(obj["Body"].read()))
+
+    def head_object(self, **kwargs):
+        with self._fetch_pool.round_trip():
+            return self._client.head_object(**kwargs)
+
+
 class S3DataFetcher(AbstractDataFetcher):
-    def __init__(self, bucket_name: str, prefix: str, s3_key_template: str, grid: str):
+    def __init__(
+        self,
+        bucket_name: str,
+        prefix: str,
+        s3_key_template: str,
+        grid: str,
+        s3_client=None,
+        fetch_pool: Optional[S3FetchPool] = None,
+        object_cache: Optional[S3ObjectCache] = None,
+        columnar_store: Optional[ColumnarStore] = None,
+    ):
         """
         Initializes the S3DataFetcher with the given bucket.
         Parameters:
@@ -22,15 +51,25 @@ class S3DataFetcher(AbstractDataFetcher):
             prefix (str): The s3 prefix the specifies folder inside a bucket.
             s3_key_template(str): The s3 key template to download files.
             grid (str): The grid of the data. "era5" or "wtk"
+            s3_client: Optional pre-built S3 client (e.g. a local stand-in); a boto3 client sized to the pool otherwise.
+            fetch_pool (S3FetchPool): Optional fetch pool; the process-wide shared pool by default.
+            object_cache (S3ObjectCache): Optional local object cache; configured from $S3_CACHE_DIR by default (disabled if unset).
+            columnar_store (ColumnarStore): Optional columnar transcoding tier; configured from $S3_COLUMNAR_DIR by default (disabled if unset).
         """
         print(f"Initializing S3 Data Fetcher: bucket: {bucket_name} prefix: {prefix} grid: {grid} ...")
-        self.s3_client = boto3.client(
+        self.fetch_pool = fetch_pool or get_shared_fetch_pool()
+        self.s3_client = s3_client or boto3.client(
             "s3",
             config=Config(
                 retries={"max_attempts": 5, "mode": "standard"},
                 tcp_keepalive=True,
+                # One connection per pool worker, so concurrent fetches never queue on urllib3
+                max_pool_connections=self.fetch_pool.max_concurrency,
             ),
         )
+        self._s3 = _RoundTripClient(self.s3_client, self.fetch_pool)
+        self.object_cache = object_cache if object_cache is not None else S3ObjectCache.from_env()
+        self.columnar_store = columnar_store if columnar_store is not None else ColumnarStore.from_env()
         self.bucket = bucket_name
         self.prefix = prefix
         self.grid = grid
@@ -56,17 +95,60 @@ class S3DataFetcher(AbstractDataFetcher):
         
         return keys
     
+    def get_object_bytes(self, key: str) -> bytes:
+        """
+        Raw (gzip) body of an S3 object, served from the local object cache when enabled.
+        """
+        if self.object_cache is not None:
+            return self.object_cache.fetch(self._s3, self.bucket, key)
+        obj = self._s3.get_object(Bucket=self.bucket, Key=key)
+        return obj["Body"].read()
+
+    def _try_get_object_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            return self.get_object_bytes(key)
+        except Exception as e:
+            print(f"Warning: Failed to fetch {key}: {e}")
+            return None
+
+    def iter_gzip_objects(self, gridIndices: List[str], years: List[int]) -> Iterator[Optional[bytes]]:
+        """
+        Raw gzip CSV bodies in year order (then grid index order), fetched concurrently on
+        the shared pool and yielded as soon as each is ready. Missing objects yield None.
+        """
+        keys = self.generate_s3_keys(gridIndices, sorted(years))
+        return self.fetch_pool.imap(self._try_get_object_bytes, keys)
+
     def fetch_s3_file(self, key: str, cols: Optional[List[str]]):
         """
         Download + parse a single gzip CSV from S3.
 
+        With the columnar tier enabled, an object is parsed once, transcoded, and later
+        reads memory-map only the requested columns.
+
         :param key: S3 object key.
         :param cols: Optional list of column names to load (passed to pandas.read_csv).
         :return: DataFrame or None on error.
         """
         try:
-            obj = self.s3_client.get_object(Bucket=self.bucket, Key=key)
-            payload = obj["Body"].read()
+            if self.columnar_store is not None:
+                df = self.columnar_store.read(self.bucket, key, cols)
+                if df is not None:
+                    return df
+
+            payload = self.get_object_bytes(key)
+
+            if self.columnar_store is not None:
+                try:
+                    full = pd.read_csv(BytesIO(payload), compression="gzip")
+                    self.columnar_store.write(self.bucket, key, full)
+                    df = self.columnar_store.read(self.bucket, key, cols)
+                    if df is not None:
+                        return df
+                    # Evicted right away (object larger than the store budget): parse as usual
+                except OSError as e:
+                    print(f"Warning: Failed to transcode {key}: {e}")
+
             df = pd.read_csv(
                 BytesIO(payload),
                 compression="gzip",
@@ -77,6 +159,7 @@ class S3DataFetcher(AbstractDataFetcher):
             print(f"Warning: Failed to fetch {key}: {e}")
             return None
 
+    @timed_stage("s3")
     def fetch_data(
         self,
         gridIndices: List[str],
@@ -84,7 +167,10 @@ class S3DataFetcher(AbstractDataFetcher):
         cols: Optional[List[str]] = None,
     ) -> pd.DataFrame:
         """
-        Fetch data from S3 in parallel (optimized for ~5 files).
+        Fetch data from S3 in parallel on the shared fetch pool.
+
+        Files are concatenated in key order (years, then grid indices), independent of
+        which download finishes first.
 
         Args:
             gridIndexes (List(str)): Grid indices of neighbors with respect user selected coordinate.
@@ -98,15 +184,8 @@ class S3DataFetcher(AbstractDataFetcher):
         if not keys:
             return pd.DataFrame()
 
-        frames: List[pd.DataFrame] = []
-        workers = min(MIN_POOL_WORKERS, len(keys))
-
-        with ThreadPoolExecutor(max_workers=workers) as ex:
-            futures = [ex.submit(self.fetch_s3_file, k, cols) for k in keys]
-            for f in as_completed(futures):
-                df = f.result()
-                if df is not None and not df.empty:
-                    frames.append(df)
+        results = self.fetch_pool.map(lambda k: self.fetch_s3_file(k, cols), keys)
+        frames: List[pd.DataFrame] = [df for df in results if df is not None and not df.empty]
         if not frames:
             print(f"No data found for gridIndices {gridIndices}, years={years}")
             return pd.DataFrame()
@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_PER_REQUEST_CONCURRENCY = 8
+
+# Error codes with which S3 answers that the object or bucket is not there: a normal outcome, not a failure
+MISSING_OBJECT_CODES = {"NoSuchKey", "NoSuchBucket", "NotFound", "404"}
+
+
+def is_missing_object(exc: BaseException) -> bool:
+    """True for a botocore ClientError reporting a missing object (without importing botocore)."""
+    error = getattr(exc, "response", None) or {}
+    return str(error.get("Error", {}).get("Code")) in MISSING_OBJECT_CODES
+
+
+class AdaptiveLimiter:
+    """
+    Process-wide concurrency limit that adapts to observed latency (AIMD).
+
+    Two moving averages of call latency are kept: a short one (``smoothing``) and a
+    slow baseline (``baseline_smoothing``). The limit grows by roughly one slot per
+    ``limit`` completions while the short average stays within ``tolerance`` x the
+    baseline, and is cut by ``backoff`` (at most once per ``cooldown`` seconds) when
+    latency rises above that or a call fails, e.g. because S3 starts throttling. It
+    always stays within [min_limit, max_limit]. A call released without a latency
+    and without failing (say, served from a local cache) leaves the limit alone.
+    """
+
+    def __init__(self,
+                 max_limit: int,
+                 min_limit: int = 1,
+                 initial_limit: Optional[int] = None,
+                 tolerance: float = 2.0,
+                 backoff: float = 0.7,
+                 smoothing: float = 0.2,
+                 baseline_smoothing: float = 0.02,
+                 cooldown: float = 1.0):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= max_limit.")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.baseline_smoothing = baseline_smoothing
+        self.cooldown = cooldown
+
+        self._limit = float(initial_limit if initial_limit is not None else max(min_limit, max_limit // 2))
+        self._in_flight = 0
+        self._ewma_latency = None
+        self._baseline_latency = None
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency: Optional[float], ok: bool = True):
+        """Frees a slot and feeds the call's latency (seconds), if any, or its failure into the limit."""
+        with self._cond:
+            self._in_flight -= 1
+            if not ok:
+                self._decrease()
+            elif latency is not None:
+                self._observe(latency)
+            self._cond.notify_all()
+
+    def _observe(self, latency: float):
+        if self._ewma_latency is None:
+            self._ewma_latency = self._baseline_latency = latency
+        else:
+            self._ewma_latency += self.smoothing * (latency - self._ewma_latency)
+            self._baseline_latency += self.baseline_smoothing * (latency - self._baseline_latency)
+
+        if self._ewma_latency > self.tolerance * self._baseline_latency:
+            self._decrease()
+        else:
+            self._limit = min(self.max_limit, self._limit + 1.0 / max(self._limit, 1.0))
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "ewma_latency_s": self._ewma_latency,
+                "baseline_latency_s": self._baseline_latency,
+            }
+
+
+class S3FetchPool:
+    """
+    Process-wide worker pool for S3 object fetches shared by every request.
+
+    Concurrency is bounded globally by the adaptive limiter (whose ceiling is the
+    executor size, and should match the boto3 ``max_pool_connections``) and per
+    request by ``per_request`` so one large download cannot take every slot.
+
+    The limiter only learns from S3 requests the task wraps in :meth:`round_trip`:
+    their summed latency is the task's sample, and a round trip that raises anything
+    but a missing-object error (throttling, timeouts, 5xx) counts as a failure, as
+    does an exception escaping the task. Tasks answered without reaching S3 (object
+    cache hits) hold a slot but feed nothing into the limit.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 per_request: int = DEFAULT_PER_REQUEST_CONCURRENCY,
+                 limiter: Optional[AdaptiveLimiter] = None):
+        self.max_concurrency = max_concurrency
+        self.per_request = per_request
+        self.limiter = limiter or AdaptiveLimiter(max_limit=max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="s3-fetch")
+        self._task = threading.local()
+
+    @contextmanager
+    def round_trip(self):
+        """Times one S3 request of the task running on this worker thread."""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception as e:
+            failed = not is_missing_object(e)
+            raise
+        finally:
+            if getattr(self._task, "active", False):
+                latency = time.perf_counter() - start
+                self._task.latency = latency if self._task.latency is None else self._task.latency + latency
+                self._task.failed = self._task.failed or failed
+
+    def _run(self, fn: Callable[[T], R], item: T) -> R:
+        self.limiter.acquire()
+        task = self._task
+        task.active, task.latency, task.failed = True, None, False
+        ok = False
+        try:
+            result = fn(item)
+            ok = True
+            return result
+        finally:
+            task.active = False
+            self.limiter.release(task.latency, ok=ok and not task.failed)
+
+    def imap(self, fn: Callable[[T], R], items: Iterable[T], per_request: Optional[int] = None) -> Iterator[R]:
+        """
+        Lazily applies fn to every item on the shared pool, yielding results in input order
+        as soon as each one (and all before it) is ready.
+
+        At most ``per_request`` items are queued, running or finished-but-unconsumed at any
+        time, which bounds the memory held by a slow consumer. Exceptions propagate.
+        """
+        items = list(items)
+        if not items:
+            return
+        window = max(1, min(per_request or self.per_request, len(items)))
+        pending = deque()
+        remaining = iter(items)
+
+        # Sliding window over this request's items
+        for item in islice(remaining, window):
+            pending.append(self._executor.submit(self._run, fn, item))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for item in islice(remaining, 1):
+                    pending.append(self._executor.submit(self._run, fn, item))
+                yield result
+        finally:
+            # Consumer went away (e.g. client disconnected): drop what has not started
+            for fut in pending:
+                fut.cancel()
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T], per_request: Optional[int] = None) -> List[R]:
+        """
+        Applies fn to every item on the shared pool and returns results in input order.
+
+        Exceptions propagate.
+        """
+        items = list(items)
+        if not items:
+            return []
+        window = max(1, min(per_request or self.per_request, len(items)))
+        results: List[Optional[R]] = [None] * len(items)
+        pending = {}
+        remaining = iter(range(len(items)))
+
+        # Sliding window: at most `window` of this request's items are queued or running
+        for i in islice(remaining, window):
+            pending[self._executor.submit(self._run, fn, items[i])] = i
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[pending.pop(fut)] = fut.result()
+                for i in islice(remaining, 1):
+                    pending[self._executor.submit(self._run, fn, items[i])] = i
+        return results
+
+    def stats(self) -> dict:
+        return {"max_concurrency": self.max_concurrency, "per_request": self.per_request, **self.limiter.stats()}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_shared_pool: Optional[S3FetchPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_fetch_pool() -> S3FetchPool:
+    """
+    The process-wide fetch pool, created on first use and sized from
+    $S3_FETCH_MAX_CONCURRENCY (default 32) and $S3_FETCH_PER_REQUEST (default 8).
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = S3FetchPool(
+                    max_concurrency=int(os.environ.get("S3_FETCH_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+                    per_request=int(os.environ.get("S3_FETCH_PER_REQUEST", DEFAULT_PER_REQUEST_CONCURRENCY)),
+                )
+    return _shared_pool
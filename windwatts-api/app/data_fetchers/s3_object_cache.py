@@ -0,0 +1,240 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_SCAN_INTERVAL = 60.0
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=16).hexdigest()
+
+
+class S3ObjectCache:
+    """
+    Local content-addressed disk cache for immutable S3 objects.
+
+    Object bodies are stored as ``blobs/<hash(bucket, key, etag)>`` and a small
+    ``refs/<hash(bucket, key)>`` file records the ETag last seen for the key, so a hit
+    needs no request to S3 at all. With ``revalidate_after`` set, refs older than that
+    many seconds are checked with a HEAD request and a changed ETag is fetched anew.
+
+    All writes go to a temp file in the cache directory followed by ``os.replace``,
+    so several gunicorn workers can share one directory: readers only ever see whole
+    files, and concurrent misses for the same object simply write identical content.
+    Blob mtimes are bumped on every hit and serve as the LRU clock, and the oldest blobs
+    are evicted until the directory fits ``max_bytes``. Each worker keeps a running
+    estimate of the directory size (its last scan plus its own writes) and only scans
+    when a write pushes the estimate over budget or ``scan_interval`` seconds after its
+    last scan, which picks up what other workers wrote.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, revalidate_after: Optional[float] = None,
+                 scan_interval: float = DEFAULT_SCAN_INTERVAL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.scan_interval = scan_interval
+        self._blob_dir = os.path.join(cache_dir, "blobs")
+        self._ref_dir = os.path.join(cache_dir, "refs")
+        os.makedirs(self._blob_dir, exist_ok=True)
+        os.makedirs(self._ref_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._estimated_bytes: Optional[int] = None  # unknown until the first scan
+        self._last_scan = float("-inf")
+        self._hits = 0
+        self._misses = 0
+        self._bytes_from_cache = 0
+        self._bytes_downloaded = 0
+        self._evictions = 0
+        self._errors = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["S3ObjectCache"]:
+        """
+        Cache configured by $S3_CACHE_DIR (unset disables caching), $S3_CACHE_MAX_BYTES
+        and $S3_CACHE_REVALIDATE_SECONDS.
+        """
+        cache_dir = os.environ.get("S3_CACHE_DIR")
+        if not cache_dir:
+            return None
+        revalidate = os.environ.get("S3_CACHE_REVALIDATE_SECONDS")
+        return cls(
+            cache_dir,
+            max_bytes=int(os.environ.get("S3_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            revalidate_after=float(revalidate) if revalidate else None,
+        )
+
+    # ---------- paths ----------
+    def _ref_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self._ref_dir, _digest(bucket, key))
+
+    def _blob_path(self, bucket: str, key: str, etag: str) -> str:
+        return os.path.join(self._blob_dir, _digest(bucket, key, etag))
+
+    def _atomic_write(self, path: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    # ---------- lookup ----------
+    def _cached_etag(self, bucket: str, key: str) -> Optional[str]:
+        try:
+            with open(self._ref_path(bucket, key)) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def path_for(self, bucket: str, key: str) -> Optional[str]:
+        """Path of the cached body of (bucket, key), touched as recently used, or None."""
+        etag = self._cached_etag(bucket, key)
+        if etag is None:
+            return None
+        path = self._blob_path(bucket, key, etag)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def get(self, bucket: str, key: str) -> Optional[bytes]:
+        """Cached body of (bucket, key), or None (not counted as a miss)."""
+        path = self.path_for(bucket, key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            # Evicted by another worker between lookup and read
+            return None
+        with self._lock:
+            self._hits += 1
+            self._bytes_from_cache += len(data)
+        return data
+
+    def put(self, bucket: str, key: str, etag: str, data: bytes):
+        """Stores a body under its ETag and points the key's ref at it."""
+        self._atomic_write(self._blob_path(bucket, key, etag), data)
+        self._atomic_write(self._ref_path(bucket, key), etag.encode())
+        self._written(len(data))
+
+    def fetch(self, s3_client, bucket: str, key: str) -> bytes:
+        """
+        Object body from the cache, downloading and caching it on a miss.
+
+        Cache I/O errors never fail the request: the body is still returned from S3.
+        """
+        if self.revalidate_after is not None and self._is_stale(bucket, key):
+            head = s3_client.head_object(Bucket=bucket, Key=key)
+            if head.get("ETag") != self._cached_etag(bucket, key):
+                self._forget(bucket, key)
+            else:
+                os.utime(self._ref_path(bucket, key))
+
+        data = self.get(bucket, key)
+        if data is not None:
+            return data
+
+        obj = s3_client.get_object(Bucket=bucket, Key=key)
+        data = obj["Body"].read()
+        with self._lock:
+            self._misses += 1
+            self._bytes_downloaded += len(data)
+        try:
+            self.put(bucket, key, obj.get("ETag") or _digest(bucket, key, str(len(data))), data)
+        except OSError as e:
+            with self._lock:
+                self._errors += 1
+            print(f"Warning: Failed to cache {key}: {e}")
+        return data
+
+    def _is_stale(self, bucket: str, key: str) -> bool:
+        try:
+            return time.time() - os.path.getmtime(self._ref_path(bucket, key)) > self.revalidate_after
+        except OSError:
+            return False
+
+    def _forget(self, bucket: str, key: str):
+        try:
+            os.remove(self._ref_path(bucket, key))
+        except OSError:
+            pass
+
+    # ---------- eviction ----------
+    def _written(self, size: int):
+        """Adds a stored blob to the size estimate and scans the directory when due."""
+        with self._lock:
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += size
+            due = (self._estimated_bytes is None or self._estimated_bytes > self.max_bytes
+                   or time.monotonic() - self._last_scan >= self.scan_interval)
+        if due and self._scan_lock.acquire(blocking=False):
+            try:
+                self._evict()
+            finally:
+                self._scan_lock.release()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self._blob_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        if total > self.max_bytes:
+            total = self._remove_oldest(entries, total)
+        with self._lock:
+            self._estimated_bytes = total
+            self._last_scan = time.monotonic()
+
+    def _remove_oldest(self, entries: list, total: int) -> int:
+        """Removes the least recently used blobs until ``total`` fits the budget; returns the new total."""
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._evictions += evicted
+        return total
+
+    # ---------- metrics ----------
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "bytes_from_cache": self._bytes_from_cache,
+                "bytes_downloaded": self._bytes_downloaded,
+                "evictions": self._evictions,
+                "errors": self._errors,
+                "max_bytes": self.max_bytes,
+            }
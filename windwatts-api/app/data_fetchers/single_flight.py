@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+COORDINATE_DECIMALS = 6  # ~0.1 m; finer differences are the same map click
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        return round(value, COORDINATE_DECIMALS)
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def flight_key(source: str, params: dict) -> Tuple:
+    """
+    Normalized key of a fetch: the source plus its sorted, normalized parameters.
+
+    Floats are rounded to ``COORDINATE_DECIMALS``, so ``lat=40.0`` and
+    ``lat=40.0000001`` share a flight; other values (ints, strings) are compared as is.
+    """
+    return (_normalize(source),) + tuple(sorted((k, _normalize(v)) for k, v in params.items()))
+
+
+class SingleFlight:
+    """
+    In-flight deduplication of identical calls.
+
+    The first caller for a key (the leader) runs the function; callers arriving
+    while it is running wait on the same ``concurrent.futures.Future`` and receive
+    its result or exception. The key is released as soon as the call finishes, so
+    nothing is cached: a call made after completion starts a new flight.
+
+    Sync callers (FastAPI threadpool endpoints) block on the future; async callers
+    await it through ``asyncio.wrap_future`` and, when leading, run the function in
+    the loop's default executor, so both kinds can join the same flight. Results are
+    shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+        self._calls = 0
+        self._executions = 0
+        self._coalesced = 0
+        self._errors = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            self._calls += 1
+            future = self._flights.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            self._executions += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]):
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._errors += 1
+                del self._flights[key]
+            future.set_exception(e)
+        else:
+            with self._lock:
+                del self._flights[key]
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]):
+        """Runs ``fn()`` once for all concurrent callers of ``key`` and returns its result."""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]):
+        """
+        Async variant of :meth:`do` for a blocking ``fn``.
+
+        Cancelling a waiting caller does not cancel the flight: the other callers
+        still get the result.
+        """
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(None, self._run, key, future, fn)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "errors": self._errors,
+                "in_flight": len(self._flights),
+            }
@@ -1,4 +1,5 @@
 from .connection import engine, SessionLocal, get_db
 from .models import AuditLog
+from .audit_writer import AuditLogWriter
 
-__all__ = ['engine', 'SessionLocal', 'get_db', 'AuditLog'] 
\ No newline at end of file
+__all__ = ['engine', 'SessionLocal', 'get_db', 'AuditLog', 'AuditLogWriter'] 
\ No newline at end of file
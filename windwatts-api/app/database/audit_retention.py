@@ -0,0 +1,146 @@
+"""
+Monthly partition maintenance for the partitioned ``audit_logs`` table (Postgres).
+
+Partitions are named ``audit_logs_yYYYYmMM`` and cover one calendar month in UTC.
+Rows outside every monthly partition land in ``audit_logs_default``. Retention drops
+whole partitions (DETACH + DROP TABLE), which is instant and leaves no dead tuples
+behind, instead of running DELETE over the table.
+
+Postgres refuses to create a partition while the default partition holds rows in its
+range, which happens when the maintenance job (scripts/audit_retention.py, run daily)
+falls behind. ensure_partitions then detaches the default partition, creates the new
+one, moves those rows into it and attaches the default partition again, all in the
+caller's transaction. The default partition is only ever a spill-over, so the move is
+small, and retention deletes its expired rows like the monthly ones.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+TABLE = "audit_logs"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant (UTC) of the month containing ``moment``."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + (start.month - 1) + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{TABLE}_y{start.year:04d}m{start.month:02d}"
+
+
+def partition_bounds(name: str) -> Optional[Tuple[datetime, datetime]]:
+    """[start, end) of a monthly partition, or None for names that are not monthly partitions."""
+    match = _PARTITION_RE.match(name)
+    if match is None:
+        return None
+    start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+    return start, add_months(start, 1)
+
+
+def partitions_to_create(now: datetime, months_ahead: int, months_behind: int = 0) -> List[Tuple[str, datetime, datetime]]:
+    """(name, start, end) of the monthly partitions from ``months_behind`` before ``now`` to ``months_ahead`` after it."""
+    current = month_start(now)
+    partitions = []
+    for offset in range(-months_behind, months_ahead + 1):
+        start = add_months(current, offset)
+        partitions.append((partition_name(start), start, add_months(start, 1)))
+    return partitions
+
+
+def expired_partitions(names: List[str], cutoff: datetime) -> List[str]:
+    """Monthly partitions whose every row is older than ``cutoff``, oldest first."""
+    expired = []
+    for name in names:
+        bounds = partition_bounds(name)
+        if bounds is not None and bounds[1] <= cutoff:
+            expired.append((bounds[0], name))
+    return [name for _, name in sorted(expired)]
+
+
+def list_partitions(conn) -> List[str]:
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": TABLE})
+    return [row[0] for row in rows]
+
+
+def _create_partition(conn, name: str, start: datetime, end: datetime):
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def _default_has_rows(conn, start: datetime, end: datetime) -> bool:
+    return bool(conn.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE "timestamp" >= :start AND "timestamp" < :end)'
+    ), {"start": start, "end": end}).scalar())
+
+
+def _create_partition_from_default(conn, name: str, start: datetime, end: datetime):
+    """Creates a monthly partition whose range already has rows in the default partition, moving them over."""
+    window = {"start": start, "end": end}
+    conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    _create_partition(conn, name, start, end)
+    conn.execute(text(
+        f'INSERT INTO {TABLE} SELECT * FROM {DEFAULT_PARTITION} WHERE "timestamp" >= :start AND "timestamp" < :end'
+    ), window)
+    conn.execute(text(f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" >= :start AND "timestamp" < :end'), window)
+    conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+def ensure_partitions(conn, months_ahead: int = 3, months_behind: int = 0, now: Optional[datetime] = None) -> List[str]:
+    """
+    Creates the missing monthly partitions (and the default partition); returns the names created.
+
+    Rows already sitting in the default partition for a month being created are moved into it.
+    """
+    now = now or datetime.now(timezone.utc)
+    existing = set(list_partitions(conn))
+    created = []
+    has_default = DEFAULT_PARTITION in existing
+    if not has_default:
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        created.append(DEFAULT_PARTITION)
+    for name, start, end in partitions_to_create(now, months_ahead, months_behind):
+        if name in existing:
+            continue
+        if has_default and _default_has_rows(conn, start, end):
+            _create_partition_from_default(conn, name, start, end)
+        else:
+            _create_partition(conn, name, start, end)
+        created.append(name)
+    return created
+
+
+def drop_expired_partitions(conn, retention_days: int, now: Optional[datetime] = None, dry_run: bool = False) -> List[str]:
+    """
+    Detaches and drops the monthly partitions older than ``retention_days`` and deletes the
+    default partition's rows older than that; returns the names of the dropped partitions.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+    partitions = list_partitions(conn)
+    expired = expired_partitions(partitions, cutoff)
+    if not dry_run:
+        for name in expired:
+            conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+        if DEFAULT_PARTITION in partitions:
+            conn.execute(text(f'DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" < :cutoff'), {"cutoff": cutoff})
+    return expired
@@ -0,0 +1,174 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_SECONDS = 1.0
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """
+    Background writer that bulk-inserts audit records into ``audit_logs``.
+
+    Requests hand over a compact dict of AuditLog column values through :meth:`submit`,
+    which only puts it on a bounded queue and never blocks: when the queue is full
+    (the database is slower than the request rate) the record is dropped and counted.
+    A single worker thread drains the queue and writes a batch as soon as it holds
+    ``batch_size`` records or ``flush_seconds`` after its first record, as one
+    multi-row INSERT in one transaction. A failed batch is rolled back, logged and
+    counted as dropped; the worker keeps going. :meth:`shutdown` writes whatever is
+    still queued.
+    """
+
+    def __init__(self, session_factory: Callable, max_queue: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, flush_seconds: float = DEFAULT_FLUSH_SECONDS):
+        if max_queue < 1 or batch_size < 1 or flush_seconds <= 0:
+            raise ValueError("max_queue and batch_size must be >= 1 and flush_seconds > 0.")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._submitted = 0
+        self._written = 0
+        self._dropped_full = 0
+        self._dropped_failed = 0
+        self._dropped_closed = 0
+        self._batches = 0
+        self._failed_batches = 0
+
+    @classmethod
+    def from_env(cls, session_factory: Callable) -> Optional["AuditLogWriter"]:
+        """
+        Writer configured by $AUDIT_LOG_QUEUE_SIZE, $AUDIT_LOG_BATCH_SIZE and
+        $AUDIT_LOG_FLUSH_SECONDS, or None unless $AUDIT_LOG_ENABLED is "1".
+        """
+        if os.environ.get("AUDIT_LOG_ENABLED", "0") != "1":
+            return None
+        return cls(
+            session_factory,
+            max_queue=int(os.environ.get("AUDIT_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+            batch_size=int(os.environ.get("AUDIT_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            flush_seconds=float(os.environ.get("AUDIT_LOG_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)),
+        )
+
+    def start(self):
+        """Starts the worker thread (also done lazily by the first submit)."""
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, record: dict) -> bool:
+        """Queues one record without blocking; False if it was dropped."""
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            if self._closed:
+                self._dropped_closed += 1
+                return False
+            self._submitted += 1
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped_full += 1
+            return False
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stops accepting records, writes what is queued and stops the worker."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            # Never started: write the backlog here
+            self._write_batches(self._drain())
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # ---------- worker ----------
+    def _drain(self) -> List[dict]:
+        records = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return records
+            if item is not _STOP:
+                records.append(item)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+        self._write_batches(self._drain())
+
+    def _write_batches(self, records: List[dict]):
+        for start in range(0, len(records), self.batch_size):
+            self._write(records[start:start + self.batch_size])
+
+    def _write(self, batch: List[dict]):
+        if not batch:
+            return
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to write {len(batch)} audit log records: {str(e)}")
+            with self._lock:
+                self._failed_batches += 1
+                self._dropped_failed += len(batch)
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self._batches += 1
+            self._written += len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "submitted": self._submitted,
+                "written": self._written,
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "failed_batches": self._failed_batches,
+                "dropped_queue_full": self._dropped_full,
+                "dropped_write_failed": self._dropped_failed,
+                "dropped_closed": self._dropped_closed,
+            }
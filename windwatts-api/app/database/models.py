@@ -1,21 +1,35 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Float, Boolean
+from sqlalchemy import BigInteger, Column, Identity, Index, Integer, String, DateTime, JSON, Text, Float, Boolean
 from sqlalchemy.sql import func
 from .connection import Base
 
 class AuditLog(Base):
+    """
+    One audited API request.
+
+    On Postgres the migrations create the table range-partitioned by month on
+    ``timestamp`` with primary key ``(id, timestamp)``; partitions are created and
+    dropped by ``app.database.audit_retention``. ``metadata.create_all`` (tests,
+    SQLite) gives a plain table keyed on ``id``. Only two indexes are maintained per
+    insert: a BRIN index on ``timestamp``, which stays tiny for append-only data, and
+    a B-tree on ``request_id`` for looking up a single request.
+    """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_timestamp_brin", "timestamp", postgresql_using="brin"),
+        Index("ix_audit_logs_request_id", "request_id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    request_id = Column(String, nullable=True, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    user_id = Column(String, nullable=True, index=True)
-    action = Column(String, index=True)
-    resource = Column(String, index=True)
-    method = Column(String, index=True)
-    status_code = Column(Integer, nullable=True, index=True)
-    ip_address = Column(String, nullable=True, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    request_id = Column(String, nullable=True)
+    user_id = Column(String, nullable=True)
+    action = Column(String)
+    resource = Column(String)
+    method = Column(String)
+    status_code = Column(Integer, nullable=True)
+    ip_address = Column(String, nullable=True)
     user_agent = Column(Text, nullable=True)
-    duration_ms = Column(Integer, nullable=True, index=True)
+    duration_ms = Column(Integer, nullable=True)
     request_size_bytes = Column(Integer, nullable=True)
     response_size_bytes = Column(Integer, nullable=True)
     log_metadata = Column(JSON, nullable=True)
\ No newline at end of file
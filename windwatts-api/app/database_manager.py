@@ -1,48 +1,120 @@
 import os
 import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+# Hits refresh last_access at most this often, so most reads stay read-only
+ACCESS_RESOLUTION_SECONDS = 60.0
 
 class DatabaseManager:
-    def __init__(self, db_path=None, timeout=5):
+    def __init__(self, db_path=None, timeout=5, max_bytes: Optional[int] = None):
         """
         Initializes the DatabaseManager with the given database path/name and timeout.
+
+        The database runs in WAL mode so that several gunicorn workers can share the file:
+        readers never block on a writer, and each write is a short single-row transaction.
+        One connection is shared by the threads of a worker, serialized by a lock.
+
+        Stored results are bounded by ``max_bytes`` of payload (default $DB_CACHE_MAX_BYTES,
+        or 1 GiB): every row records its size and last access, and after a store the least
+        recently used rows are deleted until the table fits again.
         """
         self.db_path = db_path or os.getenv('DB_PATH', 'db/wtk_data.db')
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        self.conn = sqlite3.connect(self.db_path, timeout=timeout)
+        if max_bytes is None:
+            max_bytes = int(os.getenv('DB_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.max_bytes = max_bytes
+        self._evictions = 0
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
         self.create_table()
 
     def create_table(self):
         """
-        Creates the cached_data table if it does not already exist.
+        Creates the cached_results table if it does not already exist, adding the size and
+        last_access columns to tables created before they existed.
         """
-        with self.conn:
+        with self._lock, self.conn:
             self.conn.execute('''
-                CREATE TABLE IF NOT EXISTS cached_data (
+                CREATE TABLE IF NOT EXISTS cached_results (
                     key TEXT PRIMARY KEY,
-                    data TEXT
+                    kind TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    last_access REAL NOT NULL DEFAULT 0
                     )
                 ''')
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(cached_results)')}
+            if 'size' not in columns:
+                self.conn.execute('ALTER TABLE cached_results ADD COLUMN size INTEGER NOT NULL DEFAULT 0')
+                self.conn.execute('UPDATE cached_results SET size = length(data)')
+            if 'last_access' not in columns:
+                self.conn.execute('ALTER TABLE cached_results ADD COLUMN last_access REAL NOT NULL DEFAULT 0')
+                self.conn.execute('UPDATE cached_results SET last_access = created_at')
+            # Covers both the size total and the eviction order
+            self.conn.execute('CREATE INDEX IF NOT EXISTS ix_cached_results_lru ON cached_results (last_access, size)')
 
-    def get_data(self, key: str) -> str:
+    def get_data(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[str, bytes]]:
         """
         Retrieves data from the database associated with the given key.
 
+        Args:
+            key (str): The key associated with the data.
+            max_age (float, optional): Ignore rows stored more than this many seconds ago.
+
         Returns:
-            str: The data associated with the key, or None if the key does not exist.
+            tuple: (kind, data) associated with the key, or None if the key does not exist.
         """
-        with self.conn.cursor() as cursor:
-            cursor.execute('SELECT data FROM cached_data WHERE key = ?', (key,))
-            row = cursor.fetchone()
-            return row[0] if row else None
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT kind, data, created_at, last_access FROM cached_results WHERE key = ?', (key,)).fetchone()
+            if row is None or (max_age is not None and now - row[2] > max_age):
+                return None
+            if now - row[3] > ACCESS_RESOLUTION_SECONDS:
+                with self.conn:
+                    self.conn.execute('UPDATE cached_results SET last_access = ? WHERE key = ?', (now, key))
+        return row[0], row[1]
 
-    def store_data(self, key: str, data):
+    def store_data(self, key: str, kind: str, data: bytes):
         """
         Stores data in the database with the given key.
 
         Args:
             key (str): The key associated with the data.
-            data (str): The data to be stored.
+            kind (str): Serialization format of the data.
+            data (bytes): The data to be stored.
         """
-        
-        with self.conn:
-            self.conn.execute('INSERT OR REPLACE INTO cached_data (key, data) VALUES (?, ?)', (key, data))
\ No newline at end of file
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO cached_results (key, kind, data, created_at, size, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, kind, sqlite3.Binary(data), now, len(data), now))
+            self._evict()
+
+    def _evict(self):
+        """Deletes the least recently used rows beyond max_bytes (called inside the store transaction)."""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM cached_results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Keep the most recently used rows whose running size fits the budget
+        cursor = self.conn.execute('''
+            DELETE FROM cached_results WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running FROM cached_results
+                ) WHERE running > ?
+            )
+            ''', (self.max_bytes,))
+        self._evictions += cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows, total = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cached_results').fetchone()
+            return {"rows": rows, "bytes": total, "max_bytes": self.max_bytes, "evictions": self._evictions}
@@ -1,5 +1,7 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.schemas import HealthCheckResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,10 +9,25 @@ from fastapi.responses import JSONResponse
 from mangum import Mangum
 from app.controllers.wtk_data_controller import router as wtk_data_router
 from app.controllers.era5_data_controller import router as era5_data_router
-from app.middleware import AuditMiddleware, LoggingMiddleware
+from app.middleware import AuditMiddleware, LoggingMiddleware, MetricsMiddleware, ServerTimingMiddleware
+from app.database import AuditLogWriter, SessionLocal
 from app.exception_handlers import log_unhandled_exceptions, log_validation_errors
 from textwrap import dedent
-from app.schemas import HealthCheckResponse
+from app.schemas import HealthCheckResponse, StageTimingsResponse
+from app.utils.metrics import exposition as metrics_exposition
+from app.utils.timing import stage_histograms
+
+# Background audit log writer, enabled with AUDIT_LOG_ENABLED=1
+audit_log_writer = AuditLogWriter.from_env(SessionLocal)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if audit_log_writer is not None:
+        audit_log_writer.start()
+    yield
+    if audit_log_writer is not None:
+        # Flush queued audit records before the process exits
+        audit_log_writer.shutdown()
 
 app = FastAPI(
     title="WindWatts API",
@@ -27,10 +44,17 @@ app = FastAPI(
         Use the endpoints below to retrieve wind resource and production estimates.
         """
     ).strip(),
+    lifespan=lifespan,
 )
 
 app.add_middleware(LoggingMiddleware)  # Logging middleware first
-app.add_middleware(AuditMiddleware)    # Audit middleware second
+app.add_middleware(AuditMiddleware, writer=audit_log_writer)    # Audit middleware second
+# Per-stage timings (Server-Timing header, timing log line); on unless SERVER_TIMING_ENABLED=0
+if os.environ.get("SERVER_TIMING_ENABLED", "1") == "1":
+    app.add_middleware(ServerTimingMiddleware)
+# Request counts, latency and in-flight gauge for /metrics; on unless METRICS_ENABLED=0
+if os.environ.get("METRICS_ENABLED", "1") == "1":
+    app.add_middleware(MetricsMiddleware)
 
 app.add_exception_handler(Exception, log_unhandled_exceptions)
 app.add_exception_handler(RequestValidationError, log_validation_errors)
@@ -57,6 +81,16 @@ app.include_router(era5_data_router, prefix="/era5", tags=["era5-data"])
 def healthcheck():
     return JSONResponse({"status": "up"}, status_code=200)
 
+@app.get("/stage-timings", response_model=StageTimingsResponse)
+def stage_timings():
+    return {"stage_timings": stage_histograms.snapshot()}
+
+# Prometheus scrape endpoint; totals across all gunicorn workers (see gunicorn.conf.py)
+@app.get("/metrics", include_in_schema=False, response_model=None)
+def metrics():
+    data, content_type = metrics_exposition()
+    return Response(content=data, media_type=content_type)
+
 # Serve generated OpenAPI JSON if present
 @app.get("/openapi.json", include_in_schema=False, response_model=None)
 def serve_openapi_json():
@@ -1,4 +1,6 @@
 from .audit import AuditMiddleware
 from .logger import LoggingMiddleware
+from .metrics import MetricsMiddleware
+from .server_timing import ServerTimingMiddleware
 
-__all__ = ['AuditMiddleware', 'LoggingMiddleware'] 
\ No newline at end of file
+__all__ = ['AuditMiddleware', 'LoggingMiddleware', 'MetricsMiddleware', 'ServerTimingMiddleware'] 
\ No newline at end of file
@@ -1,71 +1,68 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
-from ..database import SessionLocal, AuditLog
-import json
-from typing import Dict, Any
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from datetime import datetime, timezone
+from typing import Optional
+from ..database import AuditLogWriter
 import logging
 import uuid
 import time
 
 logger = logging.getLogger(__name__)
 
-class AuditMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+class AuditMiddleware:
+    """
+    Records an audit entry for every successful (< 400) HTTP request.
+
+    Pure ASGI: request and response sizes are counted from the body messages passing
+    through ``receive`` and ``send``, so neither body is buffered or copied and
+    streamed downloads stay streamed.
+
+    Entries are handed to ``writer`` (an AuditLogWriter), which inserts them into
+    ``audit_logs`` in the background; without a writer nothing is recorded.
+    """
+
+    def __init__(self, app: ASGIApp, writer: Optional[AuditLogWriter] = None):
+        self.app = app
+        self.writer = writer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
         request_id = str(uuid.uuid4())
-        
-        # Get request details
-        request_data = await self._get_request_data(request)
-        request_size = len(json.dumps(request_data).encode('utf-8'))
-        
-        try:
-            # Process the request
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration_ms = int((time.time() - start_time) * 1000)
-            
-            # Get response size
-            response_body = b""
-            async for chunk in response.body_iterator:
-                response_body += chunk
-            response_size = len(response_body)
-            
-            # Only log successful requests to audit log
-            if response.status_code < 400:
-                self._log_request(
-                    request=request,
-                    response=response,
-                    duration_ms=duration_ms,
-                    request_size=request_size,
-                    response_size=response_size,
-                    request_id=request_id
-                )
-            
-            # Reconstruct response
-            return Response(
-                content=response_body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type
-            )
-            
-        except Exception as e:
-            raise
+        status_code = None
+        request_size = 0
+        response_size = 0
 
-    async def _get_request_data(self, request: Request) -> Dict[str, Any]:
-        """Extract relevant data from the request"""
-        try:
-            body = await request.body()
-            if body:
-                try:
-                    return json.loads(body)
-                except json.JSONDecodeError:
-                    return {"raw_body": body.decode()}
-        except Exception:
-            return {}
-        return {}
+        async def receive_wrapper() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive_wrapper, send_wrapper)
+
+        # Only log successful requests to audit log
+        if status_code is not None and status_code < 400:
+            self._log_request(
+                request=Request(scope),
+                status_code=status_code,
+                duration_ms=int((time.perf_counter() - start_time) * 1000),
+                request_size=request_size,
+                response_size=response_size,
+                request_id=request_id
+            )
 
     def _get_client_type(self, user_agent: str) -> str:
         """Determine client type from user agent"""
@@ -81,53 +78,35 @@ class AuditMiddleware(BaseHTTPMiddleware):
     def _log_request(
         self,
         request: Request,
-        response,
+        status_code: int,
         duration_ms: int,
         request_size: int,
         response_size: int,
         request_id: str
     ):
-        """Create audit log entry for successful requests only"""
-        print("Logging request")
-        print("Request ID", request_id)
-        print("Duration", duration_ms)
-        print("Request size", request_size)
-        print("Response size", response_size)
-        print("Request", request)
-        print("Response", response)
-        # db: Session = SessionLocal()
-        # try:
-        #     # Get user ID from request if available
-        #     user_id = None
-        #     if hasattr(request.state, "user"):
-        #         user_id = str(request.state.user.id)
-
-        #     # Extract path information
-        #     path = str(request.url.path)
+        """Queue an audit log entry for a successful request; never blocks on the database"""
+        if self.writer is None:
+            return
+        # Get user ID from request if available
+        user_id = None
+        if hasattr(request.state, "user"):
+            user_id = str(request.state.user.id)
 
-        #     # Create audit log entry
-        #     audit_log = AuditLog(
-        #         user_id=user_id,
-        #         action="api_request",
-        #         resource=path,
-        #         method=request.method,
-        #         status_code=response.status_code,
-        #         ip_address=request.client.host if request.client else None,
-        #         user_agent=request.headers.get("user-agent"),
-        #         duration_ms=duration_ms,
-        #         request_size_bytes=request_size,
-        #         response_size_bytes=response_size,
-        #         request_id=request_id,
-        #         log_metadata={
-        #             "query_params": dict(request.query_params),
-        #             "path_params": request.path_params
-        #         }
-        #     )
-            
-        #     db.add(audit_log)
-        #     db.commit()
-        # except Exception as e:
-        #     logger.error(f"Failed to create audit log: {str(e)}")
-        #     db.rollback()
-        # finally:
-        #     db.close() 
\ No newline at end of file
+        self.writer.submit({
+            "timestamp": datetime.now(timezone.utc),
+            "user_id": user_id,
+            "action": "api_request",
+            "resource": request.url.path,
+            "method": request.method,
+            "status_code": status_code,
+            "ip_address": request.client.host if request.client else None,
+            "user_agent": request.headers.get("user-agent"),
+            "duration_ms": duration_ms,
+            "request_size_bytes": request_size,
+            "response_size_bytes": response_size,
+            "request_id": request_id,
+            "log_metadata": {
+                "query_params": dict(request.query_params),
+                "path_params": request.path_params
+            }
+        })
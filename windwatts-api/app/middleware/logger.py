@@ -1,59 +1,67 @@
 import time
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
-import json
 import uuid
 
 logger = logging.getLogger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+class LoggingMiddleware:
+    """
+    Logs the start and completion of every HTTP request.
+
+    Pure ASGI: the status code and response size are taken from the messages passing
+    through ``send``, so streamed responses (CSV/ZIP downloads) are forwarded chunk by
+    chunk and never buffered. Duration covers the full response, last chunk included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
         request_id = str(uuid.uuid4())
-        
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+
         # Log request start
         logger.info(
-            f"Request started: {request.method} {request.url.path} | "
+            f"Request started: {method} {path} | "
             f"ID: {request_id} | "
-            f"Client: {request.client.host if request.client else 'unknown'}"
+            f"Client: {client[0] if client else 'unknown'}"
         )
-        
+
+        status_code = None
+        response_size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
         try:
-            # Process the request
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration_ms = int((time.time() - start_time) * 1000)
-            
-            # Get response size
-            response_body = b""
-            async for chunk in response.body_iterator:
-                response_body += chunk
-            response_size = len(response_body)
-            
-            # Log request completion
-            logger.info(
-                f"Request completed: {request.method} {request.url.path} | "
-                f"Status: {response.status_code} | "
-                f"Duration: {duration_ms}ms | "
-                f"Size: {response_size} bytes"
-            )
-            
-            # Reconstruct response
-            return Response(
-                content=response_body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type
-            )
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             # Log error
             logger.error(
-                f"Request failed: {request.method} {request.url.path} | "
+                f"Request failed: {method} {path} | "
                 f"Error: {str(e)} | "
-                f"Duration: {int((time.time() - start_time) * 1000)}ms",
+                f"Duration: {int((time.perf_counter() - start_time) * 1000)}ms",
                 exc_info=True
             )
-            raise 
\ No newline at end of file
+            raise
+
+        # Log request completion
+        logger.info(
+            f"Request completed: {method} {path} | "
+            f"Status: {status_code} | "
+            f"Duration: {int((time.perf_counter() - start_time) * 1000)}ms | "
+            f"Size: {response_size} bytes"
+        )
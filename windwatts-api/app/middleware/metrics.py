@@ -0,0 +1,46 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.metrics import (REQUEST_LATENCY, REQUESTS, REQUESTS_IN_FLIGHT, end_request_labels,
+                               start_request_labels)
+
+UNMATCHED_ROUTE = "unmatched"
+
+class MetricsMiddleware:
+    """
+    Counts HTTP requests and records their latency by route, source and status.
+
+    The route label is the matched route's path template, set by the router on the
+    scope while handling the request; requests matching no route share one label.
+    Pure ASGI: latency runs until the last body message, so streamed downloads are
+    measured in full without being buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        labels, token = start_request_labels()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            end_request_labels(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            REQUESTS.labels(method, route_label, labels["source"], str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route_label, labels["source"]).observe(time.perf_counter() - start_time)
@@ -0,0 +1,55 @@
+import json
+import logging
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.timing import end_request_timings, stage_histograms, start_request_timings
+
+logger = logging.getLogger(__name__)
+
+class ServerTimingMiddleware:
+    """
+    Collects the stage timings of every HTTP request.
+
+    Installs a RequestTimings for the request, adds a ``Server-Timing`` header with the
+    stages recorded until the response starts (plus ``app``, the time to the response
+    headers), and once the last byte is sent logs one JSON line with all stages and the
+    total duration. Totals also go into the process-wide stage histograms.
+    Pure ASGI, so streamed responses stay streamed.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        timings, token = start_request_timings()
+        status_code = None
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                app_seconds = time.perf_counter() - start_time
+                timings.record("app", app_seconds)
+                stage_histograms.observe("app", app_seconds)
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total = time.perf_counter() - start_time
+            end_request_timings(token)
+            stage_histograms.observe("total", total)
+            logger.info("request_timing " + json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "total_ms": round(total * 1000, 3),
+                "stages_ms": timings.stages_ms(),
+            }))
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class DatasetSchema(Enum):
+    TIMESERIES = "timeseries"                # Any raw time-series data (year/month/hour based, magnitudes not quantiles) - wtk
+    QUANTILES_WITH_YEAR = "quantiles_with_year"  # Quantile distributions, separated by year - era5
+    QUANTILES_GLOBAL = "quantiles_global"        # Quantile distribution without year (global) - ensemble data
@@ -1,35 +1,104 @@
-from .powercurve import PowerCurve
+from .powercurve import PowerCurve, evaluate_curves
+from .dataset_schema import DatasetSchema
+from .production_report import ProductionReport
+from .power_curve_registry import PowerCurveRegistry
+from app.utils.metrics import POWER_CURVE_ROWS
+from app.utils.timing import timed_stage
 import os
 import pandas as pd
-import calendar
 import numpy as np
 from scipy.interpolate import CubicSpline
-from enum import Enum
-from typing import Optional
+from typing import List, Optional, Tuple
 
-class DatasetSchema(Enum):
-    TIMESERIES = "timeseries"                # Any raw time-series data (year/month/hour based, magnitudes not quantiles) - wtk
-    QUANTILES_WITH_YEAR = "quantiles_with_year"  # Quantile distributions, separated by year - era5
-    QUANTILES_GLOBAL = "quantiles_global"        # Quantile distribution without year (global) - ensemble data
+def _rowwise_searchsorted(a: np.ndarray, v: np.ndarray, side: str = "left") -> np.ndarray:
+    """
+    Apply ``np.searchsorted`` independently to every row of a 2-D array.
+
+    Each row of ``a`` must be sorted. Rows are shifted onto disjoint value ranges
+    so a single flat search answers all of them at once.
+
+    :param a: Sorted rows, shape (B, N).
+    :type a: numpy.ndarray
+    :param v: Values to locate, shape (B, M).
+    :type v: numpy.ndarray
+    :param side: "left" or "right", as in ``np.searchsorted``.
+    :type side: str
+    :return: Insertion indices in [0, N] per row, shape (B, M).
+    :rtype: numpy.ndarray
+    """
+    n_rows, n_cols = a.shape
+    lo = min(np.min(a), np.min(v))
+    span = max(np.max(a), np.max(v)) - lo + 1.0
+    offsets = (np.arange(n_rows, dtype=np.float64) * span)[:, None]
+    idx = np.searchsorted((a - lo + offsets).ravel(), (v - lo + offsets).ravel(), side=side)
+    return idx.reshape(v.shape) - (np.arange(n_rows) * n_cols)[:, None]
+
+def _monotone_repair(q: np.ndarray, eps: float) -> np.ndarray:
+    """
+    Vectorized equivalent of the sequential rule
+    ``q[i] = q[i-1] + eps if q[i] <= q[i-1]`` applied left to right, skipping non-finite pairs.
+
+    Inside a finite run the repaired value is ``q[j] + (i - j) * eps`` where ``j`` is the last
+    element kept as-is, i.e. a running maximum of ``q - i * eps``. That shortcut only differs
+    from the sequential rule when a value exceeds its repaired predecessor by less than eps;
+    the run is restarted at such points, so the loop below iterates over runs, not elements.
+    """
+    out = q.copy()
+    finite = np.isfinite(q)
+    if not finite.any():
+        return out
+
+    # Boundaries of the maximal finite runs
+    edges = np.diff(np.concatenate(([0], finite.astype(np.int8), [0])))
+    for run_start, run_stop in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        start = run_start
+        while start < run_stop:
+            seg = q[start:run_stop]
+            steps = np.arange(seg.size, dtype=np.float64) * eps
+            shifted = seg - steps
+            running = np.maximum.accumulate(shifted)
+            reset = shifted >= running
+            repaired = np.where(reset, seg, running + steps)
+            missed = np.flatnonzero((seg[1:] > repaired[:-1]) & ~reset[1:])
+            if missed.size == 0:
+                out[start:run_stop] = repaired
+                break
+            stop = missed[0] + 1
+            out[start:start + stop] = repaired[:stop]
+            start += stop
+    return out
 
 class PowerCurveManager:
     """
     Manages multiple power curves stored in a directory.
     """
+    INVERSE_METHODS = ("interp", "nearest")
+
     def __init__(self, 
                 power_curve_dir: str,
                 use_swi_default: bool = False,
-                schema_swi_prefs: Optional[dict] = None):
+                schema_swi_prefs: Optional[dict] = None,
+                inverse_method: str = "interp",
+                snapshot_dir: Optional[str] = None,
+                reload_interval: Optional[float] = None):
         """
         Initialize PowerCurveManager to load multiple power curves.
 
         :param power_curve_dir: Directory containing power curve files.
         :param use_swi_default: Fallback if a schema isn't in schema_swi_prefs.
         :param schema_swi_prefs: Optional dict overriding per-schema SWI behavior.       
+        :param inverse_method: Default CDF inversion used by SWI, "interp" (sorted search
+            with local linear interpolation) or "nearest" (legacy nearest grid point).
+        :param snapshot_dir: Where the compiled power curve snapshot is kept (see PowerCurveRegistry).
+        :param reload_interval: Seconds between power curve directory polls; <= 0 disables hot reload.
         """
-        self.power_curves = {}
+        if inverse_method not in self.INVERSE_METHODS:
+            raise ValueError(f"Unknown inverse_method '{inverse_method}', expected one of {self.INVERSE_METHODS}")
+        self._snapshot_dir = snapshot_dir
+        self._reload_interval = reload_interval
         self.load_power_curves(power_curve_dir)
         self.use_swi_default = use_swi_default
+        self.inverse_method = inverse_method
 
         self.schema_swi_prefs = {
             DatasetSchema.TIMESERIES: False, # not used for midpoints; defined for completeness
@@ -95,12 +164,15 @@ class PowerCurveManager:
     
     def load_power_curves(self, directory: str):
         """
-        Load power curves from the specified directory.
+        Load power curves from the specified directory through a PowerCurveRegistry
+        (binary snapshot on later starts, hot reload of changed files).
         """
-        for file in os.listdir(directory):
-            if file.endswith(".csv") or file.endswith(".xlsx"):
-                curve_name = os.path.splitext(file)[0]
-                self.power_curves[curve_name] = PowerCurve(os.path.join(directory, file))
+        self.registry = PowerCurveRegistry(directory, snapshot_dir=self._snapshot_dir, reload_interval=self._reload_interval)
+
+    @property
+    def power_curves(self) -> dict:
+        """Current name -> PowerCurve mapping; take one reference per request for a consistent view."""
+        return self.registry.curves
 
     def get_curve(self, curve_name: str) -> PowerCurve:
         """
@@ -112,13 +184,42 @@ class PowerCurveManager:
         Returns:
             PowerCurve: Corresponding power curve object.
         """
-        if curve_name not in self.power_curves:
+        curves = self.power_curves
+        if curve_name not in curves:
             raise KeyError(f"Power curve '{curve_name}' not found.")
-        return self.power_curves[curve_name]
+        return curves[curve_name]
+
+    def curve_stats(self, curve_name: Optional[str] = None) -> dict:
+        """
+        Out-of-range instrumentation of the loaded power curves.
+
+        Args:
+            curve_name (str, optional): Restrict to one curve; all curves when None.
+
+        Returns:
+            dict: curve name -> CurveStats snapshot
+        """
+        if curve_name is not None:
+            return {curve_name: self.get_curve(curve_name).stats.snapshot()}
+        curves = self.power_curves
+        return {name: curves[name].stats.snapshot() for name in sorted(curves)}
+
+    def reset_curve_stats(self):
+        """Resets the out-of-range counters of every loaded power curve."""
+        for curve in self.power_curves.values():
+            curve.reset_counters()
     
-    def find_inverse(self, x_smooth: np.ndarray, y_smooth: np.ndarray, y_hat: np.ndarray) -> np.ndarray:
+    def find_inverse(self, x_smooth: np.ndarray, y_smooth: np.ndarray, y_hat: np.ndarray, method: Optional[str] = None) -> np.ndarray:
         """
-        Vectorized inverse mapping: finds the x values corresponding to the closest y values to each y_hat.
+        Vectorized inverse mapping: finds the x values at which the smoothed curve reaches each y_hat.
+
+        Two methods are available:
+            - ``"interp"``: takes the running maximum of ``y_smooth`` (a monotone CDF envelope),
+              locates each target with a binary search and linearly interpolates between the
+              two bracketing grid points. O(M2 log M1) time and O(M2) extra memory.
+            - ``"nearest"``: the original behaviour, which builds the dense ``M1 x M2`` difference
+              matrix and returns the grid point with the closest y. Kept to reproduce historical
+              results exactly for regression comparison.
 
         :param x_smooth: Smoothed x values.
         :type x_smooth: numpy.ndarray
@@ -126,19 +227,90 @@ class PowerCurveManager:
         :type y_smooth: numpy.ndarray
         :param y_hat: Target y values to invert.
         :type y_hat: numpy.ndarray
+        :param method: "interp" or "nearest"; defaults to the manager's ``inverse_method``.
+        :type method: str, optional
 
-        :return: Array of x values corresponding to closest y matches.
+        :return: Array of x values corresponding to y_hat.
         :rtype: numpy.ndarray
         """
-        # Broadcasting to compute pairwise absolute differences
-        diff = np.abs(y_smooth[:, None] - y_hat[None, :])
-        closest_indices = np.argmin(diff, axis=0)
-        return x_smooth[closest_indices]
+        method = method or self.inverse_method
+        if method == "nearest":
+            # Broadcasting to compute pairwise absolute differences
+            diff = np.abs(y_smooth[:, None] - y_hat[None, :])
+            closest_indices = np.argmin(diff, axis=0)
+            return x_smooth[closest_indices]
+        if method != "interp":
+            raise ValueError(f"Unknown inverse method '{method}', expected one of {self.INVERSE_METHODS}")
+
+        x_smooth = np.asarray(x_smooth, dtype=np.float64)
+        y_mono = np.maximum.accumulate(np.asarray(y_smooth, dtype=np.float64))
+        y_hat = np.asarray(y_hat, dtype=np.float64)
+
+        # First grid point whose CDF value reaches each target
+        raw_idx = np.searchsorted(y_mono, y_hat, side="left")
+        idx = np.clip(raw_idx, 1, y_mono.size - 1)
+        y0, y1 = y_mono[idx - 1], y_mono[idx]
+        x0, x1 = x_smooth[idx - 1], x_smooth[idx]
+        dy = y1 - y0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(dy > 0, (y_hat - y0) / dy, 1.0)
+        q = x0 + np.clip(w, 0.0, 1.0) * (x1 - x0)
+
+        # Targets outside the sampled CDF range clamp to the grid ends
+        q[raw_idx == 0] = x_smooth[0]
+        q[raw_idx == y_mono.size] = x_smooth[-1]
+        return q
     
+    def find_inverse_batch(self, x_smooth: np.ndarray, y_smooth: np.ndarray, y_hat: np.ndarray, method: Optional[str] = None) -> np.ndarray:
+        """
+        Row-wise version of :meth:`find_inverse` for a stack of sampled CDFs.
+
+        The "interp" method runs as a single vectorized search over all rows. The
+        "nearest" regression mode falls back to the per-row dense argmin.
+
+        :param x_smooth: Smoothed x values, shape (B, M1).
+        :type x_smooth: numpy.ndarray
+        :param y_smooth: Smoothed y values, shape (B, M1).
+        :type y_smooth: numpy.ndarray
+        :param y_hat: Target y values shared by every row, shape (M2,).
+        :type y_hat: numpy.ndarray
+        :param method: "interp" or "nearest"; defaults to the manager's ``inverse_method``.
+        :type method: str, optional
+        :return: Inverted x values, shape (B, M2).
+        :rtype: numpy.ndarray
+        """
+        method = method or self.inverse_method
+        if method == "nearest":
+            return np.vstack([self.find_inverse(xs, ys, y_hat, method="nearest") for xs, ys in zip(x_smooth, y_smooth)])
+        if method != "interp":
+            raise ValueError(f"Unknown inverse method '{method}', expected one of {self.INVERSE_METHODS}")
+
+        n_rows, n_grid = y_smooth.shape
+        y_mono = np.maximum.accumulate(np.asarray(y_smooth, dtype=np.float64), axis=1)
+        targets = np.broadcast_to(np.asarray(y_hat, dtype=np.float64), (n_rows, len(y_hat)))
+
+        raw_idx = _rowwise_searchsorted(y_mono, targets, side="left")
+        idx = np.clip(raw_idx, 1, n_grid - 1)
+        y0 = np.take_along_axis(y_mono, idx - 1, axis=1)
+        y1 = np.take_along_axis(y_mono, idx, axis=1)
+        x0 = np.take_along_axis(x_smooth, idx - 1, axis=1)
+        x1 = np.take_along_axis(x_smooth, idx, axis=1)
+        dy = y1 - y0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(dy > 0, (targets - y0) / dy, 1.0)
+        q = x0 + np.clip(w, 0.0, 1.0) * (x1 - x0)
+
+        q = np.where(raw_idx == 0, x_smooth[:, :1], q)
+        return np.where(raw_idx == n_grid, x_smooth[:, -1:], q)
+
     def _jitter_nonincreasing(self, q: np.ndarray, eps: float = 1e-5):
         """
         Ensure q is strictly increasing by adding a tiny epsilon to any element
         that is <= its predecessor. Long flat runs become a tiny staircase.
+
+        Vectorized: each finite run is repaired with a running maximum instead of an
+        element-by-element loop. Non-finite entries are left untouched and restart the
+        staircase, like the original loop. A 2-D input is repaired row by row.
         
         :param q: Input array of quantile values that may include equal or decreasing entries.
         :type q: numpy.ndarray
@@ -151,15 +323,26 @@ class PowerCurveManager:
         # q = np.array([3.02, 3.02, 3.02, 3.05])
         # _jitter_nonincreasing(q, eps=1e-5)
         # array([3.02, 3.02001, 3.02002, 3.05])
-        q = np.asarray(q, dtype=np.float64).copy()
-        for i in range(1, q.size):
-            if not np.isfinite(q[i]) or not np.isfinite(q[i-1]):
-                continue
-            if q[i] <= q[i-1]:
-                q[i] = q[i-1] + eps
-        return q
+        q = np.array(q, dtype=np.float64)
+        if q.ndim == 1:
+            return _monotone_repair(q, eps)
+
+        # All-finite rows: one running maximum along axis 1
+        steps = np.arange(q.shape[1], dtype=np.float64) * eps
+        shifted = q - steps
+        running = np.maximum.accumulate(shifted, axis=1)
+        reset = shifted >= running
+        out = np.where(reset, q, running + steps)
+
+        # Rows with gaps, or where a value rises above its repaired predecessor by less
+        # than eps, need the exact sequential rule
+        missed = np.any((q[:, 1:] > out[:, :-1]) & ~reset[:, 1:], axis=1)
+        exact = missed | ~np.all(np.isfinite(q), axis=1)
+        for row in np.flatnonzero(exact):
+            out[row] = _monotone_repair(q[row], eps)
+        return out
     
-    def run_cubic(self, x, y, probs_new, M1):
+    def run_cubic(self, x, y, probs_new, M1, inverse_method: Optional[str] = None):
         """
         Internal helper: fit cubic spline F(q)=P(X≤q) and invert to Q(p).
 
@@ -176,6 +359,8 @@ class PowerCurveManager:
         :type probs_new: numpy.ndarray
         :param M1: Number of interpolation points for CDF smoothing.
         :type M1: int
+        :param inverse_method: Inversion method passed to find_inverse (defaults to the manager's).
+        :type inverse_method: str, optional
         :return: Tuple (quantiles_new, probs_new) representing the smoothed quantile curve.
         :rtype: Tuple[numpy.ndarray, numpy.ndarray]
         """
@@ -191,11 +376,123 @@ class PowerCurveManager:
         y_smooth = spline(x_smooth)
 
         # Invert F(q) -> Q(p)
-        q_new = self.find_inverse(x_smooth, y_smooth, probs_new)
+        q_new = self.find_inverse(x_smooth, y_smooth, probs_new, method=inverse_method)
 
         return q_new,probs_new
     
-    def estimation_quantiles_SWI(self, quantiles, probs, M1=1000, M2=501):
+    def run_cubic_batch(self, x: np.ndarray, y: np.ndarray, probs_new: np.ndarray, M1: int, inverse_method: Optional[str] = None) -> np.ndarray:
+        """
+        Vectorized :meth:`run_cubic` for a stack of quantile vectors sharing one probability grid.
+
+        Every row gets the same clamped cubic spline as ``CubicSpline(x[b], y, bc_type=((1, dy_start), (1, dy_end)))``.
+        The tridiagonal slope system is solved for all rows at once with the Thomas algorithm, so
+        the only Python loop runs over the (fixed) number of quantiles, never over rows.
+
+        :param x: Quantile values, shape (B, N), each row strictly increasing.
+        :type x: numpy.ndarray
+        :param y: Cumulative probabilities shared by all rows, shape (N,).
+        :type y: numpy.ndarray
+        :param probs_new: Uniformly spaced probabilities at which to estimate new quantiles.
+        :type probs_new: numpy.ndarray
+        :param M1: Number of interpolation points for CDF smoothing.
+        :type M1: int
+        :param inverse_method: Inversion method passed to find_inverse_batch (defaults to the manager's).
+        :type inverse_method: str, optional
+        :return: Smoothed quantiles, shape (B, len(probs_new)).
+        :rtype: numpy.ndarray
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n_rows, n = x.shape
+
+        h = np.diff(x, axis=1)                  # (B, N-1)
+        m = np.diff(y)[None, :] / h             # secant slopes
+
+        # Clamped end slopes (forward/backward differences), interior slopes from the tridiagonal system
+        s = np.empty_like(x)
+        s[:, 0] = m[:, 0]
+        s[:, -1] = m[:, -1]
+        if n > 2:
+            sub = h[:, 1:]                          # coefficient of s[i-1] for interior node i
+            diag = 2.0 * (h[:, :-1] + h[:, 1:])
+            sup = h[:, :-1]                         # coefficient of s[i+1]
+            rhs = 3.0 * (h[:, 1:] * m[:, :-1] + h[:, :-1] * m[:, 1:])
+            rhs[:, 0] -= sub[:, 0] * s[:, 0]
+            rhs[:, -1] -= sup[:, -1] * s[:, -1]
+
+            # Thomas algorithm, vectorized across rows
+            c_prime = np.empty_like(rhs)
+            d_prime = np.empty_like(rhs)
+            c_prime[:, 0] = sup[:, 0] / diag[:, 0]
+            d_prime[:, 0] = rhs[:, 0] / diag[:, 0]
+            for i in range(1, n - 2):
+                denom = diag[:, i] - sub[:, i] * c_prime[:, i - 1]
+                c_prime[:, i] = sup[:, i] / denom
+                d_prime[:, i] = (rhs[:, i] - sub[:, i] * d_prime[:, i - 1]) / denom
+            s[:, n - 2] = d_prime[:, -1]
+            for i in range(n - 4, -1, -1):
+                s[:, i + 1] = d_prime[:, i] - c_prime[:, i] * s[:, i + 2]
+
+        # Hermite cubic coefficients per segment
+        c2 = (3.0 * m - 2.0 * s[:, :-1] - s[:, 1:]) / h
+        c3 = (s[:, :-1] + s[:, 1:] - 2.0 * m) / h ** 2
+
+        # Dense per-row grids and their segments
+        x_smooth = np.linspace(x[:, 0], x[:, -1], M1, dtype=np.float64, axis=1)
+        seg = np.clip(_rowwise_searchsorted(x, x_smooth, side="right") - 1, 0, n - 2)
+        dt = x_smooth - np.take_along_axis(x, seg, axis=1)
+        y_smooth = y[seg] + dt * (
+            np.take_along_axis(s, seg, axis=1)
+            + dt * (np.take_along_axis(c2, seg, axis=1) + dt * np.take_along_axis(c3, seg, axis=1))
+        )
+
+        return self.find_inverse_batch(x_smooth, y_smooth, probs_new, method=inverse_method)
+
+    @timed_stage("swi")
+    def estimation_quantiles_SWI_batch(self, quantiles, probs, M1=1000, M2=501, inverse_method: Optional[str] = None):
+        """
+        Estimate smoothed quantile functions for many quantile vectors (e.g. one per year) at once.
+
+        Batched counterpart of :meth:`estimation_quantiles_SWI`: rows that are not strictly
+        increasing get the same epsilon jitter as the sequential fallback, and rows with
+        non-finite quantiles produce the same all-zero default.
+
+        :param quantiles: Observed quantile values, shape (B, N), rows sorted by probability.
+        :type quantiles: numpy.ndarray
+        :param probs: Cumulative probabilities shared by every row, shape (N,).
+        :type probs: numpy.ndarray
+        :param M1: Number of points for spline interpolation (default: 1000).
+        :type M1: int
+        :param M2: Number of evenly spaced probability points (default: 501).
+        :type M2: int
+        :param inverse_method: "interp" or "nearest" CDF inversion (defaults to the manager's inverse_method).
+        :type inverse_method: str, optional
+        :return: Tuple (quantiles_new of shape (B, M2), probs_new of shape (M2,)).
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        q = np.array(quantiles, dtype=np.float64, ndmin=2)
+        p = np.asarray(probs, dtype=np.float64)
+        probs_new = np.linspace(0, 1, M2, dtype=np.float64)
+
+        quantiles_new = np.zeros((q.shape[0], M2), dtype=np.float64)
+        if q.shape[1] < 2 or not np.all(np.isfinite(p)):
+            print("Warning: batched SWI needs at least two finite probabilities; returning defaults.")
+            return quantiles_new, probs_new
+
+        ok = np.all(np.isfinite(q), axis=1)
+        if not np.all(ok):
+            print(f"Warning: {int((~ok).sum())} quantile row(s) contain non-finite values; returning defaults for them.")
+
+        needs_jitter = ok & np.any(np.diff(q, axis=1) <= 0, axis=1)
+        if np.any(needs_jitter):
+            q[needs_jitter] = self._jitter_nonincreasing(q[needs_jitter], eps=1e-5)
+
+        if np.any(ok):
+            quantiles_new[ok] = self.run_cubic_batch(q[ok], p, probs_new, M1, inverse_method=inverse_method)
+        return quantiles_new, probs_new
+
+    @timed_stage("swi")
+    def estimation_quantiles_SWI(self, quantiles, probs, M1=1000, M2=501, inverse_method: Optional[str] = None):
         """
         Estimate a smoother quantile function using the Spline With Inversion (SWI) method, with a safe fallback..
 
@@ -203,11 +500,12 @@ class PowerCurveManager:
         provided `quantiles` and corresponding `probs`), and then performs an inversion to generate 
         a smooth estimate of quantiles over a high-resolution, uniformly spaced probability range.
 
-        If the cubic spline fails due to equal or non-increasing quantile values
-        (which violate the strictly increasing requirement of CubicSpline),
-        those quantiles are adjusted by a small epsilon (+1e-5) to enforce
-        monotonicity before retrying. This correction is minimal and does not
-        materially affect the resulting averages.
+        Equal or non-increasing quantile values (which violate the strictly
+        increasing requirement of CubicSpline) are detected up front and
+        adjusted by a small epsilon (+1e-5) to enforce monotonicity before the
+        spline is built. This correction is minimal and does not materially
+        affect the resulting averages. Inputs with non-finite values return
+        the all-zero default.
 
         Assumes that:
             - `quantiles` and `probs` are both sorted in ascending order.
@@ -221,6 +519,8 @@ class PowerCurveManager:
         :type M1: int
         :param M2: Number of evenly spaced probability points at which to estimate new quantiles (default: 501).
         :type M2: int
+        :param inverse_method: "interp" or "nearest" CDF inversion (defaults to the manager's inverse_method).
+        :type inverse_method: str, optional
 
         :return: Tuple containing:
             - quantiles_new (numpy.ndarray): Estimated quantile values corresponding to probs_new.
@@ -231,25 +531,40 @@ class PowerCurveManager:
         q = np.asarray(quantiles, dtype=np.float64)  # quantiles
         p = np.asarray(probs,     dtype=np.float64)  # probabilities
 
-        # Predefine defaults in case both attempts fail
+        # Predefine defaults in case the spline cannot be built
         probs_new = np.linspace(0, 1, M2, dtype=np.float64)
         quantiles_new_default = np.zeros_like(probs_new, dtype=np.float64)
-        
-        try:
-            return self.run_cubic(q, p, probs_new, M1)
-        except (ValueError, ZeroDivisionError) as e1:
-            print(f"Cubic Spline failed due to: {e1}. Attempting Fallback...")
-        except Exception as e2:
-            print(f"Cubic Spline failed due to: {e2}.")
+
+        if q.size < 2 or p.size < 2 or not np.all(np.isfinite(q)) or not np.all(np.isfinite(p)):
+            print("Warning: SWI needs at least two finite quantiles and probabilities; returning defaults.")
             return quantiles_new_default, probs_new
-        
+
+        # Repair flat or decreasing runs before fitting instead of retrying after a failure
+        if np.any(np.diff(q) <= 0):
+            q = self._jitter_nonincreasing(q, eps=1e-5)
+
         try:
-            q_fix = self._jitter_nonincreasing(q, eps=1e-5)
-            return self.run_cubic(q_fix, p, probs_new, M1)
-        except Exception as e3:
-            print(f"Warning: CubicSpline failed even after jittering — {e3}")
+            return self.run_cubic(q, p, probs_new, M1, inverse_method=inverse_method)
+        except Exception as e:
+            print(f"Warning: CubicSpline failed — {e}")
             return quantiles_new_default, probs_new
     
+    def _quantile_midpoints(self, df_sorted: pd.DataFrame, ws_col: str, use_swi: bool) -> np.ndarray:
+        """
+        Takes a dataframe with columns [probability, ws_col] sorted by probability
+        → smooth CDF via SWI or not based on use_swi flag → equal-probability midpoint wind speeds.
+        """
+        probs = df_sorted["probability"].to_numpy(dtype=float)
+        quants = df_sorted[ws_col].to_numpy(dtype=float)
+
+        if use_swi:
+            q_est, _ = self.estimation_quantiles_SWI(quantiles=quants,probs=probs)
+        else:
+            q_est = quants
+
+        q_est = np.asarray(q_est, dtype=float)
+        return (q_est[1:] + q_est[:-1]) / 2
+
     def _quantiles_to_kw_midpoints(
         self,
         df_sorted: pd.DataFrame,
@@ -258,28 +573,109 @@ class PowerCurveManager:
         use_swi: bool
     ) -> pd.DataFrame:
         """
-        Takes a dataframe with columns [probability, ws_col] sorted by probability
-        → smooth CDF via SWI or not based on use_swi flag → midpoint quantiles → kW via power curve.
+        Midpoint wind speeds of a probability-sorted quantile table converted to kW via the power curve.
         Returns a dataframe with columns [ws_col, f"{ws_col}_kw"] for equal-probability midpoints.
         """
-        probs = df_sorted["probability"].to_numpy(dtype=float)
-        quants = df_sorted[ws_col].to_numpy(dtype=float)
+        midpoints = self._quantile_midpoints(df_sorted, ws_col, use_swi)
+        return pd.DataFrame({
+            ws_col: midpoints,
+            f"{ws_col}_kw": power_curve.windspeed_to_kw_array(midpoints),
+        })
+
+    def _yearly_quantile_midpoints(
+        self,
+        df: pd.DataFrame,
+        ws_col: str,
+        use_swi: bool
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Batched midpoints for quantile data with a year column.
+
+        Reshapes the quantile table into a (years x quantiles) array and smooths every year in
+        one SWI call. Returns (years, midpoints of shape (years, quantiles - 1)), or None when
+        years do not share the same probability grid, in which case the caller falls back to
+        the per-year path.
+        """
+        ordered = df.sort_values(["year", "probability"], kind="stable")
+        years, counts = np.unique(ordered["year"].to_numpy(), return_counts=True)
+        n_quantiles = counts[0]
+        if n_quantiles < 2 or np.any(counts != n_quantiles):
+            return None
+
+        probs = ordered["probability"].to_numpy(dtype=float).reshape(len(years), n_quantiles)
+        if not np.array_equal(probs, np.broadcast_to(probs[0], probs.shape)):
+            return None
+        quants = ordered[ws_col].to_numpy(dtype=float).reshape(len(years), n_quantiles)
 
         if use_swi:
-            q_est, _ = self.estimation_quantiles_SWI(quantiles=quants,probs=probs)
+            q_est, _ = self.estimation_quantiles_SWI_batch(quants, probs[0])
         else:
             q_est = quants
 
-        qs = pd.Series(q_est, dtype=float)
-        midpoints = (qs.shift(-1) + qs) / 2
-        midpoints = midpoints.iloc[:-1]  # drop last NaN
+        return years, (q_est[:, 1:] + q_est[:, :-1]) / 2
+
+    def _yearly_quantiles_to_kw_midpoints(
+        self,
+        df: pd.DataFrame,
+        ws_col: str,
+        power_curve: PowerCurve,
+        use_swi: bool
+    ) -> Optional[pd.DataFrame]:
+        """
+        Batched midpoint/kW table for quantile data with a year column.
+
+        All midpoints from ``_yearly_quantile_midpoints`` are converted to kW in a single
+        vectorized pass. Returns None for ragged probability grids.
+        Output columns: ["year", ws_col, f"{ws_col}_kw"].
+        """
+        kw_col = f"{ws_col}_kw"
+        if df.empty:
+            return pd.DataFrame(columns=["year", ws_col, kw_col])
+
+        batched = self._yearly_quantile_midpoints(df, ws_col, use_swi)
+        if batched is None:
+            return None
+        years, midpoints = batched
+        kw = power_curve.windspeed_to_kw_array(midpoints)
+        return pd.DataFrame({
+            "year": np.repeat(years, midpoints.shape[1]),
+            ws_col: midpoints.ravel(),
+            kw_col: kw.ravel(),
+        })
+
+    def _timeseries_production_columns(self, df: pd.DataFrame, ws_col: str, power_curve: PowerCurve) -> dict:
+        """
+        Column arrays of the time-series kW table, computed without copying or mutating df.
+
+        Year, mohr and wind speed are taken as NumPy views of the input columns; month and
+        hour are derived from ``mohr`` when not present; only the kW column is newly computed.
 
-        # Convert to kW
-        mid_df = pd.DataFrame({ws_col: midpoints})
-        mid_df[f"{ws_col}_kw"] = power_curve.windspeed_to_kw(mid_df, ws_col)
-        return mid_df
+        Returns:
+            dict: {"year", "mohr", "month", "hour", ws_col, f"{ws_col}_kw"} -> numpy.ndarray
+        """
+        if "month" in df.columns and "hour" in df.columns:
+            month = df["month"].to_numpy()
+            hour = df["hour"].to_numpy()
+            mohr = df["mohr"].to_numpy() if "mohr" in df.columns else month * 100 + hour
+        elif "mohr" in df.columns:
+            # era5 data doesn't have month and hour columns
+            mohr = df["mohr"].to_numpy()
+            month, hour = np.divmod(mohr, 100)
+        else:
+            raise KeyError("WTK-like input requires 'mohr' or explicit 'month' and 'hour' columns.")
+
+        ws = df[ws_col].to_numpy(dtype=np.float64)
+        return {
+            "year": df["year"].to_numpy(),
+            "mohr": mohr,
+            "month": month,
+            "hour": hour,
+            ws_col: ws,
+            f"{ws_col}_kw": power_curve.windspeed_to_kw_array(ws),
+        }
 
-    def fetch_energy_production_df(self, df: pd.DataFrame, height: int, selected_power_curve: str, relevant_columns_only: bool = True) -> pd.DataFrame:
+    @timed_stage("energy_production_df")
+    def fetch_energy_production_df(self, df: pd.DataFrame, height: int, selected_power_curve: str, relevant_columns_only: bool = True, schema: Optional[DatasetSchema] = None) -> pd.DataFrame:
         """
         Computes energy production dataframe using the selected power curve.
 
@@ -288,6 +684,7 @@ class PowerCurveManager:
             height (int): Height in meters for which to estimate power production.
             selected_power_curve (str): Name of the selected power curve.
             relevant_columns_only (bool): If True, returns only relevant columns.
+            schema (DatasetSchema, optional): Already classified schema of df, to skip re-classification.
 
         Returns:
             pd.DataFrame
@@ -298,26 +695,26 @@ class PowerCurveManager:
         ws_col = f'windspeed_{height}m'
         if ws_col not in df.columns:
             raise KeyError(f"Expected column '{ws_col}' in input dataframe.")
+        POWER_CURVE_ROWS.labels("energy_production_df").inc(len(df))
         
-        schema = self._classify_schema(df)
+        if schema is None:
+            schema = self._classify_schema(df)
         power_curve = self.get_curve(selected_power_curve)
 
         if schema == DatasetSchema.TIMESERIES:
-            # era5 data doesn't have month and hour columns
-            work = df.copy()
-            if "month" not in work.columns or "hour" not in work.columns:
-                if "mohr" not in work.columns:
-                    raise KeyError("WTK-like input requires 'mohr' or explicit 'month' and 'hour' columns.")
-                work["month"], work["hour"] = work["mohr"] // 100, work["mohr"] % 100
-
-            work[f"{ws_col}_kw"] = power_curve.windspeed_to_kw(work, ws_col)
+            columns = self._timeseries_production_columns(df, ws_col, power_curve)
             if relevant_columns_only:
-                cols = ["year", "mohr", "month", "hour", ws_col, f"{ws_col}_kw"]
-                return work[cols]
-            return work
+                return pd.DataFrame(columns, copy=False)
+            # Full frame requested: the only case that copies the input
+            return df.assign(month=columns["month"], hour=columns["hour"], **{f"{ws_col}_kw": columns[f"{ws_col}_kw"]})
         
         elif schema == DatasetSchema.QUANTILES_WITH_YEAR:
             use_swi_eff = self._use_swi_for(schema)
+            out = self._yearly_quantiles_to_kw_midpoints(df, ws_col, power_curve, use_swi=use_swi_eff)
+            if out is not None:
+                return out
+
+            # Ragged input (years with different probability grids): per-year fallback
             records = []
             for year, group in df.groupby("year"):
                 # sorting by probability is important since the records might be shuffled by "groupby" and we are using midpoint method.
@@ -334,6 +731,111 @@ class PowerCurveManager:
             out = self._quantiles_to_kw_midpoints(group, ws_col, power_curve, use_swi=use_swi_eff)
             return out if not relevant_columns_only else out[[ws_col, f"{ws_col}_kw"]]
     
+    def _production_samples(self, df: pd.DataFrame, ws_col: str, schema: DatasetSchema) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Curve-independent wind speed samples and their energy weights.
+
+        The weights are chosen so that ``weights @ kw(samples)`` equals the "Average year"
+        kWh of ``ProductionReport`` for any power curve: time series sum each year × 30
+        and average over years; quantile midpoints average each year × 8760 and average
+        over years. NaN samples are dropped, mirroring the NaN-skipping pandas reductions.
+
+        Returns:
+            Tuple (wind speeds, weights), both 1-D
+        """
+        if schema == DatasetSchema.TIMESERIES:
+            ws = df[ws_col].to_numpy(dtype=np.float64)
+            n_years = np.unique(df["year"].to_numpy()).size
+            finite = ~np.isnan(ws)
+            return ws[finite], np.full(int(finite.sum()), 30.0 / max(n_years, 1))
+
+        use_swi_eff = self._use_swi_for(schema)
+        if schema == DatasetSchema.QUANTILES_WITH_YEAR:
+            batched = self._yearly_quantile_midpoints(df, ws_col, use_swi_eff) if not df.empty else None
+            if batched is not None:
+                groups = list(batched[1])
+            else:
+                groups = [
+                    self._quantile_midpoints(group.sort_values("probability").reset_index(drop=True), ws_col, use_swi_eff)
+                    for _, group in df.groupby("year")
+                ]
+        else:  # DatasetSchema.QUANTILES_GLOBAL
+            groups = [self._quantile_midpoints(df.sort_values("probability").reset_index(drop=True), ws_col, use_swi_eff)]
+
+        groups = [g[~np.isnan(g)] for g in groups]
+        groups = [g for g in groups if g.size]
+        if not groups:
+            return np.empty(0), np.empty(0)
+        weights = [np.full(g.size, 8760.0 / (g.size * len(groups))) for g in groups]
+        return np.concatenate(groups), np.concatenate(weights)
+
+    @timed_stage("compare_power_curves")
+    def compare_power_curves(self, df: pd.DataFrame, height: int, curve_names: Optional[List[str]] = None) -> List[dict]:
+        """
+        Ranks power curves by annual energy production at one location.
+
+        The wind speed samples are derived once and every curve is evaluated in a single
+        (curves × samples) pass, so comparing all curves costs little more than one.
+
+        Args:
+            df (pd.DataFrame): Dataframe containing data at all heights for a location.
+            height (int): Height in meters.
+            curve_names (list of str, optional): Curves to compare; all loaded curves when None.
+
+        Returns:
+            list of dict, highest annual kWh first
+
+        Example:
+            [
+                {"rank": 1, "powercurve": "nrel-reference-2000kW", "Rated power (kW)": 2000.0,
+                 "kWh produced": 5123456, "Capacity factor": 0.2924},
+                ...
+            ]
+        """
+        ws_col = f"windspeed_{height}m"
+        if ws_col not in df.columns:
+            raise KeyError(f"Expected column '{ws_col}' in input dataframe.")
+        available = self.power_curves
+        names = sorted(available) if curve_names is None else list(dict.fromkeys(curve_names))
+        missing = [name for name in names if name not in available]
+        if missing:
+            raise KeyError(f"Power curve(s) {missing} not found.")
+        curves = [available[name] for name in names]
+        POWER_CURVE_ROWS.labels("compare_power_curves").inc(len(df))
+
+        ws, weights = self._production_samples(df, ws_col, self._classify_schema(df))
+        annual_kwh = evaluate_curves(curves, ws) @ weights
+        rated_kw = np.array([curve.kw_points.max() for curve in curves])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            capacity_factor = np.where(rated_kw > 0, annual_kwh / (rated_kw * 8760.0), np.nan)
+
+        order = np.argsort(-annual_kwh, kind="stable")
+        return [
+            {
+                "rank": rank,
+                "powercurve": names[i],
+                "Rated power (kW)": float(rated_kw[i]),
+                "kWh produced": int(round(annual_kwh[i])),
+                "Capacity factor": None if np.isnan(capacity_factor[i]) else round(float(capacity_factor[i]), 4),
+            }
+            for rank, i in enumerate(order, start=1)
+        ]
+
+    @timed_stage("production_report")
+    def production_report(self, df: pd.DataFrame, height: int, selected_power_curve: str) -> ProductionReport:
+        """
+        Computes the kW table once and returns a report deriving every production view from it.
+
+        Args:
+            df (pd.DataFrame): Dataframe containing data at all heights for a location.
+            height (int): Height in meters.
+            selected_power_curve (str): Power curve
+
+        Returns:
+            ProductionReport
+        """
+        return ProductionReport(self, df, height, selected_power_curve)
+
     def prepare_yearly_production_df(self, df: pd.DataFrame, height: int, selected_power_curve: str) -> pd.DataFrame:
         """
         Prepares yearly average energy production and windspeed dataframe for dependent methods.
@@ -348,57 +850,7 @@ class PowerCurveManager:
             For global quantiles (no year), returns a single pseudo-row with year=None.
             pd.Dataframe
         """
-        prod_df = self.fetch_energy_production_df(df, height, selected_power_curve)
-        ws_column = f'windspeed_{height}m'
-        kw_column = f'windspeed_{height}m_kw'
-
-        schema = self._classify_schema(df)
-        
-        res_list = []
-        if schema == DatasetSchema.TIMESERIES:
-            work = prod_df.copy()
-            # If wind direction columns slipped through, drop them
-            work = work.drop(columns=[c for c in work.columns if "winddirection" in c], errors="ignore")
-
-            for year, group in work.groupby("year"):
-                avg_ws = group[ws_column].mean()
-                # Original approximation used in your code:
-                # sum of instantaneous power over typical month × 30 days
-                kwh = group[kw_column].sum() * 30
-                res_list.append({
-                    "year": year,
-                    "Average wind speed (m/s)": avg_ws,
-                    "kWh produced": kwh
-                })
-
-        elif schema == DatasetSchema.QUANTILES_WITH_YEAR:
-            # Midpoints are equal-probability bins → average power × hours/year
-            for year, group in prod_df.groupby("year"):
-                avg_ws = group[ws_column].mean()
-                avg_power_kw = group[kw_column].mean()
-                kwh = avg_power_kw * 8760.0
-                res_list.append({
-                    "year": year,
-                    "Average wind speed (m/s)": avg_ws,
-                    "kWh produced": kwh
-                })
-
-        else:  # QUANTILES_GLOBAL
-            if len(prod_df) == 0:
-                return pd.DataFrame(columns=["year", "Average wind speed (m/s)", "kWh produced"])
-
-            avg_ws = prod_df[ws_column].mean()
-            avg_power_kw = prod_df[kw_column].mean()
-            kwh = avg_power_kw * 8760.0
-            res_list.append({
-                "year": None,
-                "Average wind speed (m/s)": avg_ws,
-                "kWh produced": kwh
-            })
-
-        res = pd.DataFrame(res_list)
-        res.sort_values("Average wind speed (m/s)", inplace=True, ignore_index=True)
-        return res
+        return self.production_report(df, height, selected_power_curve).yearly_df
     
     def fetch_yearly_avg_energy_production(self, df: pd.DataFrame, height: int, selected_power_curve: str) -> dict:
         """
@@ -419,18 +871,7 @@ class PowerCurveManager:
                 ...
             }
         """
-        yearly_prod_df = self.prepare_yearly_production_df(df,height,selected_power_curve)
-        
-        result = {}
-        for _, row in yearly_prod_df.iterrows():
-            # Use "Global" if year is missing (for quantiles without year)
-            year_key = "Global" if pd.isna(row["year"]) else str(int(row["year"]))
-            result[year_key] = {
-                "Average wind speed (m/s)": f"{float(row['Average wind speed (m/s)']):.2f}",
-                "kWh produced": int(round(float(row["kWh produced"])))
-            }
-
-        return result
+        return self.production_report(df, height, selected_power_curve).yearly
     
     def fetch_avg_energy_production_summary(self, df: pd.DataFrame, height: int, selected_power_curve: str) -> dict:
         """
@@ -451,30 +892,7 @@ class PowerCurveManager:
                 "Highest year": {"year": 2014, "Average wind speed (m/s)": "6.32", "kWh produced": 326354}
             }
         """
-        yearly_prod_df = self.prepare_yearly_production_df(df,height,selected_power_curve)
-        if yearly_prod_df.empty:
-            return {}
-        res_avg = pd.DataFrame(yearly_prod_df.drop(columns=['year']).mean()).T
-        res_avg.index = ["Average year"]
-
-        # Final formatting
-        res_summary = pd.concat([yearly_prod_df.iloc[[0]], res_avg, yearly_prod_df.iloc[[-1]]], ignore_index=False)
-
-        def fmt_year(v):
-            return None if pd.isna(v) else int(v)
-
-        # Handle None year for average row - convert to proper None instead of pandas NA
-        res_summary["year"] = res_summary["year"].map(fmt_year)
-        res_summary["kWh produced"] = res_summary["kWh produced"].astype(float).round().astype(int)
-        res_summary["Average wind speed (m/s)"] = res_summary["Average wind speed (m/s)"].astype(float).map('{:,.2f}'.format)
-
-        res_summary.index = [
-            "Lowest year",
-            "Average year",
-            "Highest year"
-        ]
-        res_summary = res_summary.replace({np.nan: None})
-        return res_summary.to_dict(orient="index")
+        return self.production_report(df, height, selected_power_curve).summary
 
     def fetch_monthly_avg_energy_production(self, df: pd.DataFrame, height: int, selected_power_curve: str) -> dict:
         """
@@ -493,23 +911,6 @@ class PowerCurveManager:
         'Feb': {'Average wind speed, m/s': '3.92', 'kWh produced': '6,357'}, 
         'Mar': {'Average wind speed, m/s': '4.17', 'kWh produced': '7,689'}....}
         """
-        schema = self._classify_schema(df)
-        if schema != DatasetSchema.TIMESERIES:
+        if self._classify_schema(df) != DatasetSchema.TIMESERIES:
             raise ValueError("Monthly averages are only supported for time-series (TIMESERIES) inputs.")
-        prod_df = self.fetch_energy_production_df(df, height, selected_power_curve)
-       
-        ws_column = f'windspeed_{height}m'
-        kw_column = f'windspeed_{height}m_kw'
-
-        work = prod_df.drop(columns=["mohr", "year", "hour"] + [col for col in prod_df.columns if "winddirection" in col],errors="ignore")
-        
-        res = work.groupby("month").agg(avg_ws=(ws_column, "mean"), kwh_total=(kw_column, "sum"))
-        res["kwh_total"] *= 30 / 20.0  # Approximation: 30 days per month, averaged over 20 years
-
-        res.rename(columns={"avg_ws": "Average wind speed (m/s)", "kwh_total": "kWh produced"}, inplace=True)
-        res.index = pd.Series(res.index).apply(lambda x: calendar.month_abbr[int(x)])
-
-        res["kWh produced"] = res["kWh produced"].round().astype(int)
-        res["Average wind speed (m/s)"] = res["Average wind speed (m/s)"].astype(float).map('{:,.2f}'.format)
-
-        return res.to_dict(orient="index")
\ No newline at end of file
+        return self.production_report(df, height, selected_power_curve).monthly
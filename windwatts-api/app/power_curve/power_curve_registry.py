@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .powercurve import PowerCurve
+
+SNAPSHOT_FORMAT_VERSION = 1
+CURVE_EXTENSIONS = (".csv", ".xlsx")
+
+
+def _default_snapshot_dir(directory: str) -> str:
+    base = os.environ.get("POWER_CURVE_SNAPSHOT_DIR") or tempfile.gettempdir()
+    digest = hashlib.blake2b(os.path.abspath(directory).encode(), digest_size=8).hexdigest()
+    return os.path.join(base, f"windwatts-powercurves-{digest}")
+
+
+class PowerCurveRegistry:
+    """
+    Power curves of one directory, backed by a memory-mappable binary snapshot.
+
+    On first load every curve file is parsed and all breakpoints are compiled into a
+    single ``points-<signature>.npy`` array (row 0 wind speed, row 1 kW) plus an
+    ``index.json`` describing each curve's slice and the source files' (mtime, size)
+    signature. Later starts whose directory signature matches map the snapshot
+    read-only instead of parsing, so gunicorn workers share the pages.
+
+    ``curves`` polls the directory at most every ``reload_interval`` seconds. When a
+    file was added, changed or removed, a background thread re-parses only the changed
+    files and swaps in a new mapping in one assignment; in-flight requests keep the
+    mapping they already hold. Unchanged curves keep their objects (and stats).
+    """
+
+    def __init__(self,
+                 directory: str,
+                 snapshot_dir: Optional[str] = None,
+                 reload_interval: Optional[float] = None):
+        """
+        :param directory: Directory containing power curve files (.csv or .xlsx).
+        :param snapshot_dir: Where the snapshot is kept; defaults to $POWER_CURVE_SNAPSHOT_DIR
+            or a per-directory folder in the system temp dir.
+        :param reload_interval: Seconds between directory polls; defaults to
+            $POWER_CURVE_RELOAD_INTERVAL or 5. Zero or negative disables hot reload.
+        """
+        self.directory = directory
+        self.snapshot_dir = snapshot_dir or _default_snapshot_dir(directory)
+        if reload_interval is None:
+            reload_interval = float(os.environ.get("POWER_CURVE_RELOAD_INTERVAL", "5"))
+        self.reload_interval = reload_interval
+
+        self._reload_lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self.loaded_from_snapshot = False
+
+        signature = self._scan()
+        curves = self._load_snapshot(signature)
+        if curves is None:
+            curves = self._compile(signature, previous={}, previous_signature={})
+        else:
+            self.loaded_from_snapshot = True
+        self._signature = signature
+        self._curves = curves
+
+    @property
+    def curves(self) -> Dict[str, PowerCurve]:
+        """Current name -> PowerCurve mapping (never mutated; replaced on reload)."""
+        self.check_for_updates()
+        return self._curves
+
+    # ---------- directory scanning ----------
+    def _scan(self) -> Dict[str, list]:
+        """File name -> [mtime_ns, size] of every curve file in the directory."""
+        signature = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(CURVE_EXTENSIONS):
+                    st = entry.stat()
+                    signature[entry.name] = [st.st_mtime_ns, st.st_size]
+        return dict(sorted(signature.items()))
+
+    def check_for_updates(self) -> Optional[threading.Thread]:
+        """
+        Polls the directory if ``reload_interval`` has elapsed and starts a background
+        reload when it changed. Returns the reload thread, or None if nothing was started.
+        """
+        if self.reload_interval <= 0:
+            return None
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return None
+        self._last_check = now
+        if self._reload_lock.locked() or self._scan() == self._signature:
+            return None
+        thread = threading.Thread(target=self.reload, name="power-curve-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def reload(self) -> bool:
+        """
+        Synchronously re-reads changed, new and removed curve files and swaps the mapping.
+
+        Returns:
+            bool: True if the mapping changed.
+        """
+        with self._reload_lock:
+            signature = self._scan()
+            if signature == self._signature:
+                return False
+            try:
+                curves = self._compile(signature, previous=self._curves, previous_signature=self._signature)
+            except Exception as e:
+                # Keep serving the current curves, e.g. while a file is still being written
+                print(f"Warning: power curve reload failed ({e}); keeping current curves.")
+                return False
+            self._curves = curves
+            self._signature = signature
+            return True
+
+    # ---------- snapshot ----------
+    def _index_path(self) -> str:
+        return os.path.join(self.snapshot_dir, "index.json")
+
+    def _load_snapshot(self, signature: Dict[str, list]) -> Optional[Dict[str, PowerCurve]]:
+        try:
+            with open(self._index_path()) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != SNAPSHOT_FORMAT_VERSION or index.get("files") != signature:
+            return None
+        try:
+            points = np.load(os.path.join(self.snapshot_dir, index["points"]), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return {
+            name: PowerCurve.from_points(points[0, start:stop], points[1, start:stop])
+            for name, start, stop in index["curves"]
+        }
+
+    def _compile(self,
+                 signature: Dict[str, list],
+                 previous: Dict[str, PowerCurve],
+                 previous_signature: Dict[str, list]) -> Dict[str, PowerCurve]:
+        """Builds the mapping, parsing only files whose signature changed, and writes a new snapshot."""
+        curves = {}
+        for file, file_sig in signature.items():
+            name = os.path.splitext(file)[0]
+            if previous_signature.get(file) == file_sig and name in previous:
+                curves[name] = previous[name]
+            else:
+                ws, kw = PowerCurve.read_points(os.path.join(self.directory, file))
+                curves[name] = PowerCurve.from_points(ws, kw)
+        try:
+            self._write_snapshot(signature, curves)
+        except OSError as e:
+            print(f"Warning: could not write power curve snapshot to {self.snapshot_dir}: {e}")
+        return curves
+
+    def _write_snapshot(self, signature: Dict[str, list], curves: Dict[str, PowerCurve]):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        entries, offset = [], 0
+        for name, curve in curves.items():
+            entries.append([name, offset, offset + curve.ws_points.size])
+            offset += curve.ws_points.size
+        points = np.empty((2, offset), dtype=np.float64)
+        for (name, start, stop) in entries:
+            points[0, start:stop] = curves[name].ws_points
+            points[1, start:stop] = curves[name].kw_points
+
+        # Content-addressed points file, so an index never refers to a half-written array
+        digest = hashlib.blake2b(json.dumps(signature).encode() + points.tobytes(), digest_size=8).hexdigest()
+        points_name = f"points-{digest}.npy"
+        points_path = os.path.join(self.snapshot_dir, points_name)
+        if not os.path.exists(points_path):
+            fd, tmp = tempfile.mkstemp(dir=self.snapshot_dir, suffix=".npy.tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, points)
+            os.replace(tmp, points_path)
+
+        index = {"version": SNAPSHOT_FORMAT_VERSION, "files": signature, "points": points_name, "curves": entries}
+        fd, tmp = tempfile.mkstemp(dir=self.snapshot_dir, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self._index_path())
+
+        # Old points files are only unlinked; processes that mapped them keep their pages
+        for file in os.listdir(self.snapshot_dir):
+            if file.startswith("points-") and file.endswith(".npy") and file != points_name:
+                try:
+                    os.remove(os.path.join(self.snapshot_dir, file))
+                except OSError:
+                    pass
@@ -1,69 +1,193 @@
+import threading
+from functools import cached_property
+
 import pandas as pd
 import numpy as np
 from scipy import interpolate
 
+
+class CurveStats(object):
+    """
+    Thread-safe, fixed-size out-of-range instrumentation for one power curve.
+
+    Tracks how many wind speeds were evaluated, how many fell below 0 or above the
+    curve's maximum wind speed (and were clipped), how many were NaN, and a small
+    histogram of how far outside the curve range the clipped values were. Memory use
+    is constant regardless of how many samples are recorded.
+    """
+
+    # Distance (m/s) outside [0, max_ws] of clipped wind speeds; last bin is open-ended
+    HIST_EDGES = (0.0, 1.0, 2.0, 5.0, 10.0, 25.0, np.inf)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._edges = np.asarray(self.HIST_EDGES, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._samples = 0
+            self._nan = 0
+            self._below = 0
+            self._above = 0
+            self._below_hist = np.zeros(len(self.HIST_EDGES) - 1, dtype=np.int64)
+            self._above_hist = np.zeros(len(self.HIST_EDGES) - 1, dtype=np.int64)
+
+    def record(self, ws, max_ws):
+        """
+        Record one batch of raw (unclipped) wind speeds.
+
+        Only the out-of-range subset, usually tiny or empty, is histogrammed.
+        """
+        ws = ws.ravel()
+        n_nan = int(np.count_nonzero(np.isnan(ws)))
+        with np.errstate(invalid="ignore"):
+            below = ws[ws < 0.0]
+            above = ws[ws > max_ws]
+        below_hist = np.histogram(-below, bins=self._edges)[0] if below.size else None
+        above_hist = np.histogram(above - max_ws, bins=self._edges)[0] if above.size else None
+        with self._lock:
+            self._samples += ws.size
+            self._nan += n_nan
+            self._below += below.size
+            self._above += above.size
+            if below_hist is not None:
+                self._below_hist += below_hist
+            if above_hist is not None:
+                self._above_hist += above_hist
+
+    def snapshot(self):
+        """
+        Consistent copy of the counters.
+
+        Returns:
+            dict: {"samples", "nan", "below_curve", "above_curve",
+                   "histogram": {"edges_ms", "below_curve", "above_curve"}}
+        """
+        with self._lock:
+            return {
+                "samples": self._samples,
+                "nan": self._nan,
+                "below_curve": self._below,
+                "above_curve": self._above,
+                "histogram": {
+                    "edges_ms": [float(e) if np.isfinite(e) else None for e in self._edges],
+                    "below_curve": self._below_hist.tolist(),
+                    "above_curve": self._above_hist.tolist(),
+                },
+            }
+
+
 class PowerCurve(object):
 
     def __init__(self, power_curve_path):
 
         # Load data and minimal preprocessing
-
-        if ".xslx" in power_curve_path:
-            self.raw_data = pd.read_excel(power_curve_path)
-            self.raw_data.rename(columns={"Wind Speed (m/s)": "ws", "Turbine Output": "kw"}, inplace=True)
-        elif ".csv" in power_curve_path:
-            self.raw_data = pd.read_csv(power_curve_path)
-            self.raw_data.rename(columns={"Wind Speed (m/s)": "ws", "Turbine Output": "kw"}, inplace=True)
-            #print(self.raw_data.columns)
+        ws, kw = self.read_points(power_curve_path)
+        self._set_points(ws, kw)
+
+    @classmethod
+    def from_points(cls, ws, kw):
+        """
+        Builds a curve from already-preprocessed breakpoints (e.g. a registry snapshot).
+
+        :param ws: Wind speeds in m/s, sorted ascending and starting at 0.
+        :param kw: Turbine output in kW at each wind speed.
+        :return: PowerCurve
+        """
+        curve = cls.__new__(cls)
+        curve._set_points(ws, kw)
+        return curve
+
+    @staticmethod
+    def read_points(power_curve_path):
+        """
+        Parses a .xlsx or .csv power curve file into sorted (ws, kw) breakpoint arrays,
+        adding a (0, 0) point if the curve does not start at 0 m/s.
+        """
+        if power_curve_path.lower().endswith(".xlsx"):
+            raw_data = pd.read_excel(power_curve_path)
+        elif power_curve_path.lower().endswith(".csv"):
+            raw_data = pd.read_csv(power_curve_path)
         else:
-            raise ValueError("Unsupported powercurve file format (should be .xslx or .csv).")
+            raise ValueError("Unsupported powercurve file format (should be .xlsx or .csv).")
+        raw_data = raw_data.rename(columns={"Wind Speed (m/s)": "ws", "Turbine Output": "kw"})
 
         # Add (0,0) if not there already
-        if self.raw_data["ws"].min() > 0:
-            self.raw_data.loc[len(self.raw_data)] = [0, 0]
-            self.raw_data = self.raw_data.sort_values("ws", ascending=True)
-            self.raw_data.reset_index(drop=True, inplace=True)
-
-        # Create vectors for interpolation
-        self.interp_x = self.raw_data.ws
-        self.interp_y = self.raw_data.kw
-
+        if raw_data["ws"].min() > 0:
+            raw_data.loc[len(raw_data)] = [0, 0]
+
+        ws = raw_data.ws.to_numpy(dtype=np.float64)
+        kw = raw_data.kw.to_numpy(dtype=np.float64)
+        order = np.argsort(ws, kind="stable")
+        return ws[order], kw[order]
+
+    def _set_points(self, ws, kw):
+        # Breakpoints frozen into contiguous arrays for the vectorized evaluator
+        self.ws_points = np.ascontiguousarray(ws, dtype=np.float64)
+        self.kw_points = np.ascontiguousarray(kw, dtype=np.float64)
+        if self.ws_points.flags.writeable:
+            self.ws_points.flags.writeable = False
+        if self.kw_points.flags.writeable:
+            self.kw_points.flags.writeable = False
+
+        # Counters of wind speeds higher/lower than what is in the curve (fixed size, thread-safe)
+        self.stats = CurveStats()
+
+        self.max_ws = float(self.ws_points.max())
+
+    @cached_property
+    def raw_data(self):
+        return pd.DataFrame({"ws": self.ws_points, "kw": self.kw_points})
+
+    # Vectors for interpolation
+    @property
+    def interp_x(self):
+        return self.raw_data.ws
+
+    @property
+    def interp_y(self):
+        return self.raw_data.kw
+
+    @cached_property
+    def powercurve_intrp(self):
         # Cubic interpolation
         #self.powercurve_intrp = interp1d(self.interp_x, self.interp_y, kind='cubic')
         # Switched back to linear to avoid bad interpolation with negative values
-        self.powercurve_intrp = interpolate.interp1d(self.interp_x, self.interp_y, kind='linear')
-
-        # Saving a list of instances where windspeeds are higher/lower than what is in the curve
-        self.above_curve = []
-        self.below_curve = []
+        return interpolate.interp1d(self.interp_x, self.interp_y, kind='linear')
 
-        self.max_ws = max(self.raw_data.ws)
-
-        self.reset_counters()
-
-    def windspeed_to_kw(self, df, ws_column="ws-adjusted", dt_column="datetime", trim=True):
+    def windspeed_to_kw(self, df, ws_column="ws-adjusted", trim=True):
         """ Converts wind speed to kw """
-        
-        # by default round down/up values below or under the range of the curve
+        return self.windspeed_to_kw_array(df[ws_column].to_numpy(dtype=np.float64), trim=trim)
+
+    def windspeed_to_kw_array(self, ws, trim=True):
+        """
+        Vectorized wind speed to kW conversion on raw arrays.
+
+        Accepts any array shape, e.g. a 1-D column or a 2-D (heights x samples)
+        block, and returns kW with the same shape. NaN wind speeds yield NaN.
+
+        :param ws: Wind speeds in m/s.
+        :type ws: numpy.ndarray
+        :param trim: Clip wind speeds into [0, max_ws] before interpolating (default True);
+            clipped values are counted in ``self.stats``. When False, values outside the
+            curve range raise a ValueError.
+        :type trim: bool
+        :return: Power output in kW.
+        :rtype: numpy.ndarray
+        """
+        ws = np.asarray(ws, dtype=np.float64)
         if trim:
-            ws = df[ws_column].apply(lambda x: 0 if x < 0 else x).apply(lambda x: self.max_ws if x > self.max_ws else x)
-        else:
-            ws = df[ws_column]
-        
-        kw = self.powercurve_intrp(ws)
-
-        below_curve = df[kw < 0]
-        above_curve = df[kw > self.max_ws]
-
-        if dt_column in df.columns:
-            self.below_curve.extend(zip(below_curve[dt_column].tolist(), below_curve[ws_column].tolist()))
-            self.above_curve.extend(zip(above_curve[dt_column].tolist(), above_curve[ws_column].tolist()))
-
-        return kw
+            self.stats.record(ws, self.max_ws)
+            ws = np.clip(ws, 0.0, self.max_ws)
+        elif ws.size:
+            finite = ws[np.isfinite(ws)]
+            if finite.size and (finite.min() < self.ws_points[0] or finite.max() > self.ws_points[-1]):
+                raise ValueError("A value in x_new is outside the interpolation range.")
+        return np.interp(ws.ravel(), self.ws_points, self.kw_points).reshape(ws.shape)
 
     def reset_counters(self):
-        self.above_curve = []
-        self.below_curve = []
+        self.stats.reset()
 
     def plot(self):
         fig = px.line(y=self.powercurve_intrp(self.interp_x), x=self.interp_x,
@@ -79,3 +203,40 @@ class PowerCurve(object):
         ws2 = np.linspace(0, 12, num=100)
         pc2 = self.powercurve_intrp(ws2)
         return df[kw_column].map(lambda x: ws2[np.abs(pc2 - x).argmin()] )
+
+
+def evaluate_curves(curves, ws):
+    """
+    Evaluates several power curves on the same wind speeds in one vectorized pass.
+
+    Every curve is resampled onto the union of all curves' breakpoints, so one
+    searchsorted over the samples serves all curves and the result is the exact
+    piecewise-linear value of each curve (clipped to its own [0, max_ws] range, like
+    ``PowerCurve.windspeed_to_kw_array``).
+
+    :param curves: Power curves to evaluate.
+    :type curves: list[PowerCurve]
+    :param ws: 1-D wind speeds in m/s.
+    :type ws: numpy.ndarray
+    :return: kW with shape (len(curves), len(ws)).
+    :rtype: numpy.ndarray
+    """
+    ws = np.asarray(ws, dtype=np.float64).ravel()
+    if not curves:
+        return np.empty((0, ws.size))
+    for curve in curves:
+        curve.stats.record(ws, curve.max_ws)
+
+    grid = np.unique(np.concatenate([curve.ws_points for curve in curves]))
+    # np.interp holds the end values flat, which matches clipping each curve to [0, max_ws]
+    table = np.vstack([np.interp(grid, curve.ws_points, curve.kw_points) for curve in curves])
+    if grid.size == 1:
+        return np.repeat(table, ws.size, axis=1)
+
+    clipped = np.clip(ws, grid[0], grid[-1])
+    idx = np.clip(np.searchsorted(grid, clipped, side="right"), 1, grid.size - 1)
+    lo = grid[idx - 1]
+    t = (clipped - lo) / (grid[idx] - lo)
+    kw = table[:, idx - 1] * (1.0 - t) + table[:, idx] * t
+    kw[:, np.isnan(ws)] = np.nan
+    return kw
@@ -65,6 +65,76 @@ class AvailablePowerCurvesResponse(BaseModel):
         }
     }
 
+class PowerCurveStatsHistogram(BaseModel):
+    edges_ms: List[Optional[float]] = Field(description="Bin edges (m/s outside the curve range); null is an open upper edge")
+    below_curve: List[int]
+    above_curve: List[int]
+
+class PowerCurveStats(BaseModel):
+    samples: int = Field(description="Wind speeds evaluated against the curve")
+    nan: int
+    below_curve: int = Field(description="Wind speeds below 0 m/s, clipped to 0")
+    above_curve: int = Field(description="Wind speeds above the curve's maximum, clipped to it")
+    histogram: PowerCurveStatsHistogram
+
+class PowerCurveStatsResponse(BaseModel):
+    powercurve_stats: Dict[str, PowerCurveStats]
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "powercurve_stats": {
+                    "nrel-reference-100kW": {
+                        "samples": 172800, "nan": 0, "below_curve": 0, "above_curve": 12,
+                        "histogram": {
+                            "edges_ms": [0.0, 1.0, 2.0, 5.0, 10.0, 25.0, None],
+                            "below_curve": [0, 0, 0, 0, 0, 0],
+                            "above_curve": [9, 2, 1, 0, 0, 0]
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+class SingleFlightStats(BaseModel):
+    calls: int = Field(description="fetch_data calls received")
+    executions: int = Field(description="Fetches actually sent to a data source")
+    coalesced: int = Field(description="Calls that joined an identical in-flight fetch")
+    errors: int
+    in_flight: int
+
+class CacheTierStats(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+    entries: Optional[int] = None
+    bytes: Optional[int] = None
+
+class ResultCacheStats(BaseModel):
+    memory: CacheTierStats = Field(description="In-process TTL cache of this worker")
+    database: CacheTierStats = Field(description="Local result store shared by the workers")
+    source_fetches: int = Field(description="Results fetched from the data source after missing both tiers")
+    grid_snapped_lookups: int = Field(description="Lookups keyed by grid cell instead of raw coordinates")
+
+class DataFetchStatsResponse(BaseModel):
+    singleflight: SingleFlightStats
+    result_cache: ResultCacheStats
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "singleflight": {"calls": 120, "executions": 41, "coalesced": 79, "errors": 0, "in_flight": 2},
+                "result_cache": {
+                    "memory": {"hits": 300, "misses": 100, "hit_ratio": 0.75, "entries": 80, "bytes": 5242880},
+                    "database": {"hits": 60, "misses": 40, "hit_ratio": 0.6},
+                    "source_fetches": 40,
+                    "grid_snapped_lookups": 400
+                }
+            }
+        }
+    }
+
 # Energy production response models for different time_periods
 class SummaryEnergyProductionResponse(BaseModel):
     energy_production: Numeric = Field(description="global-averaged kWh produced")
@@ -127,6 +197,58 @@ class MonthlyEnergyProductionResponse(BaseModel):
 # Union type for energy production responses
 EnergyProductionResponse = Union[SummaryEnergyProductionResponse, YearlyEnergyProductionResponse, AllEnergyProductionResponse, MonthlyEnergyProductionResponse]
 
+class PowerCurveComparisonEntry(BaseModel):
+    rank: int
+    powercurve: str
+    rated_power_kw: Numeric = Field(alias="Rated power (kW)")
+    kwh_produced: Numeric = Field(alias="kWh produced", description="kWh produced in the average year")
+    capacity_factor: Optional[float] = Field(alias="Capacity factor")
+
+class PowerCurveComparisonResponse(BaseModel):
+    powercurve_comparison: List[PowerCurveComparisonEntry]
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "powercurve_comparison": [
+                    {"rank": 1, "powercurve": "nrel-reference-2000kW", "Rated power (kW)": 2000.0, "kWh produced": 5123456, "Capacity factor": 0.2924},
+                    {"rank": 2, "powercurve": "siva_750_u57", "Rated power (kW)": 750.0, "kWh produced": 1873210, "Capacity factor": 0.2851}
+                ]
+            }
+        }
+    }
+
+class StageTimingBucket(BaseModel):
+    le_ms: Optional[float] = Field(description="Bucket upper bound in ms; null is the open overflow bucket")
+    count: int
+
+class StageTimingStats(BaseModel):
+    count: int
+    total_ms: float
+    mean_ms: float
+    p50_ms: float = Field(description="Upper bound of the bucket holding the median")
+    p95_ms: float
+    p99_ms: float
+    buckets: List[StageTimingBucket]
+
+class StageTimingsResponse(BaseModel):
+    stage_timings: Dict[str, StageTimingStats] = Field(description="Latency histograms per request stage, for this worker")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "stage_timings": {
+                    "athena": {
+                        "count": 42, "total_ms": 51234.5, "mean_ms": 1219.9,
+                        "p50_ms": 1000, "p95_ms": 2500, "p99_ms": 2500,
+                        "buckets": [{"le_ms": 500, "count": 3}, {"le_ms": 1000, "count": 20},
+                                    {"le_ms": 2500, "count": 19}, {"le_ms": None, "count": 0}]
+                    }
+                }
+            }
+        }
+    }
+
 class HealthCheckResponse(BaseModel):
     status: Literal["up"] = "up"
 
@@ -164,4 +286,30 @@ class NearestLocationsResponse(BaseModel):
                 ]
             }
         }
-    }
\ No newline at end of file
+    }
+
+class Coordinate(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90, description="Latitude coordinate")
+    longitude: float = Field(..., ge=-180, le=180, description="Longitude coordinate")
+
+class NearestLocationsBatchRequest(BaseModel):
+    points: List[Coordinate] = Field(
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="Target locations to look up"
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "points": [
+                    {"latitude": 43.653, "longitude": -79.474},
+                    {"latitude": 39.742, "longitude": -105.179}
+                ]
+            }
+        }
+    }
+
+class NearestLocationsBatchResponse(BaseModel):
+    results: List[NearestLocationsResponse] = Field(..., description="Nearest locations of each point, in request order")
@@ -1,20 +1,26 @@
-from typing import List
+from typing import List, Optional, Union
 
-def generate_key(lat: float, lon: float, height: List[int], yearly: bool) -> str:
+def generate_key(lat: float, lon: float, height: Union[int, List[int]], avg_type: str = "global", source: str = "", grid_index: Optional[str] = None) -> str:
     """
     Generate a unique key for the database based on the parameters.
 
     Args:
         lat (float): Latitude of the location
         lon (float): Longitude of the location
-        height (List[int]): List of heights in integer
-        yearly (bool): Boolean flag to indicate to return yearly averaged data or latest row of data
+        height (int or List[int]): Height, or list of heights, in integer
+        avg_type (str): Average type of the fetched data
+        source (str): Name of the fetcher the data came from
+        grid_index (str, optional): Grid cell of the coordinate; when given it replaces
+            lat/lon so every point in the cell shares the key
 
     Returns:
         str: A unique key for the database.
     """
-    height_str = '_'.join(map(str, height))
-    return f"{lat}_{lon}_{height_str}_{'yearly' if yearly else 'latest'}"
+    heights = height if isinstance(height, (list, tuple)) else [height]
+    height_str = '_'.join(map(str, heights))
+    if grid_index is not None:
+        return f"{source}_g{grid_index}_{height_str}_{avg_type}"
+    return f"{source}_{lat:.6f}_{lon:.6f}_{height_str}_{avg_type}"
 
 def format_coordinate(coordinate: float) -> str:
     """Format a coordinate to 3 decimal places, matching JS .toFixed(3)."""
@@ -26,4 +32,9 @@ def chunker(file_obj, chunk_size: int = 1024 * 1024):
         data = file_obj.read(chunk_size)
         if not data:
             break
-        yield data
\ No newline at end of file
+        yield data
+
+def dataframe_csv_chunks(df, rows_per_chunk: int = 20000):
+    """Serialize a DataFrame to CSV bytes a slice of rows at a time (header once)."""
+    for start in range(0, max(len(df), 1), rows_per_chunk):
+        yield df.iloc[start:start + rows_per_chunk].to_csv(index=False, header=start == 0).encode()
@@ -0,0 +1,136 @@
+import math
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _unit_vector(lat: float, lng: float):
+    lat_r = math.radians(lat)
+    lng_r = math.radians(lng)
+    cos_lat = math.cos(lat_r)
+    return (cos_lat * math.cos(lng_r), cos_lat * math.sin(lng_r), math.sin(lat_r))
+
+
+def unit_vectors(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """(n, 3) points on the unit sphere; chord distance between them orders like haversine distance."""
+    lat_r = np.radians(np.asarray(lats, dtype=np.float64))
+    lng_r = np.radians(np.asarray(lngs, dtype=np.float64))
+    cos_lat = np.cos(lat_r)
+    return np.column_stack((cos_lat * np.cos(lng_r), cos_lat * np.sin(lng_r), np.sin(lat_r)))
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance (km) of a chord length between unit vectors."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+class GridIndex:
+    """
+    In-process spatial index of a dataset grid (WTK or ERA5 cell centers).
+
+    Grid points are stored as unit vectors in a KD-tree, so the Euclidean nearest
+    neighbors are the great-circle (haversine) nearest neighbors with no projection
+    distortion near the poles or the antimeridian. A single lookup takes tens of
+    microseconds; batched lookups a few microseconds per point.
+
+    Grids are saved under ``$GRID_INDEX_DIR/<grid>/`` as ``ids.npy`` (grid index of
+    each point, as used in S3 keys and by the Athena clients), ``lat.npy``, ``lng.npy``
+    and ``xyz.npy`` (the unit vectors). :meth:`load` memory-maps all of them and builds
+    the tree over the mapped vectors without copying, so gunicorn workers share the
+    coordinate pages through the OS page cache and only the tree's node arrays are
+    per process.
+    """
+
+    def __init__(self, ids: np.ndarray, lats: np.ndarray, lngs: np.ndarray, xyz: Optional[np.ndarray] = None):
+        if not len(ids) == len(lats) == len(lngs):
+            raise ValueError("ids, lats and lngs must have the same length.")
+        if len(ids) == 0:
+            raise ValueError("A grid index needs at least one point.")
+        # Keep memory-mapped arrays as they are (np.asarray would return plain views)
+        self.ids = ids if isinstance(ids, np.ndarray) else np.asarray(ids)
+        self.lats = lats if isinstance(lats, np.ndarray) else np.asarray(lats)
+        self.lngs = lngs if isinstance(lngs, np.ndarray) else np.asarray(lngs)
+        self.xyz = unit_vectors(self.lats, self.lngs) if xyz is None else xyz
+        self._tree = cKDTree(self.xyz, leafsize=32, balanced_tree=False, copy_data=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, grid: str, directory: Optional[str] = None) -> Optional["GridIndex"]:
+        """
+        Memory-mapped grid index of ``grid`` from ``directory`` (default $GRID_INDEX_DIR),
+        or None if no directory is configured or the grid's files are missing.
+        """
+        directory = directory or os.environ.get("GRID_INDEX_DIR")
+        if not directory:
+            return None
+        grid_dir = os.path.join(directory, grid)
+        try:
+            ids = np.load(os.path.join(grid_dir, "ids.npy"), mmap_mode="r", allow_pickle=False)
+            lats = np.load(os.path.join(grid_dir, "lat.npy"), mmap_mode="r", allow_pickle=False)
+            lngs = np.load(os.path.join(grid_dir, "lng.npy"), mmap_mode="r", allow_pickle=False)
+        except OSError as e:
+            print(f"Warning: Grid index for {grid} not loaded: {e}")
+            return None
+        try:
+            xyz = np.load(os.path.join(grid_dir, "xyz.npy"), mmap_mode="r", allow_pickle=False)
+        except OSError:
+            xyz = None
+        return cls(ids, lats, lngs, xyz)
+
+    def save(self, directory: str, grid: str):
+        """Writes the grid's arrays in the layout read by :meth:`load`."""
+        grid_dir = os.path.join(directory, grid)
+        os.makedirs(grid_dir, exist_ok=True)
+        np.save(os.path.join(grid_dir, "ids.npy"), self.ids)
+        np.save(os.path.join(grid_dir, "lat.npy"), self.lats)
+        np.save(os.path.join(grid_dir, "lng.npy"), self.lngs)
+        np.save(os.path.join(grid_dir, "xyz.npy"), np.ascontiguousarray(self.xyz, dtype=np.float64))
+
+    def query(self, lats, lngs, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Batched k-nearest-neighbor lookup.
+
+        :param lats: Latitudes of the query points.
+        :param lngs: Longitudes of the query points.
+        :param k: Neighbors per point.
+        :return: (positions, distances_km), each of shape (n_points, k), nearest first.
+        """
+        if not 1 <= k <= len(self):
+            raise ValueError(f"k must be between 1 and {len(self)}.")
+        chords, positions = self._tree.query(unit_vectors(np.atleast_1d(lats), np.atleast_1d(lngs)), k=k)
+        return np.asarray(positions).reshape(-1, k), chord_to_km(chords).reshape(-1, k)
+
+    def _locations(self, positions) -> List[Tuple[str, float, float]]:
+        return [(str(self.ids[p]), float(self.lats[p]), float(self.lngs[p])) for p in positions]
+
+    def nearest(self, lat: float, lng: float, n_neighbors: int = 1) -> List[Tuple[str, float, float]]:
+        """
+        The ``n_neighbors`` grid points nearest to (lat, lng), nearest first, as
+        (index, latitude, longitude) tuples like AthenaDataFetcher.find_nearest_locations.
+        """
+        if n_neighbors == 1:
+            return self._locations([self.nearest_position(lat, lng)])
+        if not 1 <= n_neighbors <= len(self):
+            raise ValueError(f"n_neighbors must be between 1 and {len(self)}.")
+        _, positions = self._tree.query(_unit_vector(lat, lng), k=n_neighbors)
+        return self._locations(positions)
+
+    def nearest_batch(self, lats, lngs, n_neighbors: int = 1) -> List[List[Tuple[str, float, float]]]:
+        """:meth:`nearest` for many points in one vectorized tree query."""
+        positions, _ = self.query(lats, lngs, n_neighbors)
+        return [self._locations(row) for row in positions]
+
+    def nearest_position(self, lat: float, lng: float) -> int:
+        """Row of the grid point nearest to (lat, lng)."""
+        _, position = self._tree.query(_unit_vector(lat, lng))
+        return int(position)
+
+    def snap(self, lat: float, lng: float) -> str:
+        """Grid index of the cell containing (lat, lng), i.e. of its nearest grid point."""
+        return str(self.ids[self.nearest_position(lat, lng)])
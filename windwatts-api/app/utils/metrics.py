@@ -0,0 +1,83 @@
+"""
+Prometheus metrics of the API, exposed at GET /metrics.
+
+Under gunicorn every worker is its own process. When $PROMETHEUS_MULTIPROC_DIR is set
+(gunicorn.conf.py does it) prometheus_client writes each worker's values to files in
+that directory and the scrape aggregates all of them, so whichever worker answers
+/metrics reports totals for the whole server. Without it (uvicorn, Lambda) the
+process-local registry is served.
+
+Request metrics are labelled with the route template (``/era5/windspeed/{avg_type}``),
+never the raw path, and with the data source the request used, as reported through
+:func:`set_request_source`; both have a fixed, small set of values. Cache hit ratios
+are left to the query (hits / lookups), since ratios cannot be summed across workers.
+"""
+import os
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest)
+
+NO_SOURCE = "none"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REQUESTS = Counter(
+    "windwatts_requests_total", "HTTP requests handled",
+    ["method", "route", "source", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "windwatts_request_duration_seconds", "HTTP request duration, until the last response byte",
+    ["method", "route", "source"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "windwatts_requests_in_flight", "HTTP requests being handled",
+    multiprocess_mode="livesum",
+)
+FETCH_LATENCY = Histogram(
+    "windwatts_fetch_duration_seconds", "Duration of fetches sent to a data fetcher",
+    ["fetcher"], buckets=LATENCY_BUCKETS,
+)
+FETCH_ERRORS = Counter(
+    "windwatts_fetch_errors_total", "Fetches that raised",
+    ["fetcher"],
+)
+CACHE_LOOKUPS = Counter(
+    "windwatts_result_cache_lookups_total", "Result cache lookups per tier",
+    ["tier", "result"],
+)
+POWER_CURVE_ROWS = Counter(
+    "windwatts_power_curve_rows_total", "Wind data rows processed by the power curve pipeline",
+    ["stage"],
+)
+
+_request_source: ContextVar[Optional[dict]] = ContextVar("request_source", default=None)
+
+
+def start_request_labels() -> Tuple[dict, object]:
+    """Installs the label holder of a request; returns it and the reset token."""
+    labels = {"source": NO_SOURCE}
+    return labels, _request_source.set(labels)
+
+
+def end_request_labels(token):
+    _request_source.reset(token)
+
+
+def set_request_source(source: str):
+    """Labels the current request's metrics with ``source`` (a validated source name)."""
+    labels = _request_source.get()
+    if labels is not None:
+        labels["source"] = source
+
+
+def exposition() -> Tuple[bytes, str]:
+    """Metrics in the Prometheus text format and its content type, aggregated across workers in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
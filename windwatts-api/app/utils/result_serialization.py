@@ -0,0 +1,124 @@
+import io
+import json
+from typing import Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+JSON_KIND = "json"
+FRAME_KIND = "npz"
+# A dict with non-string keys is stored as {"__items__": [[key, value], ...]}
+ITEMS_KEY = "__items__"
+_JSON_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_keys(value: Any) -> Any:
+    """Copy of ``value`` whose dicts with non-string keys (which JSON would turn into strings) are item lists."""
+    if isinstance(value, dict):
+        if ITEMS_KEY not in value and all(isinstance(k, str) for k in value):
+            return {k: _encode_keys(v) for k, v in value.items()}
+        items = []
+        for k, v in value.items():
+            if isinstance(k, np.generic):
+                k = k.item()
+            if not isinstance(k, _JSON_KEY_TYPES):
+                raise TypeError(f"Cannot store dict key of type {type(k).__name__}")
+            items.append([k, _encode_keys(v)])
+        return {ITEMS_KEY: items}
+    if isinstance(value, (list, tuple)):
+        return [_encode_keys(v) for v in value]
+    return value
+
+
+def _decode_keys(obj: dict) -> dict:
+    if len(obj) == 1 and ITEMS_KEY in obj:
+        return {k: v for k, v in obj[ITEMS_KEY]}
+    return obj
+
+
+def _frame_to_npz(df: pd.DataFrame) -> bytes:
+    arrays = {}
+    columns = []
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+            values = series.to_numpy()
+            text = False
+        else:
+            values = series.astype(str).to_numpy(dtype=str)
+            text = True
+            missing = series.isna().to_numpy()
+            if missing.any():
+                arrays[f"m{i}"] = missing
+        arrays[f"c{i}"] = values
+        columns.append({"name": column, "text": text})
+    index = None
+    if not isinstance(df.index, pd.RangeIndex):
+        index_values = df.index.to_numpy()
+        arrays["index"] = index_values if index_values.dtype != object else index_values.astype(str)
+    else:
+        index = [df.index.start, df.index.stop, df.index.step]
+    meta = {"columns": columns, "range_index": index}
+    arrays["meta"] = np.frombuffer(json.dumps(meta, default=_json_default).encode(), dtype=np.uint8)
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+def _npz_to_frame(data: bytes) -> pd.DataFrame:
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        meta = json.loads(npz["meta"].tobytes())
+        columns = {}
+        for i, column in enumerate(meta["columns"]):
+            values = npz[f"c{i}"]
+            if column["text"]:
+                values = values.astype(object)
+                if f"m{i}" in npz.files:
+                    values[npz[f"m{i}"]] = None
+            columns[column["name"]] = values
+        if meta["range_index"] is not None:
+            index = pd.RangeIndex(*meta["range_index"])
+        else:
+            index = pd.Index(npz["index"])
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def serialize_result(value: Any) -> Tuple[str, bytes]:
+    """
+    Encodes a fetch result for the persistent cache tier.
+
+    DataFrames are stored as an ``.npz`` archive (one array per column, text columns
+    as fixed-width unicode, no pickling) so dtypes survive the round trip; every other
+    result (dicts of averages, lists) is stored as JSON, with NumPy scalars converted
+    to Python numbers and dicts keyed by numbers (e.g. by year) stored as key/value
+    pairs so the keys keep their type.
+
+    :return: (kind, payload) where kind is ``"npz"`` or ``"json"``.
+    """
+    if isinstance(value, pd.DataFrame):
+        return FRAME_KIND, _frame_to_npz(value)
+    return JSON_KIND, json.dumps(_encode_keys(value), default=_json_default).encode()
+
+
+def deserialize_result(kind: str, payload: bytes) -> Any:
+    """Decodes a payload written by :func:`serialize_result`."""
+    if kind == FRAME_KIND:
+        return _npz_to_frame(payload)
+    if kind == JSON_KIND:
+        return json.loads(payload, object_hook=_decode_keys)
+    raise ValueError(f"Unknown result kind: {kind}")
+
+
+def result_nbytes(value: Any) -> int:
+    """Approximate in-memory size of a fetch result, used to bound the in-process cache."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return len(json.dumps(value, default=_json_default))
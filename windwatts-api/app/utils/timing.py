@@ -0,0 +1,172 @@
+"""
+Per-request stage timing.
+
+A request's :class:`RequestTimings` lives in a context variable set by
+ServerTimingMiddleware; code on the request path reports into it with::
+
+    with timed("athena"):
+        ...
+
+or the ``@timed_stage("swi")`` decorator. Starlette runs sync endpoints in a thread
+pool with a copy of the context, so stages recorded there land in the same request.
+Outside a request (scripts, background threads) no context is set and ``timed`` only
+costs a context variable lookup.
+
+Every recorded stage also goes into the process-wide :data:`stage_histograms`.
+Stages may nest (``fetch.athena_era5`` contains ``athena``); each is reported with its
+own wall time.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets in milliseconds; the last bucket is unbounded
+BUCKET_BOUNDS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class RequestTimings:
+    """Wall time per stage of one request, summed over repeated stages."""
+
+    def __init__(self):
+        self._stages: Dict[str, List[float]] = {}  # stage -> [seconds, count]
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                self._stages[stage] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def seconds(self, stage: str) -> float:
+        with self._lock:
+            entry = self._stages.get(stage)
+            return entry[0] if entry else 0.0
+
+    def stages_ms(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(seconds * 1000, 3) for stage, (seconds, _) in self._stages.items()}
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, e.g. ``athena;dur=812.4, swi;dur=95.1``."""
+        with self._lock:
+            parts = []
+            for stage, (seconds, count) in self._stages.items():
+                part = f"{stage};dur={seconds * 1000:.1f}"
+                if count > 1:
+                    part += f';desc="x{count}"'
+                parts.append(part)
+            return ", ".join(parts)
+
+
+class StageHistograms:
+    """Process-wide latency histograms per stage, with fixed millisecond buckets."""
+
+    def __init__(self, bounds_ms: Tuple[float, ...] = BUCKET_BOUNDS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self._stages: Dict[str, list] = {}  # stage -> [bucket counts, count, total seconds]
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        bucket = bisect_left(self.bounds_ms, seconds * 1000)
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [[0] * (len(self.bounds_ms) + 1), 0, 0.0]
+            entry[0][bucket] += 1
+            entry[1] += 1
+            entry[2] += seconds
+
+    def _quantile_ms(self, buckets: List[int], count: int, q: float) -> float:
+        """Upper bound of the bucket holding quantile ``q`` (the largest bound for the overflow bucket)."""
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds_ms[min(i, len(self.bounds_ms) - 1)]
+        return self.bounds_ms[-1]
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            stages = {stage: (list(buckets), count, total) for stage, (buckets, count, total) in self._stages.items()}
+        result = {}
+        for stage, (buckets, count, total) in sorted(stages.items()):
+            result[stage] = {
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3) if count else 0.0,
+                "p50_ms": self._quantile_ms(buckets, count, 0.50),
+                "p95_ms": self._quantile_ms(buckets, count, 0.95),
+                "p99_ms": self._quantile_ms(buckets, count, 0.99),
+                "buckets": [{"le_ms": bound, "count": n} for bound, n in zip(self.bounds_ms, buckets)]
+                + [{"le_ms": None, "count": buckets[-1]}],
+            }
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+
+stage_histograms = StageHistograms()
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def start_request_timings() -> Tuple[RequestTimings, object]:
+    """Installs a fresh RequestTimings for the current context; returns it and the reset token."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request_timings(token):
+    _current.reset(token)
+
+
+def record_stage(stage: str, seconds: float):
+    """Reports an externally measured stage to the current request and the histograms."""
+    timings = _current.get()
+    if timings is None:
+        return
+    timings.record(stage, seconds)
+    stage_histograms.observe(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    """Times the block as ``stage`` of the current request; a no-op outside a request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        timings.record(stage, seconds)
+        stage_histograms.observe(stage, seconds)
+
+
+def timed_stage(stage: str):
+    """Decorator form of :func:`timed`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
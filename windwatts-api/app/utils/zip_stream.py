@@ -0,0 +1,163 @@
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+
+ENTRY_QUEUE_CHUNKS = 16
+
+
+class ZipEntry(NamedTuple):
+    name: str
+    chunks: Iterable[bytes]
+    compress: bool = True
+
+
+class ZipSource(NamedTuple):
+    name: str
+    produce: Callable[[], Iterable[bytes]]
+    compress: bool = True
+
+
+class _Sink:
+    """Write-only, unseekable file object; zipfile then writes data descriptors instead of seeking back."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        if data:
+            self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def stream_zip(entries: Iterable[ZipEntry], compression_level: int = 6) -> Iterator[bytes]:
+    """
+    Writes a ZIP archive entry by entry and yields its bytes as they are produced.
+
+    Nothing is buffered beyond the chunk being written: each local header goes out
+    with the entry's first chunk and the central directory at the end. Entries with
+    ``compress=False`` (e.g. already gzip-compressed passthrough data) are stored, and
+    ``compression_level=0`` stores every entry.
+
+    :param entries: Entries in output order; their chunks are consumed lazily.
+    :param compression_level: Deflate level 0-9.
+    :return: Iterator of ZIP bytes.
+    """
+    if not 0 <= compression_level <= 9:
+        raise ValueError("compression_level must be between 0 and 9.")
+    sink = _Sink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=compression_level or None) as zf:
+        for entry in entries:
+            if entry.compress and compression_level:
+                # Opened by name, the entry takes the archive's compression and compresslevel
+                target = entry.name
+            else:
+                target = zipfile.ZipInfo(entry.name)
+                target.compress_type = zipfile.ZIP_STORED
+            with zf.open(target, mode="w") as f:
+                for chunk in entry.chunks:
+                    f.write(chunk)
+                    out = sink.drain()
+                    if out:
+                        yield out
+            # The central directory (written on close) carries the permissions
+            zf.infolist()[-1].external_attr = 0o644 << 16
+            out = sink.drain()
+            if out:
+                yield out
+    out = sink.drain()
+    if out:
+        yield out
+
+
+_DONE = object()
+
+
+class _Failure(NamedTuple):
+    error: BaseException
+
+
+def entries_as_ready(sources: List[ZipSource], max_workers: int = 4, queue_chunks: int = ENTRY_QUEUE_CHUNKS) -> Iterator[ZipEntry]:
+    """
+    Runs every source's producer concurrently and yields entries in the order they become ready.
+
+    Each producer writes into its own queue of at most ``queue_chunks`` chunks, so memory
+    stays bounded while the consumer streams one entry at a time. Sources that fail are
+    left out, and an ``errors.txt`` entry listing them is appended at the end (so if it is
+    the first entry yielded, no source succeeded). Abandoning the iterator stops the
+    producers.
+    """
+    cancelled = threading.Event()
+    queues = [queue.Queue(maxsize=queue_chunks) for _ in sources]
+    ready = queue.Queue()
+    errors: List[str] = []
+
+    def put(i, item):
+        while not cancelled.is_set():
+            try:
+                queues[i].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(i):
+        announced = False
+        try:
+            for chunk in sources[i].produce():
+                if not chunk:
+                    continue
+                if not put(i, chunk):
+                    return
+                if not announced:
+                    ready.put(i)
+                    announced = True
+            put(i, _DONE)
+        except BaseException as e:
+            put(i, _Failure(e))
+        finally:
+            if not announced:
+                ready.put(i)
+
+    def drain(i):
+        while True:
+            item = queues[i].get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                errors.append(f"{sources[i].name}: incomplete, {item.error}")
+                return
+            yield item
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources))), thread_name_prefix="zip-entry")
+    try:
+        for i in range(len(sources)):
+            executor.submit(run, i)
+        for _ in range(len(sources)):
+            i = ready.get()
+            head = queues[i].get()
+            if head is _DONE:
+                continue
+            if isinstance(head, _Failure):
+                errors.append(f"{sources[i].name}: {head.error}")
+                continue
+
+            def chunks(i=i, head=head):
+                yield head
+                yield from drain(i)
+
+            yield ZipEntry(sources[i].name, chunks(), sources[i].compress)
+        if errors:
+            yield ZipEntry("errors.txt", ["\n".join(errors).encode() + b"\n"], True)
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,18 @@
+import os
+import shutil
+
+# prometheus_client multiprocess mode: every worker writes its metrics to files in this
+# directory and GET /metrics aggregates them. Set before the workers import the app.
+prometheus_multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/windwatts-prometheus")
+
+
+def on_starting(server):
+    # Start from an empty directory so totals from a previous run are not carried over
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (in-flight requests) of workers that exited; their counters stay
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
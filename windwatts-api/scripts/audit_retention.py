@@ -0,0 +1,48 @@
+"""
+Maintain the monthly audit_logs partitions: create the upcoming ones and drop expired ones.
+
+Run daily against the database in DATABASE_URL: docker-compose runs it in the
+audit-retention service, and deployments schedule the same command (cron, a
+scheduled ECS task). Partitions whose whole month is older than the retention period
+are detached and dropped; only expired rows of the default partition are DELETEd.
+Overlapping runs wait on an advisory lock instead of racing each other.
+
+Usage:
+    PYTHONPATH=. python scripts/audit_retention.py [--retention-days 90] [--months-ahead 3] [--dry-run]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.database.audit_retention import drop_expired_partitions, ensure_partitions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-days", type=int, default=int(os.environ.get("AUDIT_LOG_RETENTION_DAYS", 90)))
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would be dropped")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('audit_logs_maintenance'))"))
+        if not args.dry_run:
+            for name in ensure_partitions(conn, months_ahead=args.months_ahead):
+                print(f"Created partition {name}")
+        dropped = drop_expired_partitions(conn, args.retention_days, dry_run=args.dry_run)
+    for name in dropped:
+        print(f"{'Would drop' if args.dry_run else 'Dropped'} partition {name}")
+    if not dropped:
+        print(f"No partitions older than {args.retention_days} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark audit-log insert throughput: the original audit_logs schema vs the partitioned one.
+
+Creates two scratch tables in the target database, then inserts ``--rows`` audit
+records into each in multi-row batches of ``--batch-size`` (what AuditLogWriter does)
+and reports rows per second:
+
+- before: the initial migration's table with its 17 single-column B-tree indexes
+- after: the current schema with a BRIN index on timestamp and a B-tree on
+  request_id; on Postgres it is also range-partitioned by month
+
+Timestamps are spread over the last few months, so on Postgres the rows land in
+several partitions. The scratch tables are dropped at the end.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_audit_inserts.py [--database-url postgresql://...] [--rows 200000] [--batch-size 500]
+
+With DATABASE_URL=sqlite:// and no --database-url a temporary SQLite file is used,
+which measures the index set only.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import (JSON, BigInteger, Boolean, Column, DateTime, Index, Integer, MetaData, String, Table,
+                        Text, create_engine, insert, text)
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from app.database.audit_retention import add_months, month_start  # noqa: E402
+
+OLD_TABLE = "bench_audit_logs_before"
+NEW_TABLE = "bench_audit_logs_after"
+MONTHS = 3
+RESOURCES = ["/wtk/windspeed", "/wtk/energy-production", "/era5/windspeed", "/era5/nearest-locations", "/healthcheck"]
+
+
+def old_table(metadata: MetaData) -> Table:
+    indexed = ["id", "timestamp", "user_id", "action", "resource", "method", "status_code", "ip_address",
+               "duration_ms", "api_version", "endpoint_category", "is_error", "error_type", "client_type",
+               "country", "request_id", "parent_request_id"]
+    table = Table(
+        OLD_TABLE, metadata,
+        Column("id", Integer, primary_key=True),
+        Column("timestamp", DateTime(timezone=True)),
+        Column("user_id", String), Column("action", String), Column("resource", String), Column("method", String),
+        Column("status_code", Integer), Column("ip_address", String), Column("user_agent", Text),
+        Column("request_data", JSON), Column("response_data", JSON), Column("duration_ms", Integer),
+        Column("error_message", Text), Column("log_metadata", JSON), Column("api_version", String),
+        Column("endpoint_category", String), Column("request_size_bytes", Integer),
+        Column("response_size_bytes", Integer), Column("is_error", Boolean), Column("error_type", String),
+        Column("client_type", String), Column("country", String), Column("referrer", String),
+        Column("request_id", String), Column("parent_request_id", String), Column("tags", JSON),
+    )
+    for column in indexed:
+        Index(f"ix_{OLD_TABLE}_{column}", table.c[column])
+    return table
+
+
+def new_table(metadata: MetaData, postgres: bool) -> Table:
+    columns = [
+        Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True),
+        Column("timestamp", DateTime(timezone=True), nullable=False, primary_key=postgres),
+        Column("request_id", String), Column("user_id", String), Column("action", String),
+        Column("resource", String), Column("method", String), Column("status_code", Integer),
+        Column("ip_address", String), Column("user_agent", Text), Column("duration_ms", Integer),
+        Column("request_size_bytes", Integer), Column("response_size_bytes", Integer), Column("log_metadata", JSON),
+    ]
+    table = Table(NEW_TABLE, metadata, *columns, postgresql_partition_by="RANGE (timestamp)" if postgres else None)
+    Index(f"ix_{NEW_TABLE}_timestamp_brin", table.c.timestamp, postgresql_using="brin")
+    Index(f"ix_{NEW_TABLE}_request_id", table.c.request_id)
+    return table
+
+
+def create_partitions(conn, now: datetime):
+    start = add_months(month_start(now), -MONTHS)
+    for offset in range(MONTHS + 2):
+        lower, upper = add_months(start, offset), add_months(start, offset + 1)
+        conn.execute(text(
+            f"CREATE TABLE {NEW_TABLE}_{offset} PARTITION OF {NEW_TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+
+
+def records(n: int, now: datetime):
+    rng = random.Random(0)
+    span = timedelta(days=30 * MONTHS).total_seconds()
+    rows = []
+    for i in range(n):
+        rows.append({
+            # The partitioned table's id has no default here, so both tables get explicit ids
+            "id": i + 1,
+            # Arrival order is roughly chronological, as in production
+            "timestamp": now - timedelta(seconds=span * (1 - i / n) + rng.random() * 5),
+            "request_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": None,
+            "action": "api_request",
+            "resource": rng.choice(RESOURCES),
+            "method": "GET",
+            "status_code": 200,
+            "ip_address": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+            "user_agent": "Mozilla/5.0",
+            "duration_ms": rng.randrange(5, 2000),
+            "request_size_bytes": 0,
+            "response_size_bytes": rng.randrange(100, 5000),
+            "log_metadata": {"query_params": {"lat": "40.0", "lng": "-105.0"}, "path_params": {}},
+        })
+    return rows
+
+
+def run(engine, table: Table, rows, batch_size: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        with engine.begin() as conn:
+            conn.execute(insert(table), rows[offset:offset + batch_size])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if not url or url == "sqlite://":
+        url = f"sqlite:///{Path(tempfile.mkdtemp()) / 'audit_bench.db'}"
+    engine = create_engine(url)
+    postgres = engine.dialect.name == "postgresql"
+    now = datetime.now(timezone.utc)
+
+    metadata = MetaData()
+    before, after = old_table(metadata), new_table(metadata, postgres)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    try:
+        if postgres:
+            with engine.begin() as conn:
+                create_partitions(conn, now)
+        print(f"{engine.dialect.name}: {args.rows} rows in batches of {args.batch_size}")
+        for label, table in (("before: 17 B-tree indexes", before), ("after: BRIN + request_id", after)):
+            rows = records(args.rows, now)
+            seconds = run(engine, table, rows, args.batch_size)
+            print(f"{label:<28} {seconds:>7.2f} s  {args.rows / seconds:>10.0f} rows/s")
+    finally:
+        metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark gzip CSV parsing against the columnar tier for one-height and all-heights reads.
+
+Builds a synthetic WTK ``varset=all``-like object (hourly rows, several variables per
+height), then times pandas.read_csv (with and without usecols) against ColumnarStore
+reads of the already-transcoded object.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_columnar.py [--rows 8760] [--repeat 5]
+"""
+import argparse
+import gzip
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from app.data_fetchers.columnar_store import ColumnarStore  # noqa: E402
+
+HEIGHTS = (10, 30, 40, 50, 60, 80, 100, 120, 140, 160, 200)
+VARIABLES = ("windspeed", "winddirection", "temperature", "pressure")
+
+
+def wtk_all_varset(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = {"datetime": pd.date_range("2020-01-01", periods=rows, freq="h").astype(str), "mohr": np.arange(rows) % 2400}
+    for var in VARIABLES:
+        for h in HEIGHTS:
+            data[f"{var}_{h}m"] = np.round(rng.normal(10, 3, rows), 3)
+    return pd.DataFrame(data)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=8760)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = wtk_all_varset(args.rows)
+    payload = gzip.compress(df.to_csv(index=False).encode())
+    one_height = ["mohr", "windspeed_100m"]
+
+    store = ColumnarStore(tempfile.mkdtemp(prefix="columnar-bench-"))
+    store.write("bench", "object", pd.read_csv(BytesIO(payload), compression="gzip"))
+
+    def touch(frame):
+        # Force the mapped pages to be read
+        return [frame[c].to_numpy().sum() for c in frame.columns if pd.api.types.is_numeric_dtype(frame[c].dtype)]
+
+    rows = [
+        ("read_csv, all columns", best_of(lambda: pd.read_csv(BytesIO(payload), compression="gzip"), args.repeat)),
+        ("read_csv, usecols one height", best_of(lambda: pd.read_csv(BytesIO(payload), compression="gzip", usecols=one_height), args.repeat)),
+        ("columnar, all columns", best_of(lambda: touch(store.read("bench", "object")), args.repeat)),
+        ("columnar, one height", best_of(lambda: touch(store.read("bench", "object", one_height)), args.repeat)),
+    ]
+    print(f"{len(df.columns)} columns x {args.rows} rows, gzip CSV {len(payload) / 1e6:.1f} MB")
+    for label, seconds in rows:
+        print(f"{label:<32} {seconds * 1e3:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark the logging/audit middleware stack on a large streamed download.
+
+Serves ``--mb`` MB from a StreamingResponse through the app's LoggingMiddleware and
+AuditMiddleware (pure ASGI), and through the previous BaseHTTPMiddleware versions
+(reproduced below) that drained ``body_iterator`` with ``+=`` and rebuilt the
+response. The ASGI app is driven directly with a ``send`` that discards bodies, so
+the measured time to first byte, total time and tracemalloc peak belong to the
+middleware and the app alone.
+
+Usage:
+    PYTHONPATH=. DATABASE_URL=sqlite:// python scripts/benchmark_middleware.py [--mb 50] [--chunk-kb 64]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from fastapi import FastAPI, Response  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.middleware import AuditMiddleware, LoggingMiddleware  # noqa: E402
+
+
+class BufferingMiddleware(BaseHTTPMiddleware):
+    """The previous LoggingMiddleware/AuditMiddleware response handling."""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response_body = b""
+        async for chunk in response.body_iterator:
+            response_body += chunk
+        return Response(content=response_body, status_code=response.status_code,
+                        headers=dict(response.headers), media_type=response.media_type)
+
+
+def build_app(middlewares, total_bytes: int, chunk_size: int) -> FastAPI:
+    app = FastAPI()
+    chunk = b"x" * chunk_size
+
+    @app.get("/download")
+    def download():
+        return StreamingResponse((chunk for _ in range(total_bytes // chunk_size)), media_type="text/csv")
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+async def drive(app):
+    scope = {"type": "http", "method": "GET", "path": "/download", "raw_path": b"/download", "root_path": "",
+             "query_string": b"", "headers": [], "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+             "scheme": "http", "http_version": "1.1"}
+    sent = {"first": None, "bytes": 0}
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            if sent["first"] is None:
+                sent["first"] = time.perf_counter()
+            sent["bytes"] += len(message["body"])
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return sent["first"] - start, time.perf_counter() - start, sent["bytes"]
+
+
+def measure(app):
+    tracemalloc.start()
+    try:
+        ttfb, total, size = asyncio.run(drive(app))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return ttfb, total, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=50)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    args = parser.parse_args()
+    total_bytes = args.mb * 1024 * 1024
+    chunk_size = args.chunk_kb * 1024
+
+    # Silence the per-request audit prints
+    AuditMiddleware._log_request = lambda self, **kwargs: None
+
+    cases = [
+        ("before: BaseHTTPMiddleware x2", [BufferingMiddleware, BufferingMiddleware]),
+        ("after: pure ASGI x2", [LoggingMiddleware, AuditMiddleware]),
+    ]
+    print(f"{args.mb} MB streamed in {args.chunk_kb} KB chunks")
+    for label, middlewares in cases:
+        ttfb, total, size, peak = measure(build_app(middlewares, total_bytes, chunk_size))
+        assert size == total_bytes // chunk_size * chunk_size
+        print(f"{label:<32} ttfb {ttfb * 1e3:>8.1f} ms  total {total * 1e3:>8.1f} ms  peak {peak / 1e6:>8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
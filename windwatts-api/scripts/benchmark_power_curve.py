@@ -0,0 +1,63 @@
+"""
+Benchmark the per-row cost of PowerCurve wind speed -> kW conversion.
+
+Compares the original pandas path (two chained Series.apply lambdas followed by
+scipy interp1d) against the compiled NumPy evaluator on a 20-year hourly frame.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_power_curve.py [--rows 175200] [--heights 4]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from app.power_curve.powercurve import PowerCurve  # noqa: E402
+
+
+def legacy_windspeed_to_kw(curve: PowerCurve, df: pd.DataFrame, ws_column: str):
+    ws = df[ws_column].apply(lambda x: 0 if x < 0 else x).apply(lambda x: curve.max_ws if x > curve.max_ws else x)
+    return curve.powercurve_intrp(ws)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20 * 8760)
+    parser.add_argument("--heights", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--curve", default="nrel-reference-100kW")
+    args = parser.parse_args()
+
+    curve = PowerCurve(str(repo_root / "app" / "power_curve" / "powercurves" / f"{args.curve}.csv"))
+    rng = np.random.default_rng(42)
+    block = rng.weibull(2.0, size=(args.heights, args.rows)) * 7.0
+    df = pd.DataFrame({f"windspeed_{h}m": block[h] for h in range(args.heights)})
+
+    legacy = best_of(lambda: [legacy_windspeed_to_kw(curve, df, c) for c in df.columns], args.repeat)
+    per_column = best_of(lambda: [curve.windspeed_to_kw(df, c) for c in df.columns], args.repeat)
+    batched = best_of(lambda: curve.windspeed_to_kw_array(block), args.repeat)
+
+    n = args.rows * args.heights
+    print(f"rows={args.rows} heights={args.heights} samples={n}")
+    for label, seconds in (("legacy apply+interp1d", legacy), ("windspeed_to_kw", per_column), ("windspeed_to_kw_array 2-D", batched)):
+        print(f"{label:<28} {seconds * 1e3:9.2f} ms  {seconds / n * 1e9:8.2f} ns/row  x{legacy / seconds:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
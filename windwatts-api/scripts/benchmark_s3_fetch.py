@@ -0,0 +1,83 @@
+"""
+Benchmark S3DataFetcher wall time against the number of keys per request.
+
+Uses a local S3 stand-in (in-process client with a fixed per-GET latency serving
+small gzip CSVs) and compares the previous behaviour (one worker per request, keys
+fetched one after another) with the shared, adaptive fetch pool.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_s3_fetch.py [--keys 1 4 8 16 32] [--latency-ms 40]
+"""
+import argparse
+import gzip
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from app.data_fetchers.s3_data_fetcher import S3DataFetcher  # noqa: E402
+from app.data_fetchers.s3_fetch_pool import S3FetchPool  # noqa: E402
+
+
+class LocalS3StandIn:
+    def __init__(self, latency: float, jitter: float, rows: int = 8760):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = np.random.default_rng(0)
+        self._lock = threading.Lock()
+        csv = pd.DataFrame({"mohr": np.arange(rows), "windspeed_100m": self._rng.weibull(2.0, rows) * 7}).to_csv(index=False)
+        self._body = gzip.compress(csv.encode())
+
+    def get_object(self, Bucket, Key):
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+        time.sleep(delay)
+        return {"Body": io.BytesIO(self._body)}
+
+
+def sequential_fetch(fetcher: S3DataFetcher, indices, years) -> pd.DataFrame:
+    frames = [fetcher.fetch_s3_file(k, None) for k in fetcher.generate_s3_keys(indices, years)]
+    return pd.concat([f for f in frames if f is not None], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--per-request", type=int, default=16)
+    args = parser.parse_args()
+
+    client = LocalS3StandIn(args.latency_ms / 1e3, args.jitter_ms / 1e3)
+    pool = S3FetchPool(max_concurrency=args.max_concurrency, per_request=args.per_request)
+    fetcher = S3DataFetcher(bucket_name="bench", prefix="p", s3_key_template="era5", grid="era5",
+                            s3_client=client, fetch_pool=pool)
+
+    print(f"{'keys':>5} {'sequential (ms)':>16} {'shared pool (ms)':>17} {'speedup':>8} {'limit':>6}")
+    for n_keys in args.keys:
+        indices = [str(i) for i in range(4)] if n_keys >= 4 else ["0"]
+        years = list(range(2000, 2000 + max(1, n_keys // len(indices))))
+
+        start = time.perf_counter()
+        sequential_fetch(fetcher, indices, years)
+        seq = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fetcher.fetch_data(indices, years)
+        pooled = time.perf_counter() - start
+
+        print(f"{len(indices) * len(years):>5} {seq * 1e3:>16.1f} {pooled * 1e3:>17.1f} {seq / pooled:>7.1f}x {pool.limiter.limit:>6}")
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
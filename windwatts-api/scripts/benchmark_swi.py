@@ -0,0 +1,72 @@
+"""
+Benchmark per-year latency of the ERA5 (quantiles with year) production path.
+
+Compares the per-year groupby loop (one CubicSpline + inversion per year) with the
+batched (years x quantiles) SWI path as the number of years grows.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_swi.py [--years 5 10 20 40]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from app.power_curve.power_curve_manager import PowerCurveManager  # noqa: E402
+
+
+def era5_like_df(n_years: int, n_probs: int = 101, height: int = 100) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    probs = np.linspace(0, 1, n_probs)
+    frames = []
+    for year in range(2000, 2000 + n_years):
+        quants = np.quantile(rng.weibull(2.0, size=8760) * rng.uniform(5, 9), probs)
+        frames.append(pd.DataFrame({"year": year, "probability": probs, f"windspeed_{height}m": quants}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def per_year_loop(manager: PowerCurveManager, df: pd.DataFrame, ws_col: str, curve_name: str) -> pd.DataFrame:
+    curve = manager.get_curve(curve_name)
+    records = []
+    for year, group in df.groupby("year"):
+        group = group.sort_values("probability").reset_index(drop=True)
+        mid_df = manager._quantiles_to_kw_midpoints(group, ws_col, curve, use_swi=True)
+        mid_df.insert(0, "year", year)
+        records.append(mid_df)
+    return pd.concat(records, ignore_index=True)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--curve", default="nrel-reference-100kW")
+    args = parser.parse_args()
+
+    manager = PowerCurveManager(str(repo_root / "app" / "power_curve" / "powercurves"))
+    print(f"{'years':>6} {'loop ms/yr':>12} {'batched ms/yr':>14} {'speedup':>8}")
+    for n_years in args.years:
+        df = era5_like_df(n_years)
+        loop = best_of(lambda: per_year_loop(manager, df, "windspeed_100m", args.curve), args.repeat)
+        batched = best_of(lambda: manager.fetch_energy_production_df(df, 100, args.curve), args.repeat)
+        print(f"{n_years:>6} {loop / n_years * 1e3:>12.3f} {batched / n_years * 1e3:>14.3f} {loop / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Build the in-process grid index files for a dataset grid and validate them.
+
+Reads the grid's cell centers from a CSV with ``index``, ``latitude`` and ``longitude``
+columns (e.g. an export of the grid lookup table used by windwatts_data) and writes
+``<out>/<grid>/{ids,lat,lng,xyz}.npy``; point the API at ``<out>`` with GRID_INDEX_DIR.
+
+The index is then checked on random points inside the grid's bounding box:
+against a brute-force haversine search always, and against the Athena client's
+``find_n_nearest_locations`` with ``--client`` (needs the windwatts_data config).
+Points equidistant from several grid points may legitimately resolve either way;
+those ties are reported separately.
+
+Usage:
+    PYTHONPATH=. python scripts/build_grid_index.py --csv wtk_grid.csv --grid wtk --out grid_index [--samples 500] [--client]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from app.utils.grid_index import GridIndex, EARTH_RADIUS_KM  # noqa: E402
+
+TIE_TOLERANCE_KM = 1e-6
+
+
+def haversine_km(lat, lng, lats, lngs):
+    lat, lng, lats, lngs = map(np.radians, (lat, lng, lats, lngs))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def compare(label, grid, points, k, reference):
+    """Counts points whose k nearest ids differ from ``reference(lat, lng, k)``, excluding exact ties."""
+    mismatches = ties = 0
+    for lat, lng in points:
+        ours = [i for i, _, _ in grid.nearest(lat, lng, k)]
+        theirs = [str(i) for i, _, _ in reference(lat, lng, k)]
+        if set(ours) == set(theirs):
+            continue
+        d = haversine_km(lat, lng, grid.lats, grid.lngs)
+        kth = np.partition(d, k)[:k + 1]
+        if np.isclose(kth[k - 1], kth[k], atol=TIE_TOLERANCE_KM, rtol=0):
+            ties += 1
+        else:
+            mismatches += 1
+    print(f"{label}: {len(points)} points, k={k}: {mismatches} mismatches, {ties} ties")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", required=True)
+    parser.add_argument("--grid", required=True, help="Grid name, e.g. wtk or era5")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--client", action="store_true", help="Also compare with the Athena client")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, dtype={"index": str})
+    GridIndex(df["index"].to_numpy(dtype=str), df["latitude"].to_numpy(np.float64), df["longitude"].to_numpy(np.float64)).save(args.out, args.grid)
+
+    start = time.perf_counter()
+    grid = GridIndex.load(args.grid, args.out)
+    print(f"{args.grid}: {len(grid)} points, loaded in {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    rng = np.random.default_rng(0)
+    points = np.column_stack((
+        rng.uniform(grid.lats.min(), grid.lats.max(), args.samples),
+        rng.uniform(grid.lngs.min(), grid.lngs.max(), args.samples),
+    ))
+
+    start = time.perf_counter()
+    for lat, lng in points:
+        grid.nearest(lat, lng, args.k)
+    single = (time.perf_counter() - start) / len(points)
+    start = time.perf_counter()
+    grid.nearest_batch(points[:, 0], points[:, 1], args.k)
+    batch = (time.perf_counter() - start) / len(points)
+    print(f"lookup: {single * 1e6:.1f} us single, {batch * 1e6:.1f} us per point batched")
+
+    def brute_force(lat, lng, k):
+        order = np.argsort(haversine_km(lat, lng, grid.lats, grid.lngs))[:k]
+        return [(grid.ids[p], None, None) for p in order]
+
+    failed = compare("haversine", grid, points, args.k, brute_force)
+    if args.client:
+        from app.config_manager import ConfigManager
+        from app.data_fetchers.athena_data_fetcher import AthenaDataFetcher
+
+        config = ConfigManager(
+            secret_arn_env_var="WINDWATTS_DATA_CONFIG_SECRET_ARN",
+            local_config_path="./app/config/windwatts_data_config.json").get_config()
+        fetcher = AthenaDataFetcher(athena_config=config, source_key=args.grid)
+        failed += compare("client", grid, points, args.k, lambda lat, lng, k: fetcher.find_nearest_locations(lat, lng, k))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
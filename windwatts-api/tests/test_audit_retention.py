@@ -0,0 +1,82 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.database.audit_retention import (drop_expired_partitions, ensure_partitions, expired_partitions, partition_bounds,
+                                          partitions_to_create)
+
+UTC = timezone.utc
+
+
+def test_partitions_to_create_cover_whole_months_across_year_end():
+    partitions = partitions_to_create(datetime(2025, 11, 17, 8, 30, tzinfo=UTC), months_ahead=2, months_behind=1)
+    assert [name for name, _, _ in partitions] == [
+        "audit_logs_y2025m10", "audit_logs_y2025m11", "audit_logs_y2025m12", "audit_logs_y2026m01"]
+    # Contiguous [start, end) ranges
+    for (_, _, end), (_, start, _) in zip(partitions, partitions[1:]):
+        assert end == start
+    assert partition_bounds("audit_logs_y2025m12") == (datetime(2025, 12, 1, tzinfo=UTC), datetime(2026, 1, 1, tzinfo=UTC))
+    assert partition_bounds("audit_logs_default") is None
+
+
+def test_expired_partitions_only_drop_months_entirely_past_retention():
+    names = ["audit_logs_default", "audit_logs_y2025m08", "audit_logs_y2025m06", "audit_logs_y2025m07",
+             "audit_logs_y2025m09", "audit_logs_y2025m10"]
+    now = datetime(2025, 10, 15, tzinfo=UTC)
+    # 90 days back is 2025-07-17: July still has rows inside the retention period
+    assert expired_partitions(names, now - timedelta(days=90)) == ["audit_logs_y2025m06"]
+    assert expired_partitions(names, datetime(2025, 8, 1, tzinfo=UTC)) == ["audit_logs_y2025m06", "audit_logs_y2025m07"]
+
+
+class ScalarResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class RecordingConnection:
+    """Stands in for a Postgres connection: knows the partitions and which months have rows in the default one."""
+
+    def __init__(self, partitions, default_months=()):
+        self.partitions = partitions
+        self.default_months = set(default_months)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_inherits" in sql:
+            return [(name,) for name in self.partitions]
+        if sql.startswith("SELECT EXISTS"):
+            return ScalarResult(params["start"] in self.default_months)
+        return None
+
+
+def test_ensure_partitions_moves_default_rows_into_new_partition():
+    now = datetime(2025, 11, 17, tzinfo=UTC)
+    conn = RecordingConnection(["audit_logs_default", "audit_logs_y2025m12"], default_months=[datetime(2025, 11, 1, tzinfo=UTC)])
+    assert ensure_partitions(conn, months_ahead=1, now=now) == ["audit_logs_y2025m11"]
+    ddl = [sql for sql in conn.statements if not sql.startswith("SELECT")]
+    assert ddl[0] == "ALTER TABLE audit_logs DETACH PARTITION audit_logs_default"
+    assert ddl[1].startswith("CREATE TABLE audit_logs_y2025m11 PARTITION OF audit_logs FOR VALUES FROM ('2025-11-01")
+    assert ddl[2].startswith("INSERT INTO audit_logs SELECT * FROM audit_logs_default")
+    assert ddl[3].startswith("DELETE FROM audit_logs_default")
+    assert ddl[4] == "ALTER TABLE audit_logs ATTACH PARTITION audit_logs_default DEFAULT"
+
+    # An empty default range needs no detour
+    conn = RecordingConnection(["audit_logs_default"])
+    assert ensure_partitions(conn, months_ahead=0, now=now) == ["audit_logs_y2025m11"]
+    assert not any("DETACH" in sql for sql in conn.statements)
+
+
+def test_retention_also_deletes_expired_default_rows():
+    conn = RecordingConnection(["audit_logs_default", "audit_logs_y2025m06", "audit_logs_y2025m10"])
+    assert drop_expired_partitions(conn, 90, now=datetime(2025, 10, 15, tzinfo=UTC)) == ["audit_logs_y2025m06"]
+    assert conn.statements[-1].startswith("DELETE FROM audit_logs_default WHERE")
+
+    conn = RecordingConnection(["audit_logs_default", "audit_logs_y2025m06"])
+    drop_expired_partitions(conn, 90, now=datetime(2025, 10, 15, tzinfo=UTC), dry_run=True)
+    assert all(sql.startswith("SELECT") for sql in conn.statements)
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import AuditLog, AuditLogWriter
+from app.database.connection import Base
+
+
+def _session_factory(tmp_path):
+    # Postgres works the same way: point create_engine at it instead
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def _record(i):
+    return {"request_id": str(i), "action": "api_request", "resource": "/wtk/windspeed", "method": "GET",
+            "status_code": 200, "duration_ms": i, "log_metadata": {"query_params": {"lat": "40.0"}}}
+
+
+def _count(Session):
+    with Session() as db:
+        return db.execute(select(func.count()).select_from(AuditLog)).scalar()
+
+
+def test_writes_in_batches_by_size_and_flushes_on_shutdown(tmp_path):
+    Session = _session_factory(tmp_path)
+    writer = AuditLogWriter(Session, batch_size=10, flush_seconds=60)
+    for i in range(25):
+        assert writer.submit(_record(i))
+
+    deadline = time.monotonic() + 5
+    while writer.stats()["written"] < 20 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Two full batches written; the remainder waits for the size or time trigger
+    assert writer.stats()["written"] == 20 and _count(Session) == 20
+
+    writer.shutdown()
+    stats = writer.stats()
+    assert stats["written"] == 25 and stats["batches"] == 3 and _count(Session) == 25
+    with Session() as db:
+        row = db.execute(select(AuditLog).where(AuditLog.request_id == "3")).scalar_one()
+    assert row.duration_ms == 3 and row.log_metadata == {"query_params": {"lat": "40.0"}}
+    # Closed writers drop instead of queueing, without reporting backpressure
+    assert not writer.submit(_record(99))
+    stats = writer.stats()
+    assert stats["dropped_closed"] == 1 and stats["dropped_queue_full"] == 0
+
+
+def test_writes_partial_batch_after_flush_interval(tmp_path):
+    Session = _session_factory(tmp_path)
+    writer = AuditLogWriter(Session, batch_size=100, flush_seconds=0.05)
+    writer.submit(_record(1))
+    deadline = time.monotonic() + 5
+    while _count(Session) < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _count(Session) == 1
+    writer.shutdown()
+
+
+def test_drops_when_queue_is_full_and_survives_failed_batches(tmp_path):
+    Session = _session_factory(tmp_path)
+    release = threading.Event()
+
+    def slow_session():
+        release.wait(5)
+        return Session()
+
+    writer = AuditLogWriter(slow_session, max_queue=5, batch_size=1, flush_seconds=0.01)
+    # The worker holds one record while the database is stuck; the queue takes 5 more
+    accepted = [writer.submit(_record(i)) for i in range(20)]
+    assert not all(accepted)
+    assert writer.stats()["dropped_queue_full"] == accepted.count(False)
+    release.set()
+    writer.shutdown()
+    assert _count(Session) == accepted.count(True)
+
+    # A batch the database rejects is counted and the worker keeps going
+    writer = AuditLogWriter(Session, batch_size=1, flush_seconds=0.01)
+    writer.submit(dict(_record(0), log_metadata={"unserializable": object()}))
+    writer.submit(_record(100))
+    writer.shutdown()
+    stats = writer.stats()
+    assert stats["failed_batches"] == 1 and stats["dropped_write_failed"] == 1 and stats["written"] == 1
@@ -0,0 +1,245 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from app.data_fetchers.data_fetcher_router import DataFetcherRouter
+from app.data_fetchers.database_data_fetcher import DatabaseDataFetcher
+from app import database_manager
+from app.database_manager import DatabaseManager
+from app.data_fetchers.single_flight import flight_key
+from app.utils.grid_index import GridIndex
+from app.utils.result_serialization import deserialize_result, serialize_result
+
+
+class SlowFetcher:
+    """Fetcher stand-in that holds every call until released and counts executions."""
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def fetch_data(self, lat, lng, height, avg_type="global"):
+        with self._lock:
+            self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("athena down")
+        return {"global_avg": 5.5, "lat": lat}
+
+
+def _router(fetcher):
+    router = DataFetcherRouter()
+    router.register_fetcher("athena_wtk", fetcher)
+    return router
+
+
+def _wait_for(predicate):
+    deadline = time.time() + 5
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.005)
+
+
+def test_flight_key_normalizes_params():
+    a = flight_key("athena_wtk", {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "global"})
+    b = flight_key("athena_wtk", {"avg_type": "global", "height": 100, "lng": -70.00000001, "lat": 40.00000004})
+    assert a == b
+    assert a != flight_key("athena_wtk", {"lat": 40.0, "lng": -70.0, "height": 80, "avg_type": "global"})
+    assert a != flight_key("athena_era5", {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "global"})
+
+
+def test_concurrent_identical_fetches_are_coalesced():
+    fetcher = SlowFetcher()
+    router = _router(fetcher)
+    params = {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "global"}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(router.fetch_data, dict(params), "athena_wtk") for _ in range(8)]
+        _wait_for(lambda: router.stats()["singleflight"]["calls"] == 8)
+        fetcher.release.set()
+        results = [f.result() for f in futures]
+
+    assert fetcher.calls == 1
+    assert all(r is results[0] for r in results)
+    stats = router.stats()["singleflight"]
+    assert stats["executions"] == 1 and stats["coalesced"] == 7 and stats["in_flight"] == 0
+
+    # Nothing is cached once the flight lands
+    router.fetch_data(dict(params), "athena_wtk")
+    assert fetcher.calls == 2
+
+
+def test_coalesced_callers_share_the_error():
+    fetcher = SlowFetcher(fail=True)
+    router = _router(fetcher)
+    params = {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "global"}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(router.fetch_data, dict(params), "athena_wtk") for _ in range(4)]
+        _wait_for(lambda: router.stats()["singleflight"]["calls"] == 4)
+        fetcher.release.set()
+        for f in futures:
+            with pytest.raises(RuntimeError, match="athena down"):
+                f.result()
+
+    assert fetcher.calls == 1
+    assert router.stats()["singleflight"]["errors"] == 1
+
+
+def test_async_callers_join_sync_flight():
+    fetcher = SlowFetcher()
+    router = _router(fetcher)
+    params = {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "global"}
+
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            sync_future = pool.submit(router.fetch_data, dict(params), "athena_wtk")
+            _wait_for(lambda: fetcher.calls == 1)
+            waiters = [asyncio.ensure_future(router.fetch_data_async(dict(params), "athena_wtk")) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            fetcher.release.set()
+            results = await asyncio.gather(*waiters)
+            return sync_future.result(), results
+
+    sync_result, async_results = asyncio.run(main())
+    assert fetcher.calls == 1
+    assert all(r is sync_result for r in async_results)
+    assert router.stats()["singleflight"]["coalesced"] == 3
+
+
+class CountingFetcher:
+    def __init__(self):
+        self.calls = 0
+
+    def fetch_data(self, lat, lng, height, avg_type="global"):
+        self.calls += 1
+        if avg_type == "none":
+            return pd.DataFrame({"year": np.repeat([2001, 2002], 3), "mohr": np.arange(6), f"windspeed_{height}m": np.linspace(3, 9, 6)})
+        return {"global_avg": np.float32(5.5), "lat": lat}
+
+
+def _tiered_router(db_path, fetcher, **kwargs):
+    router = DataFetcherRouter(**kwargs)
+    router.register_fetcher("database", DatabaseDataFetcher(DatabaseManager(str(db_path))))
+    router.register_fetcher("athena_wtk", fetcher, cache_results=True)
+    return router
+
+
+def test_routing_serves_memory_then_database_then_source(tmp_path):
+    fetcher = CountingFetcher()
+    params = {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "global"}
+
+    first = _tiered_router(tmp_path / "cache.db", fetcher)
+    assert first.fetch_data_routing(dict(params), "athena_wtk") == {"global_avg": 5.5, "lat": 40.0}
+    assert first.fetch_data_routing(dict(params), "athena_wtk")["global_avg"] == 5.5
+    assert fetcher.calls == 1
+    cache = first.stats()["result_cache"]
+    assert cache["memory"]["hits"] == 1 and cache["memory"]["misses"] == 1
+    assert cache["database"]["misses"] == 1 and cache["source_fetches"] == 1
+
+    # Another worker: empty memory tier, shared database file
+    second = _tiered_router(tmp_path / "cache.db", fetcher)
+    assert second.fetch_data_routing(dict(params), "athena_wtk") == {"global_avg": 5.5, "lat": 40.0}
+    assert second.fetch_data_routing(dict(params), "athena_wtk") == {"global_avg": 5.5, "lat": 40.0}
+    assert fetcher.calls == 1
+    cache = second.stats()["result_cache"]
+    assert cache["database"]["hit_ratio"] == 1.0
+    assert cache["memory"]["hit_ratio"] == 0.5
+    assert cache["source_fetches"] == 0
+
+
+def test_routing_round_trips_dataframes_through_the_database(tmp_path):
+    fetcher = CountingFetcher()
+    params = {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "none"}
+    expected = _tiered_router(tmp_path / "cache.db", fetcher).fetch_data_routing(dict(params), "athena_wtk")
+
+    stored = _tiered_router(tmp_path / "cache.db", fetcher, memory_cache_bytes=0).fetch_data_routing(dict(params), "athena_wtk")
+    assert fetcher.calls == 1
+    pd.testing.assert_frame_equal(stored, expected)
+
+
+def test_routing_bypasses_cache_for_uncached_sources(tmp_path):
+    fetcher = CountingFetcher()
+    router = _tiered_router(tmp_path / "cache.db", CountingFetcher())
+    router.register_fetcher("s3_wtk", fetcher)
+    params = {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "global"}
+    router.fetch_data_routing(dict(params), "s3_wtk")
+    router.fetch_data_routing(dict(params), "s3_wtk")
+    assert fetcher.calls == 2
+    assert router.stats()["result_cache"]["memory"]["hits"] == 0
+
+
+def test_routing_snaps_nearby_clicks_to_one_grid_cell(tmp_path):
+    lats, lngs = np.meshgrid(np.arange(39.0, 41.0, 0.02), np.arange(-71.0, -69.0, 0.02), indexing="ij")
+    grid = GridIndex(np.arange(lats.size).astype(str), lats.ravel(), lngs.ravel())
+    fetcher = CountingFetcher()
+    router = DataFetcherRouter()
+    router.register_fetcher("database", DatabaseDataFetcher(DatabaseManager(str(tmp_path / "cache.db"))))
+    router.register_fetcher("athena_wtk", fetcher, cache_results=True, grid_index=grid)
+
+    # Two clicks ~10 m apart in the same cell, then one in the next cell
+    router.fetch_data_routing({"lat": 40.0001, "lng": -70.0001, "height": 100, "avg_type": "global"}, "athena_wtk")
+    router.fetch_data_routing({"lat": 40.0000, "lng": -70.0002, "height": 100, "avg_type": "global"}, "athena_wtk")
+    assert fetcher.calls == 1
+    router.fetch_data_routing({"lat": 40.02, "lng": -70.0, "height": 100, "avg_type": "global"}, "athena_wtk")
+    assert fetcher.calls == 2
+
+    # The database tier is keyed by cell too: a fresh worker hits it from another point in the cell
+    other = DataFetcherRouter()
+    other.register_fetcher("database", DatabaseDataFetcher(DatabaseManager(str(tmp_path / "cache.db"))))
+    other.register_fetcher("athena_wtk", fetcher, cache_results=True, grid_index=grid)
+    other.fetch_data_routing({"lat": 39.9999, "lng": -69.9999, "height": 100, "avg_type": "global"}, "athena_wtk")
+    assert fetcher.calls == 2
+    assert other.stats()["result_cache"]["grid_snapped_lookups"] == 1
+
+
+def test_database_tier_evicts_least_recently_used_rows(tmp_path, monkeypatch):
+    clock = iter(range(1000, 100000, 100))
+    monkeypatch.setattr(database_manager.time, "time", lambda: float(next(clock)))
+    db = DatabaseManager(str(tmp_path / "cache.db"), max_bytes=300)
+    for key in ("a", "b", "c"):
+        db.store_data(key, "json", b"x" * 100)
+    # Reading "a" makes "b" the least recently used row
+    assert db.get_data("a") == ("json", b"x" * 100)
+    db.store_data("d", "json", b"x" * 100)
+
+    assert db.get_data("b") is None
+    assert all(db.get_data(key) for key in ("a", "c", "d"))
+    assert db.stats() == {"rows": 3, "bytes": 300, "max_bytes": 300, "evictions": 1}
+
+
+def test_database_tier_upgrades_tables_without_size_columns(tmp_path):
+    path = tmp_path / "cache.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE cached_results (key TEXT PRIMARY KEY, kind TEXT NOT NULL, data BLOB NOT NULL, created_at REAL NOT NULL)")
+    conn.execute("INSERT INTO cached_results VALUES ('old', 'json', ?, 1.0)", (b"{}",))
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(str(path))
+    assert db.get_data("old") == ("json", b"{}")
+    assert db.stats()["bytes"] == 2
+
+
+def test_database_tier_keeps_non_string_dict_keys(tmp_path):
+    value = {"yearly_avg": {2020: 1.5, np.int64(2021): np.float32(2.5)}, "__items__": [1, 2], "flags": {True: None}}
+    expected = {"yearly_avg": {2020: 1.5, 2021: 2.5}, "__items__": [1, 2], "flags": {True: None}}
+    assert deserialize_result(*serialize_result(value)) == expected
+    assert deserialize_result(*serialize_result({"global_avg": 5.5})) == {"global_avg": 5.5}
+
+    class YearlyFetcher(CountingFetcher):
+        def fetch_data(self, lat, lng, height, avg_type="global"):
+            self.calls += 1
+            return {"yearly_avg": {2020: 1.5, 2021: 2.5}}
+
+    fetcher = YearlyFetcher()
+    params = {"lat": 40.0, "lng": -70.0, "height": 100, "avg_type": "yearly"}
+    from_memory = _tiered_router(tmp_path / "cache.db", fetcher).fetch_data_routing(dict(params), "athena_wtk")
+    from_database = _tiered_router(tmp_path / "cache.db", fetcher).fetch_data_routing(dict(params), "athena_wtk")
+    assert fetcher.calls == 1
+    assert from_database == from_memory == {"yearly_avg": {2020: 1.5, 2021: 2.5}}
@@ -0,0 +1,72 @@
+import time
+import numpy as np
+from app.utils.grid_index import GridIndex
+
+
+def _regular_grid(step=0.02, lat0=35.0, lng0=-105.0, n=200):
+    lats, lngs = np.meshgrid(lat0 + step * np.arange(n), lng0 + step * np.arange(n), indexing="ij")
+    ids = np.char.zfill(np.arange(n * n).astype(str), 6)
+    return GridIndex(ids, lats.ravel(), lngs.ravel())
+
+
+def _haversine_km(lat, lng, lats, lngs):
+    lat, lng, lats, lngs = map(np.radians, (lat, lng, lats, lngs))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * 6371.0088 * np.arcsin(np.sqrt(a))
+
+
+def test_snap_matches_brute_force_haversine():
+    grid = _regular_grid()
+    rng = np.random.default_rng(0)
+    for lat, lng in zip(rng.uniform(35, 38.98, 200), rng.uniform(-105, -101.02, 200)):
+        expected = grid.ids[np.argmin(_haversine_km(lat, lng, grid.lats, grid.lngs))]
+        assert grid.snap(lat, lng) == str(expected)
+
+
+def test_k_nearest_and_batch_match_brute_force_haversine():
+    grid = _regular_grid()
+    rng = np.random.default_rng(2)
+    lats, lngs = rng.uniform(35, 38.98, 300), rng.uniform(-105, -101.02, 300)
+    batch = grid.nearest_batch(lats, lngs, n_neighbors=4)
+    positions, distances = grid.query(lats, lngs, k=4)
+    for lat, lng, locations, row_km in zip(lats, lngs, batch, distances):
+        d = _haversine_km(lat, lng, grid.lats, grid.lngs)
+        expected = np.argsort(d, kind="stable")[:4]
+        np.testing.assert_allclose(row_km, d[expected], rtol=1e-9, atol=1e-9)
+        # Ties (equidistant grid points) may come back in either order
+        assert {i for i, _, _ in locations} == {str(grid.ids[p]) for p in expected} or np.isclose(d[expected[3]], d[np.argsort(d)[4]])
+        assert locations == grid.nearest(lat, lng, n_neighbors=4)
+        assert locations[0] == grid.nearest(lat, lng)[0]
+
+
+def test_nearby_clicks_snap_to_the_same_cell():
+    grid = _regular_grid()
+    # ~10 m apart, both well inside the cell centered on (36.0, -104.0)
+    assert grid.snap(36.0003, -104.0002) == grid.snap(36.0002, -104.0001)
+    assert grid.snap(36.0003, -104.0002) != grid.snap(36.02, -104.0)
+
+
+def test_save_and_load_round_trip(tmp_path, monkeypatch):
+    grid = _regular_grid(n=20)
+    grid.save(str(tmp_path), "wtk")
+    monkeypatch.setenv("GRID_INDEX_DIR", str(tmp_path))
+    loaded = GridIndex.load("wtk")
+    assert len(loaded) == len(grid)
+    assert isinstance(loaded.lats, np.memmap) and isinstance(loaded.xyz, np.memmap)
+    assert loaded.nearest(35.1, -104.9, 3) == grid.nearest(35.1, -104.9, 3)
+    assert loaded.snap(35.1, -104.9) == grid.snap(35.1, -104.9)
+    assert GridIndex.load("era5") is None
+    monkeypatch.delenv("GRID_INDEX_DIR")
+    assert GridIndex.load("wtk") is None
+
+
+def test_snap_runs_in_microseconds():
+    grid = _regular_grid(step=0.01, n=1000)  # 1M points
+    n = 2000
+    points = np.random.default_rng(1).uniform((35, -105), (44.99, -95.01), (n, 2))
+    start = time.perf_counter()
+    for lat, lng in points:
+        grid.snap(lat, lng)
+    per_call = (time.perf_counter() - start) / n
+    print(f"snap: {per_call * 1e6:.1f} us per lookup over {len(grid)} points")
+    assert per_call < 500e-6
@@ -0,0 +1,64 @@
+import gzip
+import io
+import time
+import pandas as pd
+from app.data_fetchers.s3_data_fetcher import S3DataFetcher
+from app.data_fetchers.s3_fetch_pool import S3FetchPool
+from app.utils.gzip_stream import concat_gzip_csv
+
+
+def _year_csv(year, rows=2000, trailing_newline=True):
+    df = pd.DataFrame({"year": year, "mohr": range(rows), "windspeed_100m": [round(0.001 * i, 3) for i in range(rows)]})
+    text = df.to_csv(index=False)
+    return text if trailing_newline else text.rstrip("\n")
+
+
+def test_concat_gzip_csv_matches_dataframe_concat():
+    texts = [_year_csv(2001), _year_csv(2002, trailing_newline=False), _year_csv(2003)]
+    payloads = [gzip.compress(t.encode()) for t in texts]
+    stream = list(concat_gzip_csv([payloads[0], None, payloads[1], payloads[2]], chunk_size=1024))
+
+    out = b"".join(stream)
+    assert out.startswith(payloads[0])  # first object passed through unchanged
+    expected = pd.concat([pd.read_csv(io.StringIO(t)) for t in texts], ignore_index=True)
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(out), compression="gzip"), expected)
+    assert len(stream) > len(payloads)  # emitted incrementally, not one blob per object
+
+
+def test_concat_gzip_csv_first_object_without_trailing_newline():
+    texts = [_year_csv(2001, trailing_newline=False), _year_csv(2002)]
+    payloads = [gzip.compress(t.encode()) for t in texts]
+
+    # A lone object is passed through untouched
+    assert b"".join(concat_gzip_csv([None, payloads[0]])) == payloads[0]
+    out = b"".join(concat_gzip_csv(payloads))
+    expected = pd.concat([pd.read_csv(io.StringIO(t)) for t in texts], ignore_index=True)
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(out), compression="gzip"), expected)
+
+
+class SlowYearS3Client:
+    """Later years arrive later; each GET records when it was served."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+
+    def get_object(self, Bucket, Key):
+        year = int(Key.split("year=")[1].split("/")[0])
+        time.sleep(self.delay * (year - 2000))
+        return {"Body": io.BytesIO(gzip.compress(_year_csv(year).encode()))}
+
+
+def test_passthrough_starts_streaming_with_first_object():
+    fetcher = S3DataFetcher(bucket_name="bucket", prefix="p", s3_key_template="era5", grid="era5",
+                            s3_client=SlowYearS3Client(), fetch_pool=S3FetchPool(max_concurrency=4, per_request=4))
+    start = time.perf_counter()
+    stream = concat_gzip_csv(fetcher.iter_gzip_objects(["1"], [2004, 2001, 2003, 2002]))
+    first = next(stream)
+    first_byte = time.perf_counter() - start
+    out = first + b"".join(stream)
+    total = time.perf_counter() - start
+
+    assert first_byte < 0.1 < total
+    df = pd.read_csv(io.BytesIO(out), compression="gzip")
+    assert list(df["year"].drop_duplicates()) == [2001, 2002, 2003, 2004]
+    assert len(df) == 4 * 2000
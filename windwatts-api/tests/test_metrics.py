@@ -0,0 +1,76 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from app.middleware import MetricsMiddleware
+from app.utils.metrics import set_request_source
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _call(app, path):
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": b"", "headers": [], "client": ("127.0.0.1", 1234),
+             "server": ("test", 80), "scheme": "http", "http_version": "1.1"}
+    pending = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if pending:
+            return pending.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template_and_source():
+    app = FastAPI()
+
+    @app.get("/metrics-test/windspeed/{avg_type}")
+    def windspeed(avg_type: str):
+        set_request_source("athena_era5")
+        return {"avg_type": avg_type}
+
+    app.add_middleware(MetricsMiddleware)
+    labels = dict(method="GET", route="/metrics-test/windspeed/{avg_type}", source="athena_era5")
+    before = _sample("windwatts_requests_total", status="200", **labels)
+
+    _call(app, "/metrics-test/windspeed/global")
+    _call(app, "/metrics-test/windspeed/yearly")
+    _call(app, "/metrics-test/nowhere")
+
+    assert _sample("windwatts_requests_total", status="200", **labels) == before + 2
+    assert _sample("windwatts_request_duration_seconds_count", **labels) >= 2
+    assert _sample("windwatts_requests_total", method="GET", route="unmatched", source="none", status="404") >= 1
+    assert _sample("windwatts_requests_in_flight") == 0
+
+
+def test_multiprocess_metrics_aggregate_across_workers(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), PYTHONPATH=str(REPO_ROOT), DATABASE_URL="sqlite://")
+    worker = ("from app.utils.metrics import FETCH_LATENCY, REQUESTS\n"
+              "REQUESTS.labels('GET', '/era5/windspeed/{avg_type}', 'athena_era5', '200').inc(3)\n"
+              "FETCH_LATENCY.labels('athena_era5').observe(0.2)\n")
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True, cwd=REPO_ROOT)
+
+    scrape = ("from app.utils.metrics import exposition\n"
+              "print(exposition()[0].decode())\n")
+    text = subprocess.run([sys.executable, "-c", scrape], env=env, check=True, cwd=REPO_ROOT,
+                          capture_output=True, text=True).stdout
+    assert ('windwatts_requests_total{method="GET",route="/era5/windspeed/{avg_type}",'
+            'source="athena_era5",status="200"} 6.0') in text
+    assert 'windwatts_fetch_duration_seconds_count{fetcher="athena_era5"} 2.0' in text
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from app.middleware import AuditMiddleware, LoggingMiddleware
+
+CHUNK = b"x" * 1024
+
+
+def _app(middleware):
+    app = FastAPI()
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((CHUNK for _ in range(10)), media_type="text/csv")
+
+    @app.post("/echo")
+    async def echo(payload: dict):
+        return payload
+
+    @app.get("/missing")
+    def missing():
+        return StreamingResponse(iter([b"nope"]), status_code=404)
+
+    app.add_middleware(middleware)
+    return app
+
+
+def _call(app, method, path, body=b""):
+    messages = []
+    scope = {"type": "http", "method": method, "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": b"", "headers": [(b"content-type", b"application/json")], "client": ("127.0.0.1", 1234),
+             "server": ("test", 80), "scheme": "http", "http_version": "1.1"}
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if pending:
+            return pending.pop(0)
+        # Client stays connected until the response is done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+def test_logging_middleware_streams_and_counts_bytes(caplog):
+    with caplog.at_level(logging.INFO, logger="app.middleware.logger"):
+        messages = _call(_app(LoggingMiddleware), "GET", "/stream")
+    bodies = [m["body"] for m in messages if m["type"] == "http.response.body" and m.get("body")]
+    # Forwarded chunk by chunk, not rebuilt into one body
+    assert len(bodies) == 10 and b"".join(bodies) == CHUNK * 10
+    assert "Status: 200" in caplog.text and f"Size: {len(CHUNK) * 10} bytes" in caplog.text
+
+
+def test_audit_middleware_counts_request_and_response_bytes(monkeypatch):
+    logged = []
+    monkeypatch.setattr(AuditMiddleware, "_log_request", lambda self, **kw: logged.append(kw))
+    app = _app(AuditMiddleware)
+
+    messages = _call(app, "GET", "/stream")
+    assert sum(1 for m in messages if m["type"] == "http.response.body" and m.get("body")) == 10
+    assert logged[-1]["status_code"] == 200 and logged[-1]["response_size"] == len(CHUNK) * 10
+
+    body = b'{"lat": 40.0}'
+    _call(app, "POST", "/echo", body)
+    assert logged[-1]["request_size"] == len(body) and logged[-1]["response_size"] == len(b'{"lat":40.0}')
+
+    # Failed requests are not audited
+    _call(app, "GET", "/missing")
+    assert len(logged) == 2
+
+
+def test_audit_middleware_hands_records_to_writer():
+    class FakeWriter:
+        def __init__(self):
+            self.records = []
+
+        def submit(self, record):
+            self.records.append(record)
+            return True
+
+    writer = FakeWriter()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(AuditMiddleware, writer=writer)
+    _call(app, "GET", "/items/7")
+    record = writer.records[-1]
+    assert record["resource"] == "/items/7" and record["method"] == "GET" and record["status_code"] == 200
+    assert record["ip_address"] == "127.0.0.1" and record["log_metadata"]["path_params"] == {"item_id": "7"}
@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from app.power_curve.powercurve import PowerCurve
+
+POWER_CURVE_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "power_curve", "powercurves")
+
+
+def _load_curves():
+    return {
+        os.path.splitext(f)[0]: PowerCurve(os.path.join(POWER_CURVE_DIR, f))
+        for f in sorted(os.listdir(POWER_CURVE_DIR)) if f.endswith(".csv")
+    }
+
+
+def _legacy_windspeed_to_kw(curve, ws):
+    ws = pd.Series(ws).apply(lambda x: 0 if x < 0 else x).apply(lambda x: curve.max_ws if x > curve.max_ws else x)
+    return curve.powercurve_intrp(ws)
+
+
+def test_windspeed_to_kw_array_matches_interp1d():
+    rng = np.random.default_rng(0)
+    ws = np.concatenate([rng.uniform(-5, 35, 5000), [0.0, np.nan, 25.0]])
+    for name, curve in _load_curves().items():
+        expected = _legacy_windspeed_to_kw(curve, ws)
+        np.testing.assert_allclose(curve.windspeed_to_kw_array(ws), expected, rtol=0, atol=1e-9, err_msg=name)
+
+
+def test_windspeed_to_kw_array_keeps_2d_shape():
+    curve = _load_curves()["nrel-reference-100kW"]
+    block = np.random.default_rng(1).uniform(0, 30, size=(4, 1000))
+    kw = curve.windspeed_to_kw_array(block)
+    assert kw.shape == block.shape
+    np.testing.assert_allclose(kw[2], curve.windspeed_to_kw_array(block[2]))
+
+
+def test_windspeed_to_kw_dataframe_api():
+    curve = _load_curves()["nrel-reference-2.5kW"]
+    df = pd.DataFrame({"windspeed_100m": [-1.0, 3.0, 7.5, 40.0]})
+    kw = curve.windspeed_to_kw(df, "windspeed_100m")
+    np.testing.assert_allclose(kw, _legacy_windspeed_to_kw(curve, df["windspeed_100m"]))
+
+
+def test_windspeed_to_kw_array_untrimmed_out_of_range_raises():
+    curve = _load_curves()["nrel-reference-2.5kW"]
+    with pytest.raises(ValueError):
+        curve.windspeed_to_kw_array(np.array([5.0, 99.0]), trim=False)
+
+
+def test_out_of_range_stats_are_counted_and_bounded():
+    curve = PowerCurve(os.path.join(POWER_CURVE_DIR, "nrel-reference-100kW.csv"))
+    ws = np.array([-0.5, -3.0, 5.0, np.nan, curve.max_ws + 0.5, curve.max_ws + 30.0])
+    for _ in range(1000):
+        curve.windspeed_to_kw_array(ws)
+
+    stats = curve.stats.snapshot()
+    assert stats["samples"] == 6000
+    assert stats["nan"] == 1000
+    assert stats["below_curve"] == 2000
+    assert stats["above_curve"] == 2000
+    assert stats["histogram"]["below_curve"] == [1000, 0, 1000, 0, 0, 0]
+    assert stats["histogram"]["above_curve"] == [1000, 0, 0, 0, 0, 1000]
+    assert not hasattr(curve, "above_curve")
+
+    curve.reset_counters()
+    assert curve.stats.snapshot()["samples"] == 0
+
+
+def test_out_of_range_stats_are_thread_safe():
+    from concurrent.futures import ThreadPoolExecutor
+
+    curve = PowerCurve(os.path.join(POWER_CURVE_DIR, "nrel-reference-100kW.csv"))
+    ws = np.array([-1.0, 10.0, curve.max_ws + 1.0])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: curve.windspeed_to_kw_array(ws), range(2000)))
+
+    stats = curve.stats.snapshot()
+    assert (stats["samples"], stats["below_curve"], stats["above_curve"]) == (6000, 2000, 2000)
+
+
+def test_evaluate_curves_matches_each_curve():
+    from app.power_curve.powercurve import evaluate_curves
+
+    curves = _load_curves()
+    rng = np.random.default_rng(1)
+    ws = np.concatenate([rng.uniform(-5, 40, 20000), [np.nan, 0.0]])
+    kw = evaluate_curves(list(curves.values()), ws)
+    assert kw.shape == (len(curves), ws.size)
+    for row, (name, curve) in zip(kw, curves.items()):
+        np.testing.assert_allclose(row, curve.windspeed_to_kw_array(ws), rtol=0, atol=1e-9, err_msg=name)
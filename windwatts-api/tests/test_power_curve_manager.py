@@ -0,0 +1,303 @@
+import os
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+from app.power_curve.power_curve_manager import PowerCurveManager
+
+POWER_CURVE_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "power_curve", "powercurves")
+
+manager = PowerCurveManager(POWER_CURVE_DIR)
+
+
+def _sample_quantiles(seed: int = 0, n_probs: int = 101):
+    rng = np.random.default_rng(seed)
+    probs = np.linspace(0, 1, n_probs)
+    sample = rng.weibull(2.0, size=8760) * 7.0
+    return np.quantile(sample, probs), probs
+
+
+def _dense_argmin_inverse(x_smooth, y_smooth, y_hat):
+    diff = np.abs(y_smooth[:, None] - y_hat[None, :])
+    return x_smooth[np.argmin(diff, axis=0)]
+
+
+def test_find_inverse_nearest_reproduces_dense_argmin():
+    x_smooth = np.linspace(0, 25, 1000)
+    y_smooth = 1 - np.exp(-(x_smooth / 7.0) ** 2)
+    y_hat = np.linspace(0, 1, 501)
+    np.testing.assert_array_equal(
+        manager.find_inverse(x_smooth, y_smooth, y_hat, method="nearest"),
+        _dense_argmin_inverse(x_smooth, y_smooth, y_hat),
+    )
+
+
+def test_swi_nearest_mode_matches_legacy_pipeline():
+    quants, probs = _sample_quantiles()
+    legacy = PowerCurveManager(POWER_CURVE_DIR, inverse_method="nearest")
+    q_new, _ = legacy.estimation_quantiles_SWI(quants, probs)
+    q_ref, _ = manager.estimation_quantiles_SWI(quants, probs, inverse_method="nearest")
+    np.testing.assert_array_equal(q_new, q_ref)
+
+
+def test_find_inverse_interp_accuracy():
+    # CDF y = x^2 on [0, 1] has the exact inverse sqrt(p)
+    x_smooth = np.linspace(0, 1, 1000)
+    y_hat = np.linspace(0, 1, 501)
+    q_interp = manager.find_inverse(x_smooth, x_smooth ** 2, y_hat, method="interp")
+    q_nearest = manager.find_inverse(x_smooth, x_smooth ** 2, y_hat, method="nearest")
+    exact = np.sqrt(y_hat)
+    # Linear interpolation is far closer to the analytic inverse than snapping to the grid
+    assert np.max(np.abs(q_interp[1:] - exact[1:])) < 1e-4
+    assert np.max(np.abs(q_interp - exact)) < np.max(np.abs(q_nearest - exact))
+
+
+def test_find_inverse_interp_handles_flat_and_non_monotone_cdf():
+    x_smooth = np.linspace(0, 10, 11)
+    y_smooth = np.array([0.0, 0.1, 0.1, 0.3, 0.28, 0.5, 0.7, 0.9, 1.0, 1.0, 1.0])
+    q = manager.find_inverse(x_smooth, y_smooth, np.array([-0.5, 0.0, 0.1, 0.29, 1.0, 1.5]), method="interp")
+    assert np.all(np.diff(q) >= 0)
+    assert q[0] == 0.0 and q[1] == 0.0
+    assert q[2] == pytest.approx(1.0)
+    assert q[-1] == 10.0
+
+
+def test_swi_interp_within_grid_spacing_of_nearest():
+    quants, probs = _sample_quantiles(seed=3)
+    q_interp, p_new = manager.estimation_quantiles_SWI(quants, probs, inverse_method="interp")
+    q_nearest, _ = manager.estimation_quantiles_SWI(quants, probs, inverse_method="nearest")
+    spacing = (quants[-1] - quants[0]) / (1000 - 1)
+    assert p_new.shape == q_interp.shape == (501,)
+    assert np.all(np.diff(q_interp) >= 0)
+    assert np.max(np.abs(q_interp - q_nearest)) <= 2 * spacing
+
+
+def _best_time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_find_inverse_interp_latency():
+    x_smooth = np.linspace(0, 25, 4000)
+    y_smooth = 1 - np.exp(-(x_smooth / 7.0) ** 2)
+    y_hat = np.linspace(0, 1, 2000)
+    t_nearest = _best_time(lambda: manager.find_inverse(x_smooth, y_smooth, y_hat, method="nearest"))
+    t_interp = _best_time(lambda: manager.find_inverse(x_smooth, y_smooth, y_hat, method="interp"))
+    assert t_interp * 5 < t_nearest
+
+
+def _era5_like_df(n_years: int, seed: int = 0, height: int = 100):
+    rng = np.random.default_rng(seed)
+    probs = np.linspace(0, 1, 101)
+    frames = []
+    for year in range(2000, 2000 + n_years):
+        quants = np.quantile(rng.weibull(2.0, size=8760) * rng.uniform(5, 9), probs)
+        frames.append(pd.DataFrame({"year": year, "probability": probs, f"windspeed_{height}m": quants}))
+    # Shuffle rows like an unordered Athena result
+    return pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=seed)
+
+
+def test_swi_batch_matches_sequential_rows():
+    quants = np.vstack([_sample_quantiles(seed)[0] for seed in range(12)])
+    probs = np.linspace(0, 1, 101)
+    quants[4, 10:15] = quants[4, 10]     # flat run needing jitter
+    quants[7, 3] = np.nan                # unusable row
+    for method in PowerCurveManager.INVERSE_METHODS:
+        batch, p_new = manager.estimation_quantiles_SWI_batch(quants, probs, inverse_method=method)
+        sequential = np.vstack([manager.estimation_quantiles_SWI(q, probs, inverse_method=method)[0] for q in quants])
+        assert batch.shape == (12, 501)
+        np.testing.assert_allclose(batch, sequential, rtol=0, atol=1e-9)
+        assert np.all(batch[7] == 0)
+
+
+def test_yearly_quantile_production_matches_per_year_path():
+    df = _era5_like_df(6)
+    out = manager.fetch_energy_production_df(df, 100, "nrel-reference-100kW")
+    curve = manager.get_curve("nrel-reference-100kW")
+    expected = []
+    for year, group in df.groupby("year"):
+        group = group.sort_values("probability").reset_index(drop=True)
+        mid = manager._quantiles_to_kw_midpoints(group, "windspeed_100m", curve, use_swi=True)
+        mid.insert(0, "year", year)
+        expected.append(mid)
+    expected = pd.concat(expected, ignore_index=True)
+    assert list(out.columns) == ["year", "windspeed_100m", "windspeed_100m_kw"]
+    np.testing.assert_array_equal(out["year"].to_numpy(), expected["year"].to_numpy())
+    np.testing.assert_allclose(out[["windspeed_100m", "windspeed_100m_kw"]].to_numpy(),
+                               expected[["windspeed_100m", "windspeed_100m_kw"]].to_numpy(), atol=1e-8)
+
+
+def test_yearly_quantile_production_ragged_years_fall_back():
+    df = _era5_like_df(3)
+    df = df.drop(df[(df["year"] == 2001) & (df["probability"] > 0.95)].index)
+    out = manager.fetch_energy_production_df(df, 100, "nrel-reference-100kW")
+    assert sorted(out["year"].unique()) == [2000, 2001, 2002]
+    assert len(out) == 3 * 500
+
+
+def test_swi_batch_matches_single_and_is_shift_invariant():
+    quants, probs = _sample_quantiles()
+    first, _ = manager.estimation_quantiles_SWI(quants, probs)
+    second, _ = manager.estimation_quantiles_SWI(quants + 0.5, probs.copy())
+    np.testing.assert_allclose(second, first + 0.5, atol=1e-9)
+
+    batch, _ = manager.estimation_quantiles_SWI_batch(np.vstack([quants, quants + 0.5]), probs)
+    np.testing.assert_allclose(batch[0], first, atol=1e-9)
+    np.testing.assert_allclose(batch[1], second, atol=1e-9)
+
+
+def _reference_jitter(q, eps=1e-5):
+    q = np.asarray(q, dtype=np.float64).copy()
+    for i in range(1, q.size):
+        if not np.isfinite(q[i]) or not np.isfinite(q[i - 1]):
+            continue
+        if q[i] <= q[i - 1]:
+            q[i] = q[i - 1] + eps
+    return q
+
+
+def _random_quantile_vector(rng, eps=1e-5):
+    n = int(rng.integers(1, 60))
+    kind = rng.integers(0, 4)
+    if kind == 0:    # rounded sorted values -> flat runs
+        q = np.sort(np.round(rng.uniform(0, 3, n), 1))
+    elif kind == 1:  # arbitrary order, with plateaus
+        q = np.round(rng.normal(5, 2, n), 0)
+    elif kind == 2:  # rises smaller than eps after a plateau
+        q = np.cumsum(rng.choice([0.0, eps * 0.3, eps * 0.9, 0.2], size=n))
+    else:            # calm-site ERA5-like: long zero run then increasing
+        q = np.concatenate([np.zeros(n // 2), np.sort(rng.uniform(0, 8, n - n // 2))])
+    if n > 2 and rng.random() < 0.3:
+        q[rng.integers(0, n, size=int(rng.integers(1, 3)))] = rng.choice([np.nan, np.inf])
+    return q
+
+
+def test_jitter_matches_sequential_loop_property():
+    rng = np.random.default_rng(2024)
+    for _ in range(500):
+        q = _random_quantile_vector(rng)
+        out = manager._jitter_nonincreasing(q)
+        np.testing.assert_allclose(out, _reference_jitter(q), rtol=0, atol=1e-12, equal_nan=True)
+        finite = np.isfinite(q)
+        assert np.array_equal(np.isfinite(out), finite)
+        pairs = finite[1:] & finite[:-1]
+        with np.errstate(invalid="ignore"):
+            assert np.all(np.diff(out)[pairs] > 0)
+
+
+def test_jitter_2d_matches_rowwise_loop():
+    rng = np.random.default_rng(7)
+    rows = []
+    for _ in range(200):
+        q = _random_quantile_vector(rng)
+        rows.append(np.resize(q, 40))
+    block = np.vstack(rows)
+    out = manager._jitter_nonincreasing(block)
+    expected = np.vstack([_reference_jitter(r) for r in block])
+    np.testing.assert_allclose(out, expected, rtol=0, atol=1e-12, equal_nan=True)
+
+
+def test_swi_repairs_flat_runs_without_retry(capsys):
+    quants, probs = _sample_quantiles()
+    quants[:20] = 0.0
+    q_new, _ = manager.estimation_quantiles_SWI(quants, probs)
+    assert "failed" not in capsys.readouterr().out
+    assert np.all(np.isfinite(q_new)) and np.any(q_new > 0)
+
+
+def _wtk_like_df(n_years: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    mohr = np.array([m * 100 + h for m in range(1, 13) for h in range(24)])
+    n = n_years * mohr.size
+    return pd.DataFrame({
+        "year": np.repeat(np.arange(2001, 2001 + n_years), mohr.size),
+        "mohr": np.tile(mohr, n_years),
+        "windspeed_40m": rng.weibull(2.0, n) * 6.0,
+        "windspeed_100m": rng.weibull(2.0, n) * 7.0,
+        "winddirection_100m": rng.uniform(0, 360, n),
+    })
+
+
+def test_production_report_computes_kw_table_once(monkeypatch):
+    calls = []
+
+    def counting(original):
+        def wrapper(*args, **kwargs):
+            calls.append(1)
+            return original(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(manager, "fetch_energy_production_df", counting(manager.fetch_energy_production_df))
+    monkeypatch.setattr(manager, "_timeseries_production_columns", counting(manager._timeseries_production_columns))
+    for df in (_wtk_like_df(3), _era5_like_df(4)):
+        calls.clear()
+        report = manager.production_report(df, 100, "nrel-reference-100kW")
+        summary, yearly = report.summary, report.yearly
+        assert report.global_kwh == summary["Average year"]["kWh produced"]
+        assert set(summary) == {"Lowest year", "Average year", "Highest year"}
+        assert len(yearly) == df["year"].nunique()
+        assert len(calls) == 1
+
+
+def test_production_report_matches_manager_views():
+    df = _wtk_like_df(5)
+    report = manager.production_report(df, 100, "siva_750_u50")
+    assert report.summary == manager.fetch_avg_energy_production_summary(df, 100, "siva_750_u50")
+    assert report.yearly == manager.fetch_yearly_avg_energy_production(df, 100, "siva_750_u50")
+    assert report.monthly == manager.fetch_monthly_avg_energy_production(df, 100, "siva_750_u50")
+    assert list(report.monthly) == ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    with pytest.raises(ValueError):
+        manager.production_report(_era5_like_df(2), 100, "siva_750_u50").monthly
+
+
+def _wtk_multi_height_df(n_years, heights=(40, 60, 80, 100, 120, 140, 160, 200), seed=0):
+    rng = np.random.default_rng(seed)
+    years = np.repeat(np.arange(2001, 2001 + n_years), 8760)
+    hours = np.arange(8760) % 24
+    months = np.minimum(np.arange(8760) // 730 + 1, 12)
+    data = {"year": years, "mohr": np.tile(months * 100 + hours, n_years)}
+    for h in heights:
+        data[f"windspeed_{h}m"] = rng.weibull(2.0, years.size) * 7.0
+        data[f"winddirection_{h}m"] = rng.uniform(0, 360, years.size)
+    return pd.DataFrame(data)
+
+
+def test_timeseries_report_does_not_copy_input():
+    df = _wtk_multi_height_df(20)
+    before = df.copy()
+    input_bytes = df.memory_usage(index=False).sum()
+
+    tracemalloc.start()
+    try:
+        report = manager.production_report(df, 100, "nrel-reference-100kW")
+        report.yearly, report.summary, report.monthly
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # A single copy of the frame would already exceed the input size
+    assert peak < 0.75 * input_bytes
+    pd.testing.assert_frame_equal(df, before)
+    assert len(report.yearly) == 20
+
+
+def test_compare_power_curves_matches_per_curve_reports():
+    ensemble = _era5_like_df(1).drop(columns="year")
+    for df in (_wtk_like_df(3), _era5_like_df(4), ensemble):
+        ranking = manager.compare_power_curves(df, 100)
+        assert [r["rank"] for r in ranking] == list(range(1, len(manager.power_curves) + 1))
+        kwh = [r["kWh produced"] for r in ranking]
+        assert kwh == sorted(kwh, reverse=True)
+        for r in ranking:
+            assert r["kWh produced"] == manager.production_report(df, 100, r["powercurve"]).global_kwh
+            assert 0 <= r["Capacity factor"] <= 1
+
+    subset = manager.compare_power_curves(_wtk_like_df(2), 100, ["siva_750_u50", "bergey-excel-15"])
+    assert {r["powercurve"] for r in subset} == {"siva_750_u50", "bergey-excel-15"}
+    with pytest.raises(KeyError):
+        manager.compare_power_curves(_wtk_like_df(2), 100, ["missing-curve"])
@@ -0,0 +1,108 @@
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from app.power_curve.powercurve import PowerCurve
+from app.power_curve.power_curve_registry import PowerCurveRegistry
+from app.power_curve.power_curve_manager import PowerCurveManager
+
+POWER_CURVE_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "power_curve", "powercurves")
+
+
+def _copy_curves(tmp_path):
+    curve_dir = tmp_path / "powercurves"
+    shutil.copytree(POWER_CURVE_DIR, curve_dir)
+    return str(curve_dir)
+
+
+def _startup_time(curve_dir, snapshot_dir, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        PowerCurveManager(curve_dir, snapshot_dir=snapshot_dir, reload_interval=0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_snapshot_is_reused_on_later_starts(tmp_path, monkeypatch):
+    curve_dir = _copy_curves(tmp_path)
+    snapshot_dir = str(tmp_path / "snapshot")
+
+    cold = PowerCurveRegistry(curve_dir, snapshot_dir=snapshot_dir, reload_interval=0)
+    assert not cold.loaded_from_snapshot
+    assert os.path.exists(os.path.join(snapshot_dir, "index.json"))
+
+    def no_parsing(path):
+        raise AssertionError(f"{path} parsed despite a valid snapshot")
+
+    with monkeypatch.context() as m:
+        m.setattr(PowerCurve, "read_points", staticmethod(no_parsing))
+        warm = PowerCurveRegistry(curve_dir, snapshot_dir=snapshot_dir, reload_interval=0)
+    assert warm.loaded_from_snapshot
+    assert sorted(warm.curves) == sorted(cold.curves)
+    for name, curve in warm.curves.items():
+        np.testing.assert_array_equal(curve.ws_points, cold.curves[name].ws_points)
+        np.testing.assert_array_equal(curve.kw_points, cold.curves[name].kw_points)
+        assert curve.max_ws == cold.curves[name].max_ws
+
+
+def test_startup_time_with_snapshot(tmp_path):
+    curve_dir = _copy_curves(tmp_path)
+    cold = min(_startup_time(curve_dir, str(tmp_path / f"cold{i}"), repeat=1) for i in range(3))
+    warm = _startup_time(curve_dir, str(tmp_path / "cold0"))
+    print(f"power curve startup: parse {cold * 1e3:.1f} ms, snapshot {warm * 1e3:.1f} ms")
+    assert warm < cold
+
+
+def test_corrupt_snapshot_falls_back_to_parsing(tmp_path):
+    curve_dir = _copy_curves(tmp_path)
+    snapshot_dir = tmp_path / "snapshot"
+    PowerCurveRegistry(curve_dir, snapshot_dir=str(snapshot_dir), reload_interval=0)
+    (snapshot_dir / "index.json").write_text("{not json")
+
+    registry = PowerCurveRegistry(curve_dir, snapshot_dir=str(snapshot_dir), reload_interval=0)
+    assert not registry.loaded_from_snapshot
+    assert len(registry.curves) == len(os.listdir(POWER_CURVE_DIR))
+
+
+def test_hot_reload_swaps_changed_and_new_curves(tmp_path):
+    curve_dir = _copy_curves(tmp_path)
+    registry = PowerCurveRegistry(curve_dir, snapshot_dir=str(tmp_path / "snapshot"), reload_interval=1e-6)
+    before = registry.curves
+    untouched = before["siva_750_u50"]
+
+    pd.DataFrame({"Wind Speed (m/s)": [0, 5, 10], "Turbine Output": [0, 1, 2]}).to_csv(
+        os.path.join(curve_dir, "bergey-excel-15.csv"), index=False)
+    pd.DataFrame({"Wind Speed (m/s)": [1, 3, 12], "Turbine Output": [0, 4, 8]}).to_csv(
+        os.path.join(curve_dir, "new-turbine-8kW.csv"), index=False)
+    os.remove(os.path.join(curve_dir, "eocycle-25.csv"))
+    time.sleep(1e-3)
+
+    thread = registry.check_for_updates()
+    assert thread is not None
+    thread.join()
+
+    after = registry.curves
+    assert after is not before
+    assert "eocycle-25" in before and "eocycle-25" not in after
+    assert after["siva_750_u50"] is untouched
+    np.testing.assert_array_equal(after["bergey-excel-15"].kw_points, [0, 1, 2])
+    np.testing.assert_array_equal(after["new-turbine-8kW"].ws_points, [0, 1, 3, 12])
+    assert after["new-turbine-8kW"].max_ws == 12
+
+    # The refreshed snapshot serves the next cold start
+    again = PowerCurveRegistry(curve_dir, snapshot_dir=str(tmp_path / "snapshot"), reload_interval=0)
+    assert again.loaded_from_snapshot and sorted(again.curves) == sorted(after)
+
+
+def test_xlsx_curves_load(tmp_path):
+    pytest.importorskip("openpyxl")
+    curve_dir = tmp_path / "powercurves"
+    curve_dir.mkdir()
+    pd.DataFrame({"Wind Speed (m/s)": [1, 5, 10], "Turbine Output": [0, 2, 5]}).to_excel(
+        curve_dir / "excel-turbine.xlsx", index=False)
+
+    registry = PowerCurveRegistry(str(curve_dir), snapshot_dir=str(tmp_path / "snapshot"), reload_interval=0)
+    np.testing.assert_array_equal(registry.curves["excel-turbine"].kw_points, [0, 0, 2, 5])
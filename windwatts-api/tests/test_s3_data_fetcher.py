@@ -0,0 +1,298 @@
+import gzip
+import io
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+from app.data_fetchers.s3_data_fetcher import S3DataFetcher
+from app.data_fetchers.s3_fetch_pool import AdaptiveLimiter, S3FetchPool
+from app.data_fetchers.s3_object_cache import S3ObjectCache
+from app.data_fetchers.columnar_store import ColumnarStore
+
+
+class FakeS3Client:
+    """Local S3 stand-in: fixed latency per GET, gzip CSV bodies, concurrency tracking."""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.active = 0
+        self.max_active = 0
+        self.keys = []
+        self._lock = threading.Lock()
+
+    def get_object(self, Bucket, Key):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.keys.append(Key)
+        try:
+            time.sleep(self.latency)
+            body = gzip.compress(f"key,windspeed_100m\n{Key},5.0\n".encode())
+            return {"Body": io.BytesIO(body)}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _fetcher(client, pool):
+    return S3DataFetcher(bucket_name="bucket", prefix="p", s3_key_template="era5", grid="era5",
+                         s3_client=client, fetch_pool=pool)
+
+
+def test_fetch_data_is_concurrent_and_ordered():
+    client = FakeS3Client(latency=0.05)
+    pool = S3FetchPool(max_concurrency=16, per_request=8, limiter=AdaptiveLimiter(max_limit=16, initial_limit=16))
+    fetcher = _fetcher(client, pool)
+    indices, years = ["1", "2", "3", "4"], [2020, 2021, 2022, 2023]
+
+    start = time.perf_counter()
+    df = fetcher.fetch_data(indices, years)
+    elapsed = time.perf_counter() - start
+
+    assert list(df["key"]) == fetcher.generate_s3_keys(indices, years)
+    assert client.max_active == 8
+    # 16 objects at 50 ms each: two waves rather than sixteen sequential GETs
+    assert elapsed < 8 * client.latency
+
+
+def test_global_bound_holds_across_requests():
+    client = FakeS3Client(latency=0.02)
+    pool = S3FetchPool(max_concurrency=16, per_request=4, limiter=AdaptiveLimiter(max_limit=6, initial_limit=6))
+    fetcher = _fetcher(client, pool)
+
+    threads = [threading.Thread(target=fetcher.fetch_data, args=([str(i)], list(range(2000, 2008)))) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(client.keys) == 32
+    assert client.max_active <= 6
+
+
+def test_limiter_adapts_to_latency():
+    limiter = AdaptiveLimiter(max_limit=32, initial_limit=4, cooldown=0.0)
+    for _ in range(600):
+        limiter.acquire()
+        limiter.release(0.01)
+    assert limiter.limit == 32
+
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(0.2)
+    assert limiter.limit < 32
+
+    before = limiter.limit
+    limiter.acquire()
+    limiter.release(None, ok=False)
+    assert limiter.limit < before
+    assert limiter.limit >= limiter.min_limit
+
+
+class ErrorS3Client(FakeS3Client):
+    """Answers keys ending in "missing" with NoSuchKey and keys ending in "slow" with SlowDown."""
+
+    def get_object(self, Bucket, Key):
+        for suffix, code in (("missing", "NoSuchKey"), ("slow", "SlowDown")):
+            if Key.endswith(suffix):
+                raise ClientError({"Error": {"Code": code}}, "GetObject")
+        return super().get_object(Bucket, Key)
+
+
+def test_limiter_learns_only_from_s3_round_trips(tmp_path):
+    client = ErrorS3Client(latency=0.0)
+    limiter = AdaptiveLimiter(max_limit=16, initial_limit=8, cooldown=0.0)
+    pool = S3FetchPool(max_concurrency=16, per_request=4, limiter=limiter)
+    fetcher = S3DataFetcher(bucket_name="bucket", prefix="p", s3_key_template="era5", grid="era5",
+                            s3_client=client, fetch_pool=pool, object_cache=S3ObjectCache(str(tmp_path)))
+    key = fetcher.generate_s3_keys(["1"], [2020])[0]
+
+    # A missing object is a normal answer: a latency sample, not a failure
+    assert list(pool.imap(fetcher._try_get_object_bytes, ["p/missing"] * 4)) == [None] * 4
+    assert limiter.limit == 8 and limiter.stats()["ewma_latency_s"] is not None
+
+    # Cache hits never reach S3 and leave the latency averages alone
+    list(pool.imap(fetcher.get_object_bytes, [key]))
+    before = limiter.stats()
+    assert list(pool.imap(fetcher.get_object_bytes, [key] * 8)) == [fetcher.get_object_bytes(key)] * 8
+    assert limiter.stats() == before
+
+    # Throttling backs off even though the fetcher swallows the error
+    assert list(pool.imap(fetcher._try_get_object_bytes, ["p/slow"])) == [None]
+    assert limiter.limit < before["limit"]
+
+
+class CountingS3Client(FakeS3Client):
+    def __init__(self, etag='"v1"'):
+        super().__init__(latency=0.0)
+        self.etag = etag
+        self.gets = 0
+        self.heads = 0
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        obj = super().get_object(Bucket, Key)
+        obj["ETag"] = self.etag
+        return obj
+
+    def head_object(self, Bucket, Key):
+        self.heads += 1
+        return {"ETag": self.etag}
+
+
+def test_object_cache_serves_repeat_downloads_locally(tmp_path):
+    client = CountingS3Client()
+    cache = S3ObjectCache(str(tmp_path))
+    pool = S3FetchPool(max_concurrency=4, per_request=4)
+    fetcher = S3DataFetcher(bucket_name="bucket", prefix="p", s3_key_template="era5", grid="era5",
+                            s3_client=client, fetch_pool=pool, object_cache=cache)
+
+    first = fetcher.fetch_data(["1", "2"], [2020, 2021])
+    second = fetcher.fetch_data(["1", "2"], [2020, 2021])
+    pd.testing.assert_frame_equal(first, second)
+    assert client.gets == 4
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (4, 4)
+    assert stats["bytes_from_cache"] == stats["bytes_downloaded"] > 0
+
+    # Another worker sharing the directory hits too
+    other = S3ObjectCache(str(tmp_path))
+    assert other.fetch(client, "bucket", fetcher.generate_s3_keys(["1"], [2020])[0])
+    assert client.gets == 4
+
+
+def test_object_cache_evicts_least_recently_used(tmp_path):
+    client = CountingS3Client()
+    body_size = len(client.get_object("b", "k0")["Body"].read())
+    cache = S3ObjectCache(str(tmp_path), max_bytes=3 * body_size)
+
+    for i, key in enumerate(["k0", "k1", "k2"]):
+        cache.fetch(client, "b", key)
+        os.utime(cache.path_for("b", key), (1000 + i, 1000 + i))
+    cache.fetch(client, "b", "k0")  # refresh k0, so k1 is now the oldest
+    cache.fetch(client, "b", "k3")
+
+    assert cache.path_for("b", "k1") is None
+    assert all(cache.path_for("b", k) for k in ("k0", "k2", "k3"))
+    assert cache.stats()["evictions"] == 1
+
+
+def test_object_cache_revalidates_changed_etag(tmp_path):
+    client = CountingS3Client()
+    cache = S3ObjectCache(str(tmp_path), revalidate_after=0.0)
+    cache.fetch(client, "b", "k")
+    time.sleep(0.01)
+    cache.fetch(client, "b", "k")
+    assert (client.heads, client.gets) == (1, 1)
+
+    client.etag = '"v2"'
+    time.sleep(0.01)
+    cache.fetch(client, "b", "k")
+    assert client.gets == 2
+
+
+def _wtk_like_gzip_csv(rows=240):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"datetime": pd.date_range("2020-01-01", periods=rows, freq="h").astype(str), "mohr": np.arange(rows) % 2400})
+    for h in (40, 100, 200):
+        df[f"windspeed_{h}m"] = np.round(rng.weibull(2.0, rows) * 7, 3)
+        df[f"winddirection_{h}m"] = np.round(rng.uniform(0, 360, rows), 2)
+    return df, gzip.compress(df.to_csv(index=False).encode())
+
+
+class CsvS3Client(CountingS3Client):
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        return {"Body": io.BytesIO(self.body), "ETag": self.etag}
+
+
+def test_columnar_tier_projects_columns_without_reparsing(tmp_path, monkeypatch):
+    expected, body = _wtk_like_gzip_csv()
+    client = CsvS3Client(body)
+    fetcher = S3DataFetcher(bucket_name="bucket", prefix="p", s3_key_template="wtk", grid="wtk", s3_client=client,
+                            fetch_pool=S3FetchPool(max_concurrency=2), columnar_store=ColumnarStore(str(tmp_path)))
+    key = fetcher.generate_s3_keys(["1"], [2020])[0]
+
+    first = fetcher.fetch_s3_file(key, None)
+    assert list(first.columns) == list(expected.columns)
+    # Values keep the dtype read_csv parsed them with
+    assert (first.dtypes == expected.dtypes).all()
+    np.testing.assert_array_equal(first["windspeed_100m"], expected["windspeed_100m"])
+    assert list(first["datetime"]) == list(expected["datetime"])
+
+    monkeypatch.setattr(pd, "read_csv", lambda *a, **k: pytest.fail("re-parsed a transcoded object"))
+    projected = fetcher.fetch_s3_file(key, ["windspeed_100m", "mohr"])
+    assert list(projected.columns) == ["mohr", "windspeed_100m"]
+    assert client.gets == 1
+    assert fetcher.fetch_s3_file(key, ["windspeed_999m"]) is None
+
+
+def _columnar_object_size(store):
+    (obj_dir,) = [e.path for e in os.scandir(store.root_dir) if not e.name.startswith(".tmp-")]
+    return sum(f.stat().st_size for f in os.scandir(obj_dir))
+
+
+def test_columnar_store_evicts_least_recently_read(tmp_path):
+    df = pd.DataFrame({"windspeed_100m": np.linspace(0, 10, 1000), "year": np.arange(1000)})
+    probe = ColumnarStore(str(tmp_path / "probe"))
+    probe.write("b", "k", df)
+    size = _columnar_object_size(probe)
+
+    store = ColumnarStore(str(tmp_path / "store"), max_bytes=3 * size + 64)
+    for i, key in enumerate(["k0", "k1", "k2"]):
+        store.write("b", key, df)
+        os.utime(os.path.join(store._object_dir("b", key), "manifest.json"), (1000 + i, 1000 + i))
+    # Reading k0 makes k1 the least recently used
+    assert store.read("b", "k0") is not None
+    store.write("b", "k3", df)
+
+    assert store.read("b", "k1") is None
+    for key in ("k0", "k2", "k3"):
+        pd.testing.assert_frame_equal(store.read("b", key).copy(), df)
+    assert store.stats()["evictions"] == 1
+
+    # An object larger than the whole budget is evicted at once and still served by the fetcher
+    client = CsvS3Client(gzip.compress(df.to_csv(index=False).encode()))
+    fetcher = S3DataFetcher(bucket_name="b", prefix="p", s3_key_template="era5", grid="era5", s3_client=client,
+                            fetch_pool=S3FetchPool(max_concurrency=2),
+                            columnar_store=ColumnarStore(str(tmp_path / "tiny"), max_bytes=1))
+    pd.testing.assert_frame_equal(fetcher.fetch_s3_file("p/k", None), df)
+
+
+def test_columnar_store_keeps_gaps_in_text_columns(tmp_path):
+    body = gzip.compress(b"time,windspeed_100m\n2020-01-01,1.5\n,2.5\n2020-01-03,\n")
+    expected = pd.read_csv(io.BytesIO(body), compression="gzip")
+    store = ColumnarStore(str(tmp_path))
+    fetcher = S3DataFetcher(bucket_name="b", prefix="p", s3_key_template="era5", grid="era5", s3_client=CsvS3Client(body),
+                            fetch_pool=S3FetchPool(max_concurrency=2), columnar_store=store)
+
+    pd.testing.assert_frame_equal(fetcher.fetch_s3_file("p/k", None).copy(), expected)
+    assert store.stats()["hits"] == 1
+    pd.testing.assert_frame_equal(store.read("b", "p/k", ["time"]).copy(), expected[["time"]])
+
+    store.write("b", "obj", pd.DataFrame({"time": ["2020-01-01", None]}, dtype=object))
+    assert list(store.read("b", "obj")["time"]) == ["2020-01-01", None]
+
+
+def test_columnar_store_scans_only_when_over_budget_or_due(tmp_path, monkeypatch):
+    df = pd.DataFrame({"windspeed_100m": np.linspace(0, 10, 1000)})
+    store = ColumnarStore(str(tmp_path), max_bytes=10 ** 9, scan_interval=3600)
+    scans = []
+    evict = store._evict
+    monkeypatch.setattr(store, "_evict", lambda: scans.append(1) or evict())
+
+    for i in range(5):
+        store.write("b", f"k{i}", df)
+    # The first write learns the store size; the rest stay within the estimate
+    assert len(scans) == 1
+
+    store.max_bytes = 1
+    store.write("b", "k5", df)
+    assert len(scans) == 2 and store.stats()["evictions"] == 6
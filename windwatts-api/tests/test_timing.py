@@ -0,0 +1,91 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import APIRouter, FastAPI
+from app.middleware import ServerTimingMiddleware
+from app.utils.timed_route import TimedRoute
+from app.utils.timing import RequestTimings, StageHistograms, stage_histograms, timed, timed_stage
+
+
+def _call(app, path):
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": b"", "headers": [], "client": ("127.0.0.1", 1234),
+             "server": ("test", 80), "scheme": "http", "http_version": "1.1"}
+    pending = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if pending:
+            return pending.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+def test_timed_is_a_no_op_outside_a_request():
+    stage_histograms.clear()
+
+    @timed_stage("outside")
+    def work():
+        return 42
+
+    with timed("outside"):
+        assert work() == 42
+    assert "outside" not in stage_histograms.snapshot()
+
+
+def test_request_timings_and_histograms():
+    timings = RequestTimings()
+    timings.record("athena", 0.8124)
+    timings.record("swi", 0.05)
+    timings.record("swi", 0.05)
+    assert timings.server_timing() == 'athena;dur=812.4, swi;dur=100.0;desc="x2"'
+
+    histograms = StageHistograms(bounds_ms=(10, 100, 1000))
+    for seconds in [0.005] * 90 + [0.5] * 9 + [5.0]:
+        histograms.observe("athena", seconds)
+    stats = histograms.snapshot()["athena"]
+    assert stats["count"] == 100 and stats["p50_ms"] == 10 and stats["p95_ms"] == 1000
+    assert [b["count"] for b in stats["buckets"]] == [90, 0, 9, 1]
+
+
+def test_server_timing_header_and_log_line(caplog):
+    stage_histograms.clear()
+    router = APIRouter(route_class=TimedRoute)
+
+    @timed_stage("work")
+    def work():
+        time.sleep(0.02)
+        return [{"value": i} for i in range(1000)]
+
+    @router.get("/report")
+    def report():
+        return {"rows": work()}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ServerTimingMiddleware)
+
+    with caplog.at_level(logging.INFO, logger="app.middleware.server_timing"):
+        messages = _call(app, "/report")
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    header = dict(start["headers"])[b"server-timing"].decode()
+    stages = {part.split(";")[0]: float(part.split("dur=")[1].split(";")[0]) for part in header.split(", ")}
+    # The decorated function ran in the thread pool and still reported into the request
+    assert set(stages) == {"work", "endpoint", "serialize", "app"}
+    assert stages["work"] >= 20 and stages["endpoint"] >= stages["work"] and stages["app"] >= stages["endpoint"]
+
+    line = next(r.getMessage() for r in caplog.records if r.getMessage().startswith("request_timing "))
+    logged = json.loads(line[len("request_timing "):])
+    assert logged["status"] == 200 and logged["path"] == "/report" and logged["total_ms"] >= stages["work"]
+    assert set(logged["stages_ms"]) == set(stages)
+    assert {"work", "endpoint", "serialize", "app", "total"} <= set(stage_histograms.snapshot())
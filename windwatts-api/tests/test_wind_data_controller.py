@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 from app.main import app
+from app.controllers import wtk_data_controller
 # from unittest.mock import patch
 
 client = TestClient(app)
@@ -38,3 +39,48 @@ def test_get_available_power_curves():
     assert response.status_code == 200
     json = response.json()
     assert "available_power_curves" in json
+
+
+def test_get_powercurve_stats():
+    response = client.get("/wtk/powercurve-stats?selected_powercurve=nrel-reference-100kW")
+    assert response.status_code == 200
+    stats = response.json()["powercurve_stats"]
+    assert list(stats) == ["nrel-reference-100kW"]
+    assert {"samples", "nan", "below_curve", "above_curve", "histogram"} <= set(stats["nrel-reference-100kW"])
+
+
+def test_get_fetch_stats():
+    response = client.get("/wtk/fetch-stats")
+    assert response.status_code == 200
+    assert {"calls", "executions", "coalesced", "errors", "in_flight"} <= set(response.json()["singleflight"])
+
+
+def test_get_energy_production_comparison():
+    response = client.get(
+        "/wtk/energy-production-comparison?lat=40.0&lng=-70.0&height=100"
+        "&selected_powercurves=nrel-reference-100kW&selected_powercurves=bergey-excel-15"
+    )
+    assert response.status_code == 200
+    ranking = response.json()["powercurve_comparison"]
+    assert [r["rank"] for r in ranking] == [1, 2]
+    assert {r["powercurve"] for r in ranking} == {"nrel-reference-100kW", "bergey-excel-15"}
+
+
+def test_download_csv_rejects_unknown_passthrough():
+    response = client.get("/wtk/download-csv?gridIndex=031233&passthrough=brotli")
+    assert response.status_code == 400
+
+
+def test_nearest_locations_batch():
+    response = client.post(
+        "/wtk/nearest-locations-batch?n_neighbors=2",
+        json={"points": [{"latitude": 40.0, "longitude": -105.0}, {"latitude": 39.7, "longitude": -105.2}]},
+    )
+    if wtk_data_controller.wtk_grid_index is None:
+        # Without GRID_INDEX_DIR batches would cost one Athena query per point
+        assert response.status_code == 503
+        return
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert all(len(r["locations"]) == 2 for r in results)
@@ -0,0 +1,77 @@
+import io
+import time
+import tracemalloc
+import zipfile
+import pytest
+from app.utils.zip_stream import ZipEntry, ZipSource, entries_as_ready, stream_zip
+
+
+def _rows(prefix, n_chunks=40, rows_per_chunk=2000):
+    for c in range(n_chunks):
+        yield "".join(f"{prefix},{c},{r},5.123\n" for r in range(rows_per_chunk)).encode()
+
+
+def _delayed(delay, prefix, **kwargs):
+    def produce():
+        time.sleep(delay)
+        yield from _rows(prefix, **kwargs)
+    return produce
+
+
+def test_stream_zip_round_trips_and_stores_passthrough_entries():
+    entries = [ZipEntry("a.csv", _rows("a", 3)), ZipEntry("b.csv.gz", [b"\x1f\x8b already compressed"], compress=False)]
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(entries, compression_level=9))))
+    assert archive.testzip() is None
+    assert archive.read("a.csv") == b"".join(_rows("a", 3))
+    assert archive.getinfo("a.csv").compress_type == zipfile.ZIP_DEFLATED
+    assert archive.getinfo("b.csv.gz").compress_type == zipfile.ZIP_STORED
+    assert {info.external_attr >> 16 for info in archive.infolist()} == {0o644}
+    # The level reaches the deflater
+    fast = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip([ZipEntry("a.csv", _rows("a", 3))], compression_level=1))))
+    assert fast.getinfo("a.csv").compress_size > archive.getinfo("a.csv").compress_size
+
+    stored = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip([ZipEntry("a.csv", _rows("a", 1))], compression_level=0))))
+    assert stored.getinfo("a.csv").compress_type == zipfile.ZIP_STORED
+    with pytest.raises(ValueError):
+        list(stream_zip([], compression_level=10))
+
+
+def test_entries_are_emitted_as_ready_and_failures_listed():
+    def broken():
+        raise RuntimeError("no data")
+        yield b""
+
+    sources = [
+        ZipSource("slow.csv", _delayed(0.2, "slow", n_chunks=2)),
+        ZipSource("broken.csv", broken),
+        ZipSource("fast.csv", _delayed(0.0, "fast", n_chunks=2)),
+    ]
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(stream_zip(entries_as_ready(sources)))))
+    assert archive.namelist() == ["fast.csv", "slow.csv", "errors.txt"]
+    assert b"broken.csv: no data" in archive.read("errors.txt")
+
+
+def test_streaming_zip_time_to_first_byte_and_peak_memory():
+    sources = [ZipSource("n0.csv", _delayed(0.05, "n0"))] + [
+        ZipSource(f"n{i}.csv", _delayed(0.4, f"n{i}")) for i in range(1, 4)
+    ]
+    total_csv = 4 * len(b"".join(_rows("n0")))
+
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        stream = stream_zip(entries_as_ready(sources, max_workers=4, queue_chunks=4))
+        first = next(stream)
+        ttfb = time.perf_counter() - start
+        size = len(first) + sum(len(chunk) for chunk in stream)
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    print(f"zip stream: ttfb {ttfb * 1e3:.0f} ms, total {total * 1e3:.0f} ms, peak {peak / 1e6:.1f} MB of {total_csv / 1e6:.1f} MB CSV")
+    # The first neighbor is streamed while the others are still being fetched
+    assert ttfb < 0.3 < total
+    assert size > 0
+    # Bounded by the per-neighbor queues, not by the archive size
+    assert peak < total_csv / 2